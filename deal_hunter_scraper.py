@@ -3,15 +3,20 @@ Deal Hunter — BizBuySell Scraper & Scoring Engine
 Scrapes listings, scores against acquisition criteria, outputs to Excel + email digest.
 """
 
+import hashlib
+import heapq
 import json
 import re
 import time
 import subprocess
 from datetime import datetime
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from typing import Optional
 from urllib.parse import quote
 
+from gazetteer import GeoFilter, Place, parse_geography, resolve_location
+from scoring_model import ScoringModel, model_for
+
 # --- ACQUISITION CRITERIA ---
 CRITERIA = {
     "ev_min": 1_000_000,
@@ -190,13 +195,133 @@ def parse_money(text: str) -> Optional[float]:
         return None
 
 
+# --- COMPILED CRITERIA ---
+
+@dataclass(frozen=True)
+class CompiledCriteria:
+    """Immutable, versioned snapshot of acquisition criteria.
+
+    Built once per criteria version by compile_criteria() and passed
+    explicitly through the pipeline. Only tuples and frozensets are stored,
+    so a snapshot can be shared between threads and pickled to workers or
+    to the on-disk cache. The free-text geography is compiled to a
+    gazetteer GeoFilter (frozen, likewise). ``model``, when set, is a
+    trained ScoringModel that replaces the hand-tuned score.
+    """
+    version: str
+    ev_min: float
+    ev_max: float
+    revenue_min: float
+    revenue_max: float
+    ebitda_min: float
+    max_multiple: float
+    geography: str
+    preferred_traits: tuple
+    avoid_traits: tuple
+    target_industries: tuple
+    search_keywords: tuple
+    bizbuysell_categories: tuple
+    preferred: frozenset
+    avoid: frozenset
+    targets: frozenset
+    max_trait: int
+    geo: GeoFilter
+    profile_id: str = ""
+    model: Optional[ScoringModel] = None
+
+    def as_dict(self) -> dict:
+        """Return the criteria in the same shape as CRITERIA / /api/criteria."""
+        return {
+            "ev_min": self.ev_min,
+            "ev_max": self.ev_max,
+            "revenue_min": self.revenue_min,
+            "revenue_max": self.revenue_max,
+            "ebitda_min": self.ebitda_min,
+            "max_multiple": self.max_multiple,
+            "geography": self.geography,
+            "preferred_traits": list(self.preferred_traits),
+            "avoid_traits": list(self.avoid_traits),
+            "target_industries": list(self.target_industries),
+            "search_keywords": list(self.search_keywords),
+            "bizbuysell_categories": list(self.bizbuysell_categories),
+        }
+
+
+def merge_criteria(base: dict, overrides: dict) -> dict:
+    """Return a copy of ``base`` with values from an API-style criteria dict.
+
+    Scalars are taken when present; lists only when non-empty, so a partially
+    filled profile inherits the rest from ``base``.
+    """
+    merged = dict(base)
+    for key in ("ev_min", "ev_max", "revenue_min", "revenue_max", "ebitda_min", "max_multiple", "geography"):
+        merged[key] = overrides.get(key, base.get(key))
+    for key in ("preferred_traits", "avoid_traits", "target_industries", "search_keywords"):
+        if overrides.get(key):
+            merged[key] = overrides[key]
+    return merged
+
+
+def compile_criteria(overrides: dict = None, version: str = "", profile_id: str = "") -> CompiledCriteria:
+    """Compile CRITERIA (plus optional API-style overrides) into a snapshot.
+
+    ``version`` should be the API's ``updated_at`` when there is one; otherwise
+    a content hash of the resolved criteria is used.
+    """
+    criteria = merge_criteria(CRITERIA, overrides or {})
+    if not version:
+        digest = hashlib.sha1(json.dumps(criteria, sort_keys=True, default=str).encode()).hexdigest()
+        version = f"sha1:{digest[:12]}"
+    preferred_traits = tuple(criteria["preferred_traits"])
+    return CompiledCriteria(
+        version=version,
+        ev_min=criteria["ev_min"],
+        ev_max=criteria["ev_max"],
+        revenue_min=criteria["revenue_min"],
+        revenue_max=criteria["revenue_max"],
+        ebitda_min=criteria["ebitda_min"],
+        max_multiple=criteria["max_multiple"],
+        geography=criteria["geography"],
+        preferred_traits=preferred_traits,
+        avoid_traits=tuple(criteria["avoid_traits"]),
+        target_industries=tuple(criteria["target_industries"]),
+        search_keywords=tuple(criteria["search_keywords"]),
+        bizbuysell_categories=tuple(criteria["bizbuysell_categories"]),
+        preferred=frozenset(preferred_traits),
+        avoid=frozenset(criteria["avoid_traits"]),
+        targets=frozenset(criteria["target_industries"]),
+        max_trait=len(preferred_traits) * 10,
+        geo=parse_geography(criteria["geography"]),
+        profile_id=profile_id,
+    )
+
+
+DEFAULT_CRITERIA = compile_criteria(version="default")
+
+
+def attach_scoring_model(criteria: CompiledCriteria, model: Optional[ScoringModel]) -> CompiledCriteria:
+    """Score with a trained model; its version becomes part of the criteria version."""
+    if model is None:
+        return criteria
+    return replace(criteria, model=model, version=f"{criteria.version}+model:{model.version}")
+
+
+# Keyword lists lowered once instead of on every call
+_TRAIT_KEYWORDS_LOWER = tuple(
+    (trait, tuple(kw.lower() for kw in keywords)) for trait, keywords in TRAIT_KEYWORDS.items()
+)
+_INDUSTRY_KEYWORDS_LOWER = tuple(
+    (industry, tuple(kw.lower() for kw in keywords)) for industry, keywords in INDUSTRY_KEYWORDS.items()
+)
+
+
 def classify_industry(title: str, description: str, category: str = "") -> str:
     """Classify a deal into one of our target industries based on keywords.
     Falls back to BizBuySell category mapping if keyword matching fails."""
     text = f"{title} {description}".lower()
-    for industry, keywords in INDUSTRY_KEYWORDS.items():
+    for industry, keywords in _INDUSTRY_KEYWORDS_LOWER:
         for kw in keywords:
-            if kw.lower() in text:
+            if kw in text:
                 return industry
 
     # Fallback: try to match the BizBuySell site category
@@ -209,63 +334,132 @@ def classify_industry(title: str, description: str, category: str = "") -> str:
     return "Other"
 
 
-def detect_traits(description: str, title: str) -> tuple[list, list]:
-    """Analyze description to detect positive and negative traits."""
+def match_traits(description: str, title: str) -> list:
+    """Return every trait in TRAIT_KEYWORDS whose keywords appear in the text.
+    Independent of criteria, so it can be shared across profiles."""
     text = f"{title} {description}".lower()
-    positive = []
-    negative = []
-
-    for trait, keywords in TRAIT_KEYWORDS.items():
+    matched = []
+    for trait, keywords in _TRAIT_KEYWORDS_LOWER:
         for kw in keywords:
-            if kw.lower() in text:
-                if trait in CRITERIA["preferred_traits"]:
-                    if trait not in positive:
-                        positive.append(trait)
-                elif trait in CRITERIA["avoid_traits"]:
-                    if trait not in negative:
-                        negative.append(trait)
+            if kw in text:
+                matched.append(trait)
                 break
+    return matched
+
 
+def split_traits(matched: list, criteria: CompiledCriteria) -> tuple[list, list]:
+    """Split matched traits into (positive, negative) for one set of criteria."""
+    positive = [t for t in matched if t in criteria.preferred]
+    negative = [t for t in matched if t not in criteria.preferred and t in criteria.avoid]
     return positive, negative
 
 
-def score_deal(deal: Deal) -> int:
-    """Score a deal 0-100 based on criteria match."""
-    score = 0
-    max_possible = 100
+def detect_traits(description: str, title: str, criteria: CompiledCriteria = None) -> tuple[list, list]:
+    """Analyze description to detect positive and negative traits."""
+    return split_traits(match_traits(description, title), criteria or DEFAULT_CRITERIA)
+
+
+# --- TEXT ANALYSIS CACHE ---
+
+# Fingerprint of the keyword tables classify_industry/match_traits use;
+# cached results computed with other tables are never reused.
+KEYWORDS_VERSION = hashlib.sha1(
+    json.dumps([TRAIT_KEYWORDS, INDUSTRY_KEYWORDS, CATEGORY_TO_INDUSTRY], sort_keys=True).encode()
+).hexdigest()[:12]
+
+_analysis_cache = None
+
+
+def set_analysis_cache(cache) -> None:
+    """Install a cache (get(key) / put(key, value)) for analyze_text; None disables it."""
+    global _analysis_cache
+    _analysis_cache = cache
+
+
+def analysis_key(title: str, description: str, category: str = "") -> str:
+    """Content hash of a listing's text plus the keyword tables version."""
+    text = "\0".join((KEYWORDS_VERSION, title or "", description or "", category or ""))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def analyze_text(title: str, description: str, category: str = "") -> tuple[str, list]:
+    """Return (industry, matched traits) for a listing, memoized by content hash.
 
+    Both results depend only on the text and the keyword tables, never on
+    criteria, so cached entries stay valid across criteria changes; the
+    criteria-specific split into traits/avoid_traits is recomputed.
+    """
+    cache = _analysis_cache
+    if cache is None:
+        return classify_industry(title, description, category), match_traits(description, title)
+    key = analysis_key(title, description, category)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit[0], list(hit[1])
+    industry, matched = classify_industry(title, description, category), match_traits(description, title)
+    cache.put(key, (industry, tuple(matched)))
+    return industry, matched
+
+
+def hand_tuned_score(traits: list, avoid_traits: list, multiple: Optional[float], industry: str,
+                     criteria: CompiledCriteria) -> float:
+    """The default 0-100 score, before geography and rounding."""
     # Trait scoring (50% weight)
     trait_score = 0
-    max_trait = len(CRITERIA["preferred_traits"]) * 10
-    for t in deal.traits:
-        if t in CRITERIA["preferred_traits"]:
+    max_trait = criteria.max_trait
+    for t in traits:
+        if t in criteria.preferred:
             trait_score += 10
-    for t in deal.avoid_traits:
-        if t in CRITERIA["avoid_traits"]:
+    for t in avoid_traits:
+        if t in criteria.avoid:
             trait_score -= 15
     trait_score = max(0, min(100, (trait_score / max_trait) * 100 if max_trait > 0 else 0))
 
     # Multiple scoring (30% weight)
     multiple_score = 0
-    if deal.multiple is not None:
-        if deal.multiple <= 2.5:
+    if multiple is not None:
+        if multiple <= 2.5:
             multiple_score = 100
-        elif deal.multiple <= 3.0:
+        elif multiple <= 3.0:
             multiple_score = 90
-        elif deal.multiple <= 3.5:
+        elif multiple <= 3.5:
             multiple_score = 75
-        elif deal.multiple <= 4.0:
+        elif multiple <= 4.0:
             multiple_score = 50
         else:
             multiple_score = 0
 
     # Industry match (20% weight)
-    industry_score = 100 if deal.industry in CRITERIA["target_industries"] else 20
+    industry_score = 100 if industry in criteria.targets else 20
+
+    return trait_score * 0.5 + multiple_score * 0.3 + industry_score * 0.2
+
+
+# Share of the score given to proximity when the geography names places
+GEO_SCORE_WEIGHT = 0.15
+
+
+def _score_parts(traits: list, avoid_traits: list, multiple: Optional[float], industry: str,
+                 criteria: CompiledCriteria, place: Optional[Place] = None) -> int:
+    if criteria.model is not None:
+        total = criteria.model.score(traits, avoid_traits, multiple, industry)
+    else:
+        total = hand_tuned_score(traits, avoid_traits, multiple, industry, criteria)
 
-    total = trait_score * 0.5 + multiple_score * 0.3 + industry_score * 0.2
+    # Proximity to the places the geography names; other geographies
+    # only filter, so their scores are unchanged
+    proximity = criteria.geo.proximity(place)
+    if proximity is not None:
+        total = total * (1 - GEO_SCORE_WEIGHT) + proximity * GEO_SCORE_WEIGHT
     return min(100, round(total))
 
 
+def score_deal(deal: Deal, criteria: CompiledCriteria = None) -> int:
+    """Score a deal 0-100 based on criteria match."""
+    return _score_parts(deal.traits, deal.avoid_traits, deal.multiple, deal.industry, criteria or DEFAULT_CRITERIA,
+                        resolve_location(deal.location))
+
+
 def compute_multiple(deal: Deal) -> Optional[float]:
     """Compute asking price / EBITDA multiple."""
     earnings = deal.ebitda or deal.cash_flow_sde
@@ -274,38 +468,75 @@ def compute_multiple(deal: Deal) -> Optional[float]:
     return None
 
 
-def passes_financial_filters(deal: Deal) -> bool:
-    """Check if deal meets basic financial criteria."""
+def financial_filter_reason(deal: Deal, criteria: CompiledCriteria = None) -> Optional[str]:
+    """Return which criterion the deal fails ("asking_price", "earnings",
+    "multiple" or "geography"), or None if it passes. Fields that are not
+    known yet, and locations the gazetteer can't resolve, never fail a check."""
+    criteria = criteria or DEFAULT_CRITERIA
+
     # Must have asking price in range
     if deal.asking_price:
-        if deal.asking_price < CRITERIA["ev_min"] or deal.asking_price > CRITERIA["ev_max"]:
-            return False
+        if deal.asking_price < criteria.ev_min or deal.asking_price > criteria.ev_max:
+            return "asking_price"
 
     # Check EBITDA minimum
     earnings = deal.ebitda or deal.cash_flow_sde
-    if earnings and earnings < CRITERIA["ebitda_min"]:
-        return False
+    if earnings and earnings < criteria.ebitda_min:
+        return "earnings"
 
     # Check multiple cap
-    if deal.multiple and deal.multiple > CRITERIA["max_multiple"]:
-        return False
+    if deal.multiple and deal.multiple > criteria.max_multiple:
+        return "multiple"
+
+    # Check geography (resolved locations are memoized per string)
+    if criteria.geo.restricted and not criteria.geo.allows(resolve_location(deal.location)):
+        return "geography"
+
+    return None
+
+
+def passes_financial_filters(deal: Deal, criteria: CompiledCriteria = None) -> bool:
+    """Check if deal meets basic financial criteria."""
+    return financial_filter_reason(deal, criteria) is None
 
-    return True
+
+def prefilter_reason(deal: Deal, criteria: CompiledCriteria = None, reject_avoid_traits: bool = False) -> Optional[str]:
+    """Decide from card data alone whether a listing can no longer qualify.
+
+    Detail pages only fill fields that are still empty, so the asking price
+    and geography checks are final on card data. Earnings (and with them
+    the multiple) are EBITDA, else cash flow, and a detail page can still
+    add the EBITDA that replaces a card's cash flow, so those checks only
+    run when the card has EBITDA. Returns the reject reason or None.
+    Avoid-trait keywords only lower the final score, so rejecting on them
+    is opt-in.
+    """
+    criteria = criteria or DEFAULT_CRITERIA
+    deal.multiple = compute_multiple(deal)
+    final = deal if deal.ebitda else replace(deal, cash_flow_sde=None, multiple=None)
+    reason = financial_filter_reason(final, criteria)
+    if reason is None and reject_avoid_traits:
+        _industry, matched = analyze_text(deal.title, deal.description, deal.category)
+        _positive, negative = split_traits(matched, criteria)
+        if negative:
+            reason = "avoid_traits"
+    return reason
 
 
-def generate_bizbuysell_urls() -> list[str]:
+def generate_bizbuysell_urls(criteria: CompiledCriteria = None) -> list[str]:
     """Generate BizBuySell search URLs for all relevant categories with price filters."""
+    criteria = criteria or DEFAULT_CRITERIA
     urls = []
     base = "https://www.bizbuysell.com"
 
-    for category in CRITERIA["bizbuysell_categories"]:
+    for category in criteria.bizbuysell_categories:
         # Base category URL with price range $1M-$5M
         # BizBuySell uses query params for filters
         url = f"{base}/{category}-for-sale/"
         urls.append(url)
 
     # Also generate keyword-specific searches
-    for keyword in CRITERIA["search_keywords"]:
+    for keyword in criteria.search_keywords:
         encoded = quote(keyword)
         url = f"{base}/businesses-for-sale/?q={encoded}"
         urls.append(url)
@@ -313,13 +544,15 @@ def generate_bizbuysell_urls() -> list[str]:
     return urls
 
 
-def build_search_urls_with_filters() -> list[str]:
-    """Build BizBuySell URLs with price and financial filters baked in."""
+def build_search_urls_with_filters(criteria: CompiledCriteria = None, max_keywords: Optional[int] = 15) -> list[str]:
+    """Build BizBuySell URLs with price and financial filters baked in.
+    ``max_keywords=None`` keeps every keyword (the caller budgets them)."""
+    criteria = criteria or DEFAULT_CRITERIA
     urls = []
     base = "https://www.bizbuysell.com"
 
     # Category-based searches with price filters
-    for cat in CRITERIA["bizbuysell_categories"]:
+    for cat in criteria.bizbuysell_categories:
         # Price range $1M to $5M
         urls.append(
             f"{base}/{cat}-for-sale/"
@@ -328,7 +561,7 @@ def build_search_urls_with_filters() -> list[str]:
         )
 
     # Keyword searches
-    for kw in CRITERIA["search_keywords"][:15]:  # Limit to avoid rate limiting
+    for kw in criteria.search_keywords[:max_keywords]:  # Limit to avoid rate limiting
         urls.append(
             f"{base}/businesses-for-sale/"
             f"?kw={quote(kw)}"
@@ -338,6 +571,72 @@ def build_search_urls_with_filters() -> list[str]:
     return urls
 
 
+# --- MULTI-PROFILE SCORING ---
+
+@dataclass
+class ProfileScore:
+    profile_id: str
+    score: int
+    traits: list
+    avoid_traits: list
+    passes: bool
+
+
+def prepare_profiles(profiles: list[dict], models: Optional[dict] = None) -> list[CompiledCriteria]:
+    """Compile API-style criteria dicts (one per user) into snapshots.
+
+    With ``models`` (from scoring_model.load_scoring_models), each profile
+    scores with its user's trained model, or the global one.
+    """
+    prepared = []
+    for i, profile in enumerate(profiles):
+        profile_id = str(profile.get("user_id", profile.get("id", i)))
+        version = str(profile.get("updated_at") or "")
+        compiled = compile_criteria(profile, version=version, profile_id=profile_id)
+        prepared.append(attach_scoring_model(compiled, model_for(models, profile_id)))
+    return prepared
+
+
+def _score_prepared(deal: Deal, matched: list, prepared: list[CompiledCriteria]) -> list[ProfileScore]:
+    results = []
+    place = resolve_location(deal.location)
+    for p in prepared:
+        positive, negative = split_traits(matched, p)
+        results.append(ProfileScore(
+            profile_id=p.profile_id,
+            score=_score_parts(positive, negative, deal.multiple, deal.industry, p, place),
+            traits=positive,
+            avoid_traits=negative,
+            passes=passes_financial_filters(deal, p),
+        ))
+    return results
+
+
+def process_deal_profiles(deal: Deal, prepared: list[CompiledCriteria],
+                          criteria: CompiledCriteria = None) -> list[ProfileScore]:
+    """Like process_deal, but also scores the deal against each prepared profile.
+
+    Industry, matched traits and multiple are computed once; only the cheap
+    per-profile split/score/filter runs per profile.
+    """
+    criteria = criteria or DEFAULT_CRITERIA
+    deal.industry, matched = analyze_text(deal.title, deal.description, deal.category)
+    deal.traits, deal.avoid_traits = split_traits(matched, criteria)
+    deal.multiple = compute_multiple(deal)
+    deal.score = score_deal(deal, criteria)
+    return _score_prepared(deal, matched, prepared)
+
+
+def score_deals_multi(deals: list[Deal], profiles: list[dict]) -> list[list[ProfileScore]]:
+    """Score every deal against every profile in one pass.
+
+    Profiles are API-style criteria dicts (missing keys fall back to CRITERIA).
+    Returns one score vector per deal, aligned with ``profiles``.
+    """
+    prepared = prepare_profiles(profiles)
+    return [process_deal_profiles(deal, prepared) for deal in deals]
+
+
 # --- HTML PARSING (works with requests + BeautifulSoup, no browser needed) ---
 
 def parse_listing_card(card_html: str, source_url: str = "") -> Optional[Deal]:
@@ -396,8 +695,226 @@ def parse_listing_card(card_html: str, source_url: str = "") -> Optional[Deal]:
     return deal
 
 
-def parse_detail_page(html: str, deal: Deal) -> Deal:
-    """Parse a BizBuySell detail page to fill in missing fields on a Deal."""
+# --- STRUCTURED DATA (JSON-LD / __NEXT_DATA__) ---
+
+# Script blobs found with a plain regex scan, before any DOM is built
+_STRUCTURED_SCRIPT_RE = re.compile(
+    r"""<script\b[^>]*(?:type=["']application/ld\+json["']|id=["']__NEXT_DATA__["'])[^>]*>(.*?)</script\s*>""",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Normalized JSON keys (lowercase, letters only) and the Deal field they hold;
+# also matched against the "name" of schema.org PropertyValue entries
+STRUCTURED_KEYS = {
+    "askingprice": "asking_price",
+    "listingprice": "asking_price",
+    "grossrevenue": "revenue",
+    "revenue": "revenue",
+    "annualrevenue": "revenue",
+    "grosssales": "revenue",
+    "cashflow": "cash_flow_sde",
+    "sde": "cash_flow_sde",
+    "sellersdiscretionaryearnings": "cash_flow_sde",
+    "ebitda": "ebitda",
+    "yearestablished": "year_established",
+    "established": "year_established",
+    "yearfounded": "year_established",
+    "foundingdate": "year_established",
+    "numberofemployees": "employees",
+    "employees": "employees",
+    "employeecount": "employees",
+}
+
+# schema.org types that describe the listing itself (not the site or broker)
+LISTING_SCHEMA_TYPES = {"Product", "IndividualProduct", "Offer", "Service", "RealEstateListing"}
+
+# __NEXT_DATA__ pageProps keys that hold the page's own listing
+NEXT_DATA_LISTING_KEYS = ("listing", "listingDetail", "listingDetails", "businessListing", "business")
+
+# Keys of nested objects about other listings (carousels, recommendations)
+_UNRELATED_KEY_RE = re.compile(r"similar|related|recommend|featured|nearby", re.IGNORECASE)
+
+# Values a listing uses to say the seller withholds a field
+_NOT_DISCLOSED_RE = re.compile(
+    r"^\s*(?:not\s+disclosed|undisclosed|n/?a|confidential|withheld|(?:available\s+)?upon\s+request|call\s+for\s+price)\s*$",
+    re.IGNORECASE,
+)
+
+# With all of these filled in (or explicitly not disclosed) by structured
+# data, parse_detail_page skips building the DOM
+DETAIL_CORE_FIELDS = (
+    "title", "description", "location", "category", "asking_price", "revenue", "cash_flow_sde", "ebitda",
+)
+
+_STRUCTURED_MAX_NODES = 20000
+
+
+def _structured_value(field_name: str, value):
+    """Convert a JSON value to the Deal field's type; None if it isn't usable."""
+    if isinstance(value, dict):
+        value = value.get("value", value.get("price"))
+    if isinstance(value, bool) or value is None:
+        return None
+    if field_name in ("year_established", "employees"):
+        m = re.search(r"((?:19|20)\d{2})" if field_name == "year_established" else r"(\d+)", str(value))
+        return int(m.group(1)) if m else None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if isinstance(value, str):
+        return parse_money(value)
+    return None
+
+
+def _schema_types(obj: dict) -> set:
+    types = obj.get("@type", [])
+    return set(types) if isinstance(types, list) else {types}
+
+
+def _structured_key(key: str) -> Optional[str]:
+    return STRUCTURED_KEYS.get(re.sub(r"[^a-z]", "", key.lower()))
+
+
+def _next_data_listing(page_props: dict) -> Optional[dict]:
+    """The listing object in __NEXT_DATA__ pageProps.
+
+    A known listing key wins; otherwise the shallowest object with at least
+    two financial keys of its own. Lists (search results, carousels) are
+    never searched.
+    """
+    queue = [page_props]
+    while queue:
+        node = queue.pop(0)
+        for key in NEXT_DATA_LISTING_KEYS:
+            if isinstance(node.get(key), dict):
+                return node[key]
+        if sum(1 for k, v in node.items() if not isinstance(v, (dict, list)) and _structured_key(k)) >= 2:
+            return node
+        queue.extend(v for k, v in node.items() if isinstance(v, dict) and not _UNRELATED_KEY_RE.search(k))
+    return None
+
+
+def _listing_node(blob) -> Optional[dict]:
+    """The object describing the page's own listing in a JSON-LD or __NEXT_DATA__ blob."""
+    if isinstance(blob, dict) and isinstance(blob.get("props"), dict):
+        page_props = blob["props"].get("pageProps")
+        return _next_data_listing(page_props) if isinstance(page_props, dict) else None
+    # JSON-LD: top-level objects, @graph entries and a WebPage's mainEntity
+    queue = [blob]
+    while queue:
+        node = queue.pop(0)
+        if isinstance(node, list):
+            queue.extend(node)
+        elif isinstance(node, dict):
+            if _schema_types(node) & LISTING_SCHEMA_TYPES:
+                return node
+            queue.extend(node[key] for key in ("@graph", "mainEntity") if isinstance(node.get(key), (dict, list)))
+    return None
+
+
+def extract_structured_data(html: str) -> tuple[dict, set]:
+    """Deal fields from JSON-LD and __NEXT_DATA__ blobs, without building a DOM.
+
+    Only the page's own listing object is read (see _listing_node), never
+    the "similar listings" and other listings a page embeds. Returns
+    (values, undisclosed): values maps Deal field names to converted
+    values; undisclosed holds fields the listing explicitly marks as not
+    disclosed, so callers know the page has nothing more for them. A
+    missing, null or empty key settles nothing.
+    """
+    values, undisclosed = {}, set()
+
+    def put(field_name, raw):
+        if field_name in values:
+            return
+        if isinstance(raw, str) and _NOT_DISCLOSED_RE.match(raw):
+            undisclosed.add(field_name)
+            return
+        value = raw if field_name in ("title", "description", "location", "category") else _structured_value(field_name, raw)
+        if value:
+            values[field_name] = value
+
+    for m in _STRUCTURED_SCRIPT_RE.finditer(html):
+        try:
+            root = _listing_node(json.loads(m.group(1)))
+        except ValueError:
+            continue
+        if root is None:
+            continue
+        if _schema_types(root) & LISTING_SCHEMA_TYPES:
+            if isinstance(root.get("name"), str):
+                put("title", root["name"].strip()[:200])
+            if isinstance(root.get("description"), str):
+                put("description", root["description"].strip()[:1000])
+            if isinstance(root.get("category"), str):
+                put("category", root["category"].strip()[:100])
+            offers = root.get("offers")
+            for offer in offers if isinstance(offers, list) else [offers]:
+                if isinstance(offer, dict) and "price" in offer:
+                    put("asking_price", offer["price"])
+            address = root.get("address")
+            if isinstance(address, dict):
+                parts = [address.get("addressLocality"), address.get("addressRegion")]
+                put("location", ", ".join(p for p in parts if isinstance(p, str) and p))
+        stack, nodes = [root], 0
+        while stack and nodes < _STRUCTURED_MAX_NODES:
+            node = stack.pop()
+            nodes += 1
+            if isinstance(node, list):
+                stack.extend(reversed(node))
+                continue
+            # Other listings nested in this one (offers were read above)
+            if not isinstance(node, dict) or (node is not root and _schema_types(node) & LISTING_SCHEMA_TYPES):
+                continue
+            # schema.org PropertyValue: {"name": "Cash Flow", "value": "$450,000"}
+            if isinstance(node.get("name"), str) and "value" in node:
+                field_name = _structured_key(node["name"])
+                if field_name:
+                    put(field_name, node["value"])
+            for key, value in node.items():
+                if isinstance(value, (dict, list)):
+                    if not _UNRELATED_KEY_RE.search(key):
+                        stack.append(value)
+                else:
+                    field_name = _structured_key(key)
+                    if field_name:
+                        put(field_name, value)
+
+    return values, undisclosed
+
+
+def apply_structured_data(html: str, deal: Deal) -> tuple[int, bool]:
+    """Fill a deal's missing fields from the page's structured data.
+
+    Returns (fields filled, whether every DETAIL_CORE_FIELDS entry is now
+    filled or explicitly not disclosed, so the DOM parse can be skipped).
+    """
+    values, undisclosed = extract_structured_data(html)
+    if not values and not undisclosed:
+        return 0, False
+    filled = 0
+    for field_name, value in values.items():
+        current = getattr(deal, field_name)
+        # Card descriptions are truncated; the page's own one is longer
+        if not current or (field_name == "description" and len(value) > len(current)):
+            setattr(deal, field_name, value)
+            filled += 1
+    complete = all(getattr(deal, f) or f in undisclosed for f in DETAIL_CORE_FIELDS)
+    return filled, complete
+
+
+def parse_detail_page(html: str, deal: Deal, stats=None) -> Deal:
+    """Parse a BizBuySell detail page to fill in missing fields on a Deal.
+
+    Structured data (JSON-LD, __NEXT_DATA__) is read first with a cheap
+    scan; the DOM walk and text regexes only run when it leaves core
+    fields unsettled. ``stats``, if given, gets record(source, filled, complete).
+    """
+    filled, complete = apply_structured_data(html, deal)
+    if stats is not None:
+        stats.record(deal.source, filled, complete)
+    if complete:
+        return deal
+
     from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, "html.parser")
     text = soup.get_text(" ", strip=True)
@@ -488,6 +1005,13 @@ def parse_detail_page(html: str, deal: Deal) -> Deal:
             if meta_cat:
                 deal.category = (meta_cat.get("content") or "")[:100]
 
+    # --- Title fallback (listings discovered via sitemap/feed have none) ---
+    if not deal.title:
+        title_el = soup.select_one("h1") or soup.select_one("meta[property='og:title']")
+        if title_el:
+            title = title_el.get("content") if title_el.name == "meta" else title_el.get_text(" ", strip=True)
+            deal.title = (title or "")[:200]
+
     # --- Location fallback ---
     if not deal.location:
         loc_el = soup.select_one(".listing-location, .location, [class*='location']")
@@ -505,12 +1029,12 @@ def parse_detail_page(html: str, deal: Deal) -> Deal:
     return deal
 
 
-def process_deal(deal: Deal) -> Deal:
+def process_deal(deal: Deal, criteria: CompiledCriteria = None) -> Deal:
     """Enrich a deal with classification, traits, score."""
-    deal.industry = classify_industry(deal.title, deal.description, deal.category)
-    deal.traits, deal.avoid_traits = detect_traits(deal.description, deal.title)
+    deal.industry, matched = analyze_text(deal.title, deal.description, deal.category)
+    deal.traits, deal.avoid_traits = split_traits(matched, criteria or DEFAULT_CRITERIA)
     deal.multiple = compute_multiple(deal)
-    deal.score = score_deal(deal)
+    deal.score = score_deal(deal, criteria)
     return deal
 
 
@@ -561,8 +1085,14 @@ const {{ chromium }} = require('playwright');
 
 # --- EXCEL OUTPUT ---
 
-def write_deals_to_excel(deals: list[Deal], filename: str = "deal_hunter_tracker.xlsx"):
-    """Write scored deals to a formatted Excel spreadsheet."""
+def write_deals_to_excel(deals: list[Deal], filename: str = "deal_hunter_tracker.xlsx",
+                         criteria: CompiledCriteria = None):
+    """Write scored deals to a formatted Excel spreadsheet.
+
+    The criteria sheet lists the target industries of ``criteria``, the
+    snapshot the deals were scored against (DEFAULT_CRITERIA when omitted).
+    """
+    criteria = criteria or DEFAULT_CRITERIA
     from openpyxl import Workbook
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 
@@ -713,7 +1243,7 @@ def write_deals_to_excel(deals: list[Deal], filename: str = "deal_hunter_tracker
         ("", ""),
         ("TARGET INDUSTRIES", ""),
     ]
-    for ind in CRITERIA["target_industries"]:
+    for ind in criteria.target_industries:
         criteria_data.append(("", ind))
 
     for row_idx, (a, b) in enumerate(criteria_data, 1):
@@ -731,42 +1261,25 @@ def write_deals_to_excel(deals: list[Deal], filename: str = "deal_hunter_tracker
 
 # --- EMAIL DIGEST ---
 
-def generate_email_digest(deals: list[Deal], week_date: str = None) -> str:
-    """Generate HTML email digest of top deals."""
-    if not week_date:
-        week_date = datetime.now().strftime("%B %d, %Y")
-
-    sorted_deals = sorted(deals, key=lambda d: d.score, reverse=True)[:25]
-
-    def fmt_money(n):
-        if n is None:
-            return "N/A"
-        if n >= 1_000_000:
-            return f"${n/1_000_000:.1f}M"
-        return f"${n/1_000:.0f}K"
+DIGEST_TOP_K = 25
 
-    deal_rows = ""
-    for i, d in enumerate(sorted_deals):
-        earnings = d.ebitda or d.cash_flow_sde
-        mult_str = f"{d.multiple:.1f}x" if d.multiple else "N/A"
-        traits_str = ", ".join(d.traits[:3]) if d.traits else "—"
-
-        bg = "#f8f9fa" if i % 2 == 0 else "#ffffff"
-        score_color = "#059669" if d.score >= 80 else "#2563eb" if d.score >= 60 else "#d97706" if d.score >= 40 else "#6b7280"
+# Templates are plain str.format strings built once at import time; every
+# digest (one per recipient) reuses them and assembles rows with "".join.
+_DIGEST_ROW_TEMPLATE = """
+        <tr style="background:{bg}">{cells}
+        </tr>"""
 
-        deal_rows += f"""
-        <tr style="background:{bg}">
-            <td style="padding:12px 8px;text-align:center;font-weight:bold;color:{score_color};font-size:16px">{d.score}</td>
+_DIGEST_CELLS_TEMPLATE = """
+            <td style="padding:12px 8px;text-align:center;font-weight:bold;color:{score_color};font-size:16px">{score}</td>
             <td style="padding:12px 8px">
-                <a href="{d.url}" style="color:#1a1a1a;font-weight:600;text-decoration:none">{d.title}</a><br>
-                <span style="color:#6b7280;font-size:12px">{d.industry} · {d.location}</span>
+                <a href="{url}" style="color:#1a1a1a;font-weight:600;text-decoration:none">{title}</a><br>
+                <span style="color:#6b7280;font-size:12px">{industry} · {location}</span>
             </td>
-            <td style="padding:12px 8px;text-align:right;font-family:monospace">{fmt_money(d.asking_price)}</td>
-            <td style="padding:12px 8px;text-align:right;font-family:monospace">{fmt_money(earnings)}</td>
-            <td style="padding:12px 8px;text-align:center;font-family:monospace;color:{'#059669' if d.multiple and d.multiple <= 3.5 else '#d97706' if d.multiple and d.multiple <= 4.0 else '#6b7280'}">{mult_str}</td>
-        </tr>"""
+            <td style="padding:12px 8px;text-align:right;font-family:monospace">{asking}</td>
+            <td style="padding:12px 8px;text-align:right;font-family:monospace">{earnings}</td>
+            <td style="padding:12px 8px;text-align:center;font-family:monospace;color:{mult_color}">{mult_str}</td>"""
 
-    html = f"""<!DOCTYPE html>
+_DIGEST_TEMPLATE = """<!DOCTYPE html>
 <html>
 <head><meta charset="utf-8"></head>
 <body style="margin:0;padding:0;background:#f0f0f0;font-family:Arial,Helvetica,sans-serif">
@@ -775,15 +1288,15 @@ def generate_email_digest(deals: list[Deal], week_date: str = None) -> str:
     <!-- Header -->
     <div style="background:#0c0f14;padding:24px 32px">
         <h1 style="margin:0;color:#f59e0b;font-size:24px">⬡ DEAL HUNTER</h1>
-        <p style="margin:4px 0 0;color:#6b7280;font-size:13px;letter-spacing:1px">WEEKLY ACQUISITION DIGEST — {week_date.upper()}</p>
+        <p style="margin:4px 0 0;color:#6b7280;font-size:13px;letter-spacing:1px">WEEKLY ACQUISITION DIGEST — {week_date}</p>
     </div>
 
     <!-- Summary -->
     <div style="padding:20px 32px;background:#f8f9fa;border-bottom:1px solid #e5e7eb">
         <p style="margin:0;font-size:15px;color:#374151">
-            Found <strong>{len(sorted_deals)} deals</strong> matching your criteria this week.
-            Top score: <strong style="color:#059669">{sorted_deals[0].score if sorted_deals else 0}</strong> ·
-            Avg multiple: <strong>{sum(d.multiple for d in sorted_deals if d.multiple) / max(1, len([d for d in sorted_deals if d.multiple])):.1f}x</strong>
+            Found <strong>{count} deals</strong> matching your criteria this week.
+            Top score: <strong style="color:#059669">{top_score}</strong> ·
+            Avg multiple: <strong>{avg_multiple:.1f}x</strong>
         </p>
     </div>
 
@@ -820,7 +1333,127 @@ def generate_email_digest(deals: list[Deal], week_date: str = None) -> str:
 </body>
 </html>"""
 
-    return html
+
+def _fmt_money(n):
+    if n is None:
+        return "N/A"
+    if n >= 1_000_000:
+        return f"${n/1_000_000:.1f}M"
+    return f"${n/1_000:.0f}K"
+
+
+def _render_deal_cells(d: Deal, score: int) -> str:
+    """Render the table cells for one deal (everything except the row stripe)."""
+    earnings = d.ebitda or d.cash_flow_sde
+    if d.multiple and d.multiple <= 3.5:
+        mult_color = "#059669"
+    elif d.multiple and d.multiple <= 4.0:
+        mult_color = "#d97706"
+    else:
+        mult_color = "#6b7280"
+    score_color = "#059669" if score >= 80 else "#2563eb" if score >= 60 else "#d97706" if score >= 40 else "#6b7280"
+
+    return _DIGEST_CELLS_TEMPLATE.format(
+        score_color=score_color,
+        score=score,
+        url=d.url,
+        title=d.title,
+        industry=d.industry,
+        location=d.location,
+        asking=_fmt_money(d.asking_price),
+        earnings=_fmt_money(earnings),
+        mult_color=mult_color,
+        mult_str=f"{d.multiple:.1f}x" if d.multiple else "N/A",
+    )
+
+
+def _render_digest(ranked: list[tuple[int, int, Deal]], week_date: str, cells_cache: dict) -> str:
+    """Render a digest from (score, index, deal) tuples already in display order.
+
+    ``cells_cache`` maps (index, score) to rendered cells so a deal shown to
+    many recipients is only formatted once.
+    """
+    rows = []
+    multiple_sum = 0.0
+    multiple_count = 0
+    for i, (score, idx, d) in enumerate(ranked):
+        cells = cells_cache.get((idx, score))
+        if cells is None:
+            cells = cells_cache[(idx, score)] = _render_deal_cells(d, score)
+        rows.append(_DIGEST_ROW_TEMPLATE.format(bg="#f8f9fa" if i % 2 == 0 else "#ffffff", cells=cells))
+        if d.multiple:
+            multiple_sum += d.multiple
+            multiple_count += 1
+
+    return _DIGEST_TEMPLATE.format(
+        week_date=week_date.upper(),
+        count=len(ranked),
+        top_score=ranked[0][0] if ranked else 0,
+        avg_multiple=multiple_sum / max(1, multiple_count),
+        deal_rows="".join(rows),
+    )
+
+
+def _push_top_k(heap: list, k: int, item: tuple) -> None:
+    """Keep ``heap`` as the k largest (score, -index, deal) items seen so far."""
+    if len(heap) < k:
+        heapq.heappush(heap, item)
+    elif item[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, item)
+
+
+def generate_email_digest(deals: list[Deal], week_date: str = None, top_k: int = DIGEST_TOP_K) -> str:
+    """Generate HTML email digest of top deals."""
+    if not week_date:
+        week_date = datetime.now().strftime("%B %d, %Y")
+
+    top = heapq.nlargest(top_k, enumerate(deals), key=lambda p: p[1].score)
+    ranked = [(d.score, idx, d) for idx, d in top]
+    return _render_digest(ranked, week_date, {})
+
+
+def generate_user_digests(
+    deals: list[Deal],
+    recipients: list[dict],
+    week_date: str = None,
+    top_k: int = DIGEST_TOP_K,
+    profile_scores: list[list[ProfileScore]] = None,
+) -> dict[str, str]:
+    """Render one digest per recipient in a single pass over the deals.
+
+    Each recipient is a dict with an ``email`` key and optionally
+    ``rated_urls`` (deals the user already rated, which are left out of
+    their digest). When ``profile_scores`` (from score_deals_multi, with
+    profiles aligned to ``recipients``) is given, each recipient is ranked
+    by their own score and only sees deals passing their filters.
+    Returns {email: html}.
+    """
+    if not week_date:
+        week_date = datetime.now().strftime("%B %d, %Y")
+
+    rated = [frozenset(r.get("rated_urls") or ()) for r in recipients]
+    heaps: list[list] = [[] for _ in recipients]
+
+    for idx, d in enumerate(deals):
+        item = (d.score, -idx, d)
+        vector = profile_scores[idx] if profile_scores is not None else None
+        for r, heap in enumerate(heaps):
+            if d.url and d.url in rated[r]:
+                continue
+            if vector is not None:
+                if not vector[r].passes:
+                    continue
+                item = (vector[r].score, -idx, d)
+            _push_top_k(heap, top_k, item)
+
+    cells_cache: dict = {}
+    digests = {}
+    for recipient, heap in zip(recipients, heaps):
+        heap.sort(key=lambda item: item[:2], reverse=True)
+        ranked = [(score, -neg_idx, d) for score, neg_idx, d in heap]
+        digests[recipient["email"]] = _render_digest(ranked, week_date, cells_cache)
+
+    return digests
 
 
 def generate_intro_email() -> str:
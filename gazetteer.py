@@ -0,0 +1,491 @@
+"""
+Deal Hunter — Offline location gazetteer
+Resolves free-text listing locations ("Memphis, TN 38103", "Greater
+Atlanta Area", "Southern California") to normalized region codes using
+bundled tables of US states, Canadian provinces and the principal cities
+of US metros. Nothing is looked up over the network, and each distinct
+string is resolved once per process.
+
+Codes: "US" (country), "US-TN" (state), "US-TN:memphis" (metro).
+
+parse_geography() compiles the criteria's free-text geography into a
+GeoFilter. Terms are separated by ";", "|", "/" or "or":
+
+    United States
+    TN, GA, AL
+    Southeast; Texas
+    within 150 miles of Memphis, TN
+    Atlanta, GA or Nashville, TN        (cities mean DEFAULT_METRO_RADIUS_MILES around them)
+
+Lives beside deal_hunter_scraper.py, which imports it for CompiledCriteria
+and the filters; scraper/ modules reach both through the path entry they
+already add for that module.
+"""
+
+import hashlib
+import json
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+# Two-letter code: (name, centroid lat, centroid lon)
+STATES = {
+    "AL": ("Alabama", 32.8, -86.8), "AK": ("Alaska", 64.0, -152.0),
+    "AZ": ("Arizona", 34.3, -111.7), "AR": ("Arkansas", 34.9, -92.4),
+    "CA": ("California", 37.2, -119.5), "CO": ("Colorado", 39.0, -105.5),
+    "CT": ("Connecticut", 41.6, -72.7), "DE": ("Delaware", 39.0, -75.5),
+    "DC": ("District of Columbia", 38.9, -77.0), "FL": ("Florida", 28.6, -82.4),
+    "GA": ("Georgia", 32.7, -83.4), "HI": ("Hawaii", 20.8, -156.3),
+    "ID": ("Idaho", 44.4, -114.6), "IL": ("Illinois", 40.0, -89.2),
+    "IN": ("Indiana", 39.9, -86.3), "IA": ("Iowa", 42.1, -93.5),
+    "KS": ("Kansas", 38.5, -98.4), "KY": ("Kentucky", 37.5, -85.3),
+    "LA": ("Louisiana", 31.1, -92.0), "ME": ("Maine", 45.4, -69.2),
+    "MD": ("Maryland", 39.0, -76.8), "MA": ("Massachusetts", 42.3, -71.8),
+    "MI": ("Michigan", 44.3, -85.4), "MN": ("Minnesota", 46.3, -94.3),
+    "MS": ("Mississippi", 32.7, -89.7), "MO": ("Missouri", 38.4, -92.5),
+    "MT": ("Montana", 47.0, -109.6), "NE": ("Nebraska", 41.5, -99.8),
+    "NV": ("Nevada", 39.3, -116.6), "NH": ("New Hampshire", 43.7, -71.6),
+    "NJ": ("New Jersey", 40.2, -74.7), "NM": ("New Mexico", 34.4, -106.1),
+    "NY": ("New York", 42.9, -75.5), "NC": ("North Carolina", 35.6, -79.4),
+    "ND": ("North Dakota", 47.5, -100.5), "OH": ("Ohio", 40.3, -82.8),
+    "OK": ("Oklahoma", 35.6, -97.5), "OR": ("Oregon", 43.9, -120.6),
+    "PA": ("Pennsylvania", 40.9, -77.8), "RI": ("Rhode Island", 41.7, -71.5),
+    "SC": ("South Carolina", 33.9, -80.9), "SD": ("South Dakota", 44.4, -100.2),
+    "TN": ("Tennessee", 35.9, -86.4), "TX": ("Texas", 31.5, -99.3),
+    "UT": ("Utah", 39.3, -111.7), "VT": ("Vermont", 44.1, -72.7),
+    "VA": ("Virginia", 37.5, -78.9), "WA": ("Washington", 47.4, -120.5),
+    "WV": ("West Virginia", 38.6, -80.6), "WI": ("Wisconsin", 44.6, -89.9),
+    "WY": ("Wyoming", 43.0, -107.6), "PR": ("Puerto Rico", 18.2, -66.5),
+}
+
+# Resolved so Canadian listings can be told apart from US ones
+PROVINCES = {
+    "AB": "Alberta", "BC": "British Columbia", "MB": "Manitoba", "NB": "New Brunswick",
+    "NL": "Newfoundland and Labrador", "NS": "Nova Scotia", "NT": "Northwest Territories",
+    "NU": "Nunavut", "ON": "Ontario", "PE": "Prince Edward Island", "QC": "Quebec",
+    "SK": "Saskatchewan", "YT": "Yukon",
+}
+
+COUNTRIES = {
+    "united states": "US", "united states of america": "US", "usa": "US", "us": "US", "america": "US",
+    "canada": "CA", "mexico": "MX", "united kingdom": "GB", "uk": "GB", "england": "GB",
+    "australia": "AU",
+}
+
+# Principal cities of US metros: (city, state, lat, lon)
+METROS = (
+    ("New York", "NY", 40.71, -74.01), ("Los Angeles", "CA", 34.05, -118.24),
+    ("Chicago", "IL", 41.88, -87.63), ("Dallas", "TX", 32.78, -96.80),
+    ("Fort Worth", "TX", 32.76, -97.33), ("Houston", "TX", 29.76, -95.37),
+    ("Washington", "DC", 38.91, -77.04), ("Philadelphia", "PA", 39.95, -75.17),
+    ("Miami", "FL", 25.76, -80.19), ("Atlanta", "GA", 33.75, -84.39),
+    ("Boston", "MA", 42.36, -71.06), ("Phoenix", "AZ", 33.45, -112.07),
+    ("San Francisco", "CA", 37.77, -122.42), ("Oakland", "CA", 37.80, -122.27),
+    ("Riverside", "CA", 33.95, -117.40), ("Detroit", "MI", 42.33, -83.05),
+    ("Seattle", "WA", 47.61, -122.33), ("Minneapolis", "MN", 44.98, -93.27),
+    ("St Paul", "MN", 44.95, -93.09), ("San Diego", "CA", 32.72, -117.16),
+    ("Tampa", "FL", 27.95, -82.46), ("St Petersburg", "FL", 27.77, -82.64),
+    ("Denver", "CO", 39.74, -104.99), ("Baltimore", "MD", 39.29, -76.61),
+    ("St Louis", "MO", 38.63, -90.20), ("Orlando", "FL", 28.54, -81.38),
+    ("Charlotte", "NC", 35.23, -80.84), ("San Antonio", "TX", 29.42, -98.49),
+    ("Portland", "OR", 45.52, -122.68), ("Sacramento", "CA", 38.58, -121.49),
+    ("Pittsburgh", "PA", 40.44, -79.99), ("Austin", "TX", 30.27, -97.74),
+    ("Las Vegas", "NV", 36.17, -115.14), ("Cincinnati", "OH", 39.10, -84.51),
+    ("Kansas City", "MO", 39.10, -94.58), ("Kansas City", "KS", 39.11, -94.63),
+    ("Columbus", "OH", 39.96, -83.00), ("Indianapolis", "IN", 39.77, -86.16),
+    ("Cleveland", "OH", 41.50, -81.69), ("San Jose", "CA", 37.34, -121.89),
+    ("Nashville", "TN", 36.16, -86.78), ("Virginia Beach", "VA", 36.85, -75.98),
+    ("Norfolk", "VA", 36.85, -76.29), ("Providence", "RI", 41.82, -71.41),
+    ("Jacksonville", "FL", 30.33, -81.66), ("Milwaukee", "WI", 43.04, -87.91),
+    ("Raleigh", "NC", 35.78, -78.64), ("Durham", "NC", 35.99, -78.90),
+    ("Oklahoma City", "OK", 35.47, -97.52), ("Memphis", "TN", 35.15, -90.05),
+    ("Richmond", "VA", 37.54, -77.44), ("Louisville", "KY", 38.25, -85.76),
+    ("New Orleans", "LA", 29.95, -90.07), ("Salt Lake City", "UT", 40.76, -111.89),
+    ("Hartford", "CT", 41.76, -72.68), ("Buffalo", "NY", 42.89, -78.88),
+    ("Birmingham", "AL", 33.52, -86.80), ("Rochester", "NY", 43.16, -77.61),
+    ("Grand Rapids", "MI", 42.96, -85.67), ("Tucson", "AZ", 32.22, -110.97),
+    ("Tulsa", "OK", 36.15, -95.99), ("Fresno", "CA", 36.74, -119.79),
+    ("Honolulu", "HI", 21.31, -157.86), ("Omaha", "NE", 41.26, -95.94),
+    ("Worcester", "MA", 42.26, -71.80), ("Bridgeport", "CT", 41.19, -73.20),
+    ("Greenville", "SC", 34.85, -82.40), ("Albuquerque", "NM", 35.08, -106.65),
+    ("Bakersfield", "CA", 35.37, -119.02), ("Albany", "NY", 42.65, -73.76),
+    ("Knoxville", "TN", 35.96, -83.92), ("El Paso", "TX", 31.76, -106.49),
+    ("Baton Rouge", "LA", 30.45, -91.19), ("McAllen", "TX", 26.20, -98.23),
+    ("New Haven", "CT", 41.31, -72.92), ("Allentown", "PA", 40.60, -75.49),
+    ("Oxnard", "CA", 34.20, -119.18), ("Columbia", "SC", 34.00, -81.03),
+    ("Dayton", "OH", 39.76, -84.19), ("Charleston", "SC", 32.78, -79.93),
+    ("Greensboro", "NC", 36.07, -79.79), ("Stockton", "CA", 37.96, -121.29),
+    ("Boise", "ID", 43.62, -116.21), ("Colorado Springs", "CO", 38.83, -104.82),
+    ("Little Rock", "AR", 34.75, -92.29), ("Lakeland", "FL", 28.04, -81.95),
+    ("Akron", "OH", 41.08, -81.52), ("Des Moines", "IA", 41.59, -93.62),
+    ("Springfield", "MA", 42.10, -72.59), ("Ogden", "UT", 41.22, -111.97),
+    ("Madison", "WI", 43.07, -89.40), ("Winston Salem", "NC", 36.10, -80.24),
+    ("Syracuse", "NY", 43.05, -76.15), ("Provo", "UT", 40.23, -111.66),
+    ("Toledo", "OH", 41.65, -83.54), ("Wichita", "KS", 37.69, -97.34),
+    ("Augusta", "GA", 33.47, -81.97), ("Palm Bay", "FL", 28.03, -80.59),
+    ("Harrisburg", "PA", 40.27, -76.88), ("Spokane", "WA", 47.66, -117.43),
+    ("Chattanooga", "TN", 35.05, -85.31), ("Scranton", "PA", 41.41, -75.66),
+    ("Lancaster", "PA", 40.04, -76.31), ("Modesto", "CA", 37.64, -121.00),
+    ("Portland", "ME", 43.66, -70.26), ("Lexington", "KY", 38.04, -84.50),
+    ("Pensacola", "FL", 30.42, -87.22), ("Reno", "NV", 39.53, -119.81),
+    ("Huntsville", "AL", 34.73, -86.59), ("Fort Myers", "FL", 26.64, -81.87),
+    ("Sarasota", "FL", 27.34, -82.53), ("Jackson", "MS", 32.30, -90.18),
+    ("Savannah", "GA", 32.08, -81.09), ("Anchorage", "AK", 61.22, -149.90),
+    ("Fayetteville", "AR", 36.06, -94.16), ("Corpus Christi", "TX", 27.80, -97.40),
+    ("Lubbock", "TX", 33.58, -101.86), ("Shreveport", "LA", 32.53, -93.75),
+    ("Mobile", "AL", 30.69, -88.04), ("Montgomery", "AL", 32.37, -86.30),
+    ("Fort Wayne", "IN", 41.08, -85.14), ("Evansville", "IN", 37.97, -87.57),
+    ("Springfield", "MO", 37.21, -93.29), ("Springfield", "IL", 39.78, -89.65),
+    ("Peoria", "IL", 40.69, -89.59), ("Rockford", "IL", 42.27, -89.09),
+    ("Lansing", "MI", 42.73, -84.56), ("Flint", "MI", 43.01, -83.69),
+    ("Sioux Falls", "SD", 43.55, -96.73), ("Fargo", "ND", 46.88, -96.79),
+    ("Billings", "MT", 45.78, -108.50), ("Cheyenne", "WY", 41.14, -104.82),
+    ("Burlington", "VT", 44.48, -73.21), ("Manchester", "NH", 42.99, -71.46),
+    ("Wilmington", "DE", 39.74, -75.55), ("Wilmington", "NC", 34.23, -77.94),
+    ("Charleston", "WV", 38.35, -81.63), ("Tallahassee", "FL", 30.44, -84.28),
+    ("Gainesville", "FL", 29.65, -82.32), ("Tacoma", "WA", 47.25, -122.44),
+    ("Eugene", "OR", 44.05, -123.09), ("Salem", "OR", 44.94, -123.04),
+    ("Santa Rosa", "CA", 38.44, -122.71), ("Salinas", "CA", 36.68, -121.66),
+    ("Santa Barbara", "CA", 34.42, -119.70), ("Long Beach", "CA", 33.77, -118.19),
+    ("Anaheim", "CA", 33.84, -117.91), ("Irvine", "CA", 33.68, -117.83),
+    ("San Bernardino", "CA", 34.11, -117.29), ("Mesa", "AZ", 33.42, -111.83),
+    ("Scottsdale", "AZ", 33.49, -111.93), ("Arlington", "TX", 32.74, -97.11),
+    ("Plano", "TX", 33.02, -96.70), ("Newark", "NJ", 40.74, -74.17),
+    ("Jersey City", "NJ", 40.73, -74.08), ("Trenton", "NJ", 40.22, -74.76),
+    ("Lincoln", "NE", 40.81, -96.70), ("Topeka", "KS", 39.05, -95.68),
+    ("Cedar Rapids", "IA", 41.98, -91.67), ("Davenport", "IA", 41.52, -90.58),
+    ("Green Bay", "WI", 44.51, -88.01), ("Duluth", "MN", 46.79, -92.10),
+    ("Rochester", "MN", 44.02, -92.46), ("Macon", "GA", 32.84, -83.63),
+    ("Columbus", "GA", 32.46, -84.99), ("Asheville", "NC", 35.60, -82.55),
+    ("Roanoke", "VA", 37.27, -79.94), ("Erie", "PA", 42.13, -80.09),
+    ("Youngstown", "OH", 41.10, -80.65), ("Canton", "OH", 40.80, -81.38),
+    ("Amarillo", "TX", 35.22, -101.83), ("Waco", "TX", 31.55, -97.15),
+    ("Killeen", "TX", 31.12, -97.73), ("Beaumont", "TX", 30.08, -94.13),
+    ("Midland", "TX", 32.00, -102.08), ("Odessa", "TX", 31.85, -102.37),
+    ("Brownsville", "TX", 25.90, -97.50), ("Laredo", "TX", 27.51, -99.51),
+    ("Santa Fe", "NM", 35.69, -105.94), ("Flagstaff", "AZ", 35.20, -111.65),
+    ("Fort Collins", "CO", 40.59, -105.08), ("Boulder", "CO", 40.01, -105.27),
+    ("Missoula", "MT", 46.87, -113.99), ("Bend", "OR", 44.06, -121.31),
+    ("Olympia", "WA", 47.04, -122.90), ("Bellevue", "WA", 47.61, -122.20),
+    ("Everett", "WA", 47.98, -122.20), ("Gloversville", "NY", 43.05, -74.34),
+)
+
+# Other names for a metro's principal city: alias -> (city, state)
+CITY_ALIASES = {
+    "nyc": ("New York", "NY"), "manhattan": ("New York", "NY"), "brooklyn": ("New York", "NY"),
+    "bronx": ("New York", "NY"), "queens": ("New York", "NY"), "staten island": ("New York", "NY"),
+    "dfw": ("Dallas", "TX"), "dallas fort worth": ("Dallas", "TX"),
+    "twin cities": ("Minneapolis", "MN"), "saint paul": ("St Paul", "MN"),
+    "saint louis": ("St Louis", "MO"), "saint petersburg": ("St Petersburg", "FL"),
+    "bay area": ("San Francisco", "CA"), "san francisco bay": ("San Francisco", "CA"),
+    "sf": ("San Francisco", "CA"), "philly": ("Philadelphia", "PA"), "vegas": ("Las Vegas", "NV"),
+    "research triangle": ("Raleigh", "NC"), "inland empire": ("Riverside", "CA"),
+    "orange county": ("Anaheim", "CA"), "hampton roads": ("Norfolk", "VA"),
+}
+
+# Multi-state regions accepted in the criteria geography
+MULTI_STATE_REGIONS = {
+    "new england": ("CT", "ME", "MA", "NH", "RI", "VT"),
+    "mid atlantic": ("NJ", "NY", "PA", "DE", "MD", "DC"),
+    "northeast": ("CT", "ME", "MA", "NH", "RI", "VT", "NJ", "NY", "PA"),
+    "southeast": ("AL", "AR", "FL", "GA", "KY", "LA", "MS", "NC", "SC", "TN", "VA", "WV"),
+    "south": ("DE", "MD", "DC", "VA", "WV", "NC", "SC", "GA", "FL", "KY", "TN", "AL", "MS", "AR", "LA", "OK", "TX"),
+    "midwest": ("IL", "IN", "MI", "OH", "WI", "IA", "KS", "MN", "MO", "NE", "ND", "SD"),
+    "great lakes": ("IL", "IN", "MI", "MN", "NY", "OH", "PA", "WI"),
+    "great plains": ("KS", "NE", "ND", "SD", "OK"),
+    "southwest": ("AZ", "NM", "NV", "OK", "TX"),
+    "mountain": ("AZ", "CO", "ID", "MT", "NV", "NM", "UT", "WY"),
+    "mountain west": ("AZ", "CO", "ID", "MT", "NV", "NM", "UT", "WY"),
+    "west": ("AZ", "CO", "ID", "MT", "NV", "NM", "UT", "WY", "AK", "CA", "HI", "OR", "WA"),
+    "west coast": ("CA", "OR", "WA"),
+    "pacific northwest": ("OR", "WA", "ID"),
+    "gulf coast": ("AL", "FL", "LA", "MS", "TX"),
+    "sun belt": ("AL", "AZ", "FL", "GA", "LA", "MS", "NC", "NM", "NV", "SC", "TN", "TX"),
+    "rust belt": ("IL", "IN", "MI", "NY", "OH", "PA", "WI", "WV"),
+    "lower 48": tuple(s for s in STATES if s not in ("AK", "HI", "PR")),
+    "continental us": tuple(s for s in STATES if s not in ("AK", "HI", "PR")),
+}
+
+# Around a city named without a radius
+DEFAULT_METRO_RADIUS_MILES = 50
+
+# Score for locations that can't be placed on the map
+NEUTRAL_PROXIMITY = 50.0
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_KM = 0.621371
+LOCATION_CACHE_SIZE = 8192
+
+# Fingerprint of the tables; criteria compiled with other tables are recompiled
+GAZETTEER_VERSION = hashlib.sha1(
+    json.dumps([STATES, PROVINCES, COUNTRIES, METROS, CITY_ALIASES, MULTI_STATE_REGIONS], sort_keys=True).encode()
+).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class Place:
+    """A resolved location. Only metros carry coordinates."""
+
+    country: str
+    region: str = ""
+    metro: str = ""
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+    @property
+    def code(self) -> str:
+        return self.metro or self.region or self.country
+
+
+# --- INDEXES ---
+
+_ZIP_RE = re.compile(r"\b\d{5}(?:-\d{4})?\b")
+_NON_WORD_RE = re.compile(r"[^a-z0-9,]+")
+
+# Leading words dropped to find a state: "Southern California", "Upstate New York"
+_DIRECTIONS = frozenset((
+    "north", "south", "east", "west", "northern", "southern", "eastern", "western", "central",
+    "northeast", "northwest", "southeast", "southwest", "northeastern", "northwestern",
+    "southeastern", "southwestern", "upstate", "downstate", "coastal", "rural",
+))
+
+# Words around a city name that don't change which metro it is
+_CITY_FILLERS = frozenset(("greater", "metro", "metropolitan", "area", "downtown", "region", "suburbs", "near", "outside", "of"))
+
+
+def _location_parts(text: str) -> list[str]:
+    """Lowercased comma-separated parts without zip codes or punctuation."""
+    text = text.lower().replace("&", " and ").replace(".", "").replace("'", "")
+    text = _NON_WORD_RE.sub(" ", _ZIP_RE.sub(" ", text))
+    return [p for p in (" ".join(part.split()) for part in text.split(",")) if p]
+
+
+def _slug(city: str) -> str:
+    return " ".join(_location_parts(city))
+
+
+_STATE_INDEX: dict[str, str] = {}
+_REGION_PLACES: dict[str, Place] = {}
+for _code, (_name, _lat, _lon) in STATES.items():
+    _STATE_INDEX[_code.lower()] = _STATE_INDEX[_slug(_name)] = f"US-{_code}"
+    _REGION_PLACES[f"US-{_code}"] = Place("US", f"US-{_code}")
+for _code, _name in PROVINCES.items():
+    _STATE_INDEX[_code.lower()] = _STATE_INDEX[_slug(_name)] = f"CA-{_code}"
+    _REGION_PLACES[f"CA-{_code}"] = Place("CA", f"CA-{_code}")
+
+_CITY_INDEX: dict[tuple[str, str], Place] = {}
+_BARE_CITIES: dict[str, list[Place]] = {}
+for _city, _state, _lat, _lon in METROS:
+    _place = Place("US", f"US-{_state}", f"US-{_state}:{_slug(_city).replace(' ', '-')}", _lat, _lon)
+    _CITY_INDEX[(_slug(_city), _place.region)] = _place
+    _BARE_CITIES.setdefault(_slug(_city), []).append(_place)
+for _alias, (_city, _state) in CITY_ALIASES.items():
+    _place = _CITY_INDEX[(_slug(_city), f"US-{_state}")]
+    _CITY_INDEX[(_alias, _place.region)] = _place
+    _BARE_CITIES.setdefault(_alias, []).append(_place)
+# A city name on its own only resolves when no other metro shares it
+_BARE_CITY_INDEX = {name: places[0] for name, places in _BARE_CITIES.items() if len(places) == 1}
+
+
+def _state_of(part: str) -> Optional[str]:
+    region = _STATE_INDEX.get(part)
+    words = part.split()
+    i = 0
+    while region is None and i < len(words) - 1 and words[i] in _DIRECTIONS:
+        i += 1
+        region = _STATE_INDEX.get(" ".join(words[i:]))
+    return region
+
+
+def _city_key(city: str) -> str:
+    return " ".join(w for w in city.split() if w not in _CITY_FILLERS)
+
+
+# --- RESOLUTION ---
+
+@lru_cache(maxsize=LOCATION_CACHE_SIZE)
+def resolve_location(text: str) -> Optional[Place]:
+    """Resolve a listing's location string, or None if it names nowhere we know.
+
+    A bounded number of dictionary lookups per string, memoized.
+    """
+    parts = _location_parts(text or "")
+    country = None
+    if parts and parts[-1] in COUNTRIES:
+        country = COUNTRIES[parts.pop()]
+        if country not in ("US", "CA"):
+            return Place(country)
+
+    region, city = None, ""
+    if parts:
+        region = _state_of(parts[-1])
+        if region:
+            parts.pop()
+            city = parts[0] if parts else ""
+        else:
+            # "Memphis TN", "Raleigh North Carolina"
+            words = parts[-1].split()
+            for n in (3, 2, 1):
+                if len(words) > n:
+                    region = _STATE_INDEX.get(" ".join(words[-n:]))
+                    if region:
+                        city = " ".join(words[:-n])
+                        break
+
+    if region:
+        place = _CITY_INDEX.get((_city_key(city), region)) if city else None
+        return place or _REGION_PLACES[region]
+    if len(parts) == 1:
+        place = _BARE_CITY_INDEX.get(_city_key(parts[0]))
+        if place:
+            return place
+    return Place(country) if country else None
+
+
+def distance_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def _center(place: Optional[Place]) -> Optional[tuple[float, float]]:
+    """Coordinates to measure from: the metro, else the state's centroid."""
+    if place is None:
+        return None
+    if place.lat is not None:
+        return place.lat, place.lon
+    if place.region.startswith("US-"):
+        _name, lat, lon = STATES[place.region[3:]]
+        return lat, lon
+    return None
+
+
+# --- GEOGRAPHY FILTER ---
+
+@dataclass(frozen=True)
+class GeoFilter:
+    """Compiled criteria geography. Unresolvable listing locations always pass."""
+
+    countries: frozenset = frozenset()
+    regions: frozenset = frozenset()
+    # (lat, lon, radius in miles)
+    circles: tuple = ()
+    # States a circle reaches, for listings that only name a state
+    circle_regions: frozenset = frozenset()
+    terms: tuple = ()
+    ignored: tuple = ()
+
+    @property
+    def restricted(self) -> bool:
+        return bool(self.countries or self.regions or self.circles)
+
+    def allows(self, place: Optional[Place]) -> bool:
+        if place is None or not self.restricted:
+            return True
+        if place.country in self.countries or place.region in self.regions:
+            return True
+        if not place.region:
+            # Just a country: too coarse to rule out a narrower geography
+            scope = {r.split("-")[0] for r in self.regions} | ({"US"} if self.circles else set())
+            return place.country in scope
+        if self.circles:
+            if place.lat is None:
+                return place.region in self.circle_regions
+            return any(distance_miles(lat, lon, place.lat, place.lon) <= r for lat, lon, r in self.circles)
+        return False
+
+    def proximity(self, place: Optional[Place]) -> Optional[float]:
+        """0-100 closeness to the nearest named place: 100 at its center,
+        50 at the edge of its radius, 0 at twice the radius. None when the
+        geography names no places."""
+        if not self.circles:
+            return None
+        if place is None or place.lat is None:
+            return NEUTRAL_PROXIMITY
+        return max(100 * max(0.0, 1 - distance_miles(lat, lon, place.lat, place.lon) / (2 * r))
+                   for lat, lon, r in self.circles)
+
+    def describe(self) -> str:
+        return "; ".join(self.terms) if self.restricted else "anywhere"
+
+
+_TERM_SPLIT_RE = re.compile(r"[;|/\n]|\s+or\s+", re.IGNORECASE)
+_RADIUS_RE = re.compile(
+    r"^(?:within\s+)?(\d+(?:\.\d+)?)\s*(mi|miles?|km|kilometers?)\s+(?:of|from|around)\s+(.+)$", re.IGNORECASE
+)
+_ANYWHERE = frozenset(("", "any", "anywhere", "all", "worldwide", "global", "no preference"))
+
+
+def _geography_term(term: str) -> Optional[list[tuple]]:
+    """Constraints for one geography term: ("country", code), ("regions", codes)
+    or ("circle", (lat, lon, miles), region); None if it can't be resolved."""
+    m = _RADIUS_RE.match(term)
+    if m:
+        place = resolve_location(m.group(3))
+        center = _center(place)
+        if center is None:
+            return None
+        miles = float(m.group(1)) * (MILES_PER_KM if m.group(2).lower().startswith("k") else 1)
+        return [("circle", (*center, miles), place.region)]
+    key = _slug(term)
+    if key in MULTI_STATE_REGIONS:
+        return [("regions", frozenset(f"US-{s}" for s in MULTI_STATE_REGIONS[key]))]
+    place = resolve_location(term)
+    if place and place.metro:
+        return [("circle", (place.lat, place.lon, DEFAULT_METRO_RADIUS_MILES), place.region)]
+    # "TN, GA, AL" reads as one state with an unknown city; prefer the list
+    pieces = [p for p in term.split(",") if p.strip()]
+    if len(pieces) > 1:
+        resolved = [_geography_term(p.strip()) for p in pieces]
+        if all(r is not None for r in resolved):
+            return [c for r in resolved for c in r]
+    if place is None:
+        return None
+    if place.region:
+        return [("regions", frozenset((place.region,)))]
+    return [("country", place.country)]
+
+
+def _regions_within(lat: float, lon: float, miles: float) -> set[str]:
+    regions = {f"US-{code}" for code, (_name, slat, slon) in STATES.items()
+               if distance_miles(lat, lon, slat, slon) <= miles}
+    regions.update(p.region for p in _CITY_INDEX.values() if distance_miles(lat, lon, p.lat, p.lon) <= miles)
+    return regions
+
+
+def parse_geography(text: str) -> GeoFilter:
+    """Compile the criteria's geography text. Unrecognized terms are kept
+    in ``ignored``; if nothing is recognized the filter is unrestricted."""
+    countries, regions, circles, circle_regions = set(), set(), [], set()
+    terms, ignored = [], []
+    for term in _TERM_SPLIT_RE.split(text or ""):
+        term = term.strip()
+        if term.lower() in _ANYWHERE:
+            continue
+        constraints = _geography_term(term)
+        if constraints is None:
+            ignored.append(term)
+            continue
+        terms.append(term)
+        for kind, value, *rest in constraints:
+            if kind == "country":
+                countries.add(value)
+            elif kind == "regions":
+                regions.update(value)
+            else:
+                circles.append(value)
+                circle_regions.update(_regions_within(*value))
+                if rest[0]:
+                    circle_regions.add(rest[0])
+    return GeoFilter(
+        countries=frozenset(countries),
+        regions=frozenset(regions),
+        circles=tuple(circles),
+        circle_regions=frozenset(circle_regions),
+        terms=tuple(terms),
+        ignored=tuple(ignored),
+    )
@@ -0,0 +1,111 @@
+"""
+Deal Hunter — Trained scoring models
+A ScoringModel replaces the hand-tuned 50/30/20 score with weights fitted
+to the web app's deal ratings (scraper/train_scoring.py). It is a lookup
+table: one base weight per industry (bias folded in), one weight per trait
+and one per multiple bucket, so scoring a deal costs a few dict lookups and
+a bisect, like the hand-tuned scorer.
+
+Model files hold a global model and, optionally, one per user:
+
+    {"version": "...", "global": {...}, "users": {"12": {...}}}
+
+Attaching a model to compiled criteria appends its version to the criteria
+version, so caches, checkpoints and upload deltas keyed on the criteria
+version see the change.
+
+Lives beside deal_hunter_scraper.py, whose CompiledCriteria holds a
+model and whose scorer calls it; scraper/ modules reach both through the
+path entry they already add for that module.
+"""
+
+import hashlib
+import json
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Upper bounds of the multiple buckets; the last bucket is open-ended
+MULTIPLE_EDGES = (2.0, 2.5, 3.0, 3.5, 4.0, 5.0)
+
+
+@dataclass(frozen=True)
+class ScoringModel:
+    """Additive 0-100 score from industry, trait and multiple weights."""
+
+    bias: float
+    industry_weights: tuple
+    default_industry: float
+    trait_weights: tuple
+    multiple_edges: tuple
+    multiple_weights: tuple
+    unknown_multiple: float
+    user_id: str = ""
+    _industry: dict = field(init=False, repr=False, compare=False)
+    _traits: dict = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if len(self.multiple_weights) != len(self.multiple_edges) + 1:
+            raise ValueError("multiple_weights needs one weight per bucket (len(multiple_edges) + 1)")
+        object.__setattr__(self, "_industry", {name: self.bias + w for name, w in self.industry_weights})
+        object.__setattr__(self, "_traits", dict(self.trait_weights))
+
+    @property
+    def version(self) -> str:
+        """Content hash of the weights."""
+        return hashlib.sha1(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()[:12]
+
+    def score(self, traits: list, avoid_traits: list, multiple: Optional[float], industry: str) -> float:
+        total = self._industry.get(industry, self.bias + self.default_industry)
+        for t in traits:
+            total += self._traits.get(t, 0.0)
+        for t in avoid_traits:
+            total += self._traits.get(t, 0.0)
+        if multiple is None:
+            total += self.unknown_multiple
+        else:
+            total += self.multiple_weights[bisect_left(self.multiple_edges, multiple)]
+        return max(0.0, min(100.0, total))
+
+    def to_dict(self) -> dict:
+        return {
+            "bias": self.bias,
+            "industries": dict(self.industry_weights),
+            "default_industry": self.default_industry,
+            "traits": dict(self.trait_weights),
+            "multiple_edges": list(self.multiple_edges),
+            "multiple_weights": list(self.multiple_weights),
+            "unknown_multiple": self.unknown_multiple,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, user_id: str = "") -> "ScoringModel":
+        return cls(
+            bias=float(data.get("bias", 0.0)),
+            industry_weights=tuple(sorted((k, float(v)) for k, v in data.get("industries", {}).items())),
+            default_industry=float(data.get("default_industry", 0.0)),
+            trait_weights=tuple(sorted((k, float(v)) for k, v in data.get("traits", {}).items())),
+            multiple_edges=tuple(float(e) for e in data.get("multiple_edges", MULTIPLE_EDGES)),
+            multiple_weights=tuple(float(w) for w in data["multiple_weights"]),
+            unknown_multiple=float(data.get("unknown_multiple", 0.0)),
+            user_id=user_id,
+        )
+
+
+def load_scoring_models(path: str) -> dict[str, ScoringModel]:
+    """Models in a model file, keyed by user id ("" for the global model)."""
+    with open(path) as f:
+        data = json.load(f)
+    models = {}
+    if data.get("global"):
+        models[""] = ScoringModel.from_dict(data["global"])
+    for user_id, user_model in (data.get("users") or {}).items():
+        models[str(user_id)] = ScoringModel.from_dict(user_model, str(user_id))
+    return models
+
+
+def model_for(models: Optional[dict], user_id: str = "") -> Optional[ScoringModel]:
+    """The user's own model if there is one, else the global model."""
+    if not models:
+        return None
+    return models.get(str(user_id)) or models.get("")
@@ -0,0 +1,95 @@
+"""
+Deal Hunter — Persistent cache for listing text analysis
+Stores analyze_text results (industry + matched traits) keyed by the
+content hash from deal_hunter_scraper.analysis_key. An in-memory LRU sits
+in front of a SQLite file in the state dir. Keys already include the
+keyword tables version, and the file is emptied when that version
+changes, so edited TRAIT_KEYWORDS / INDUSTRY_KEYWORDS never serve stale
+results.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from deal_hunter_scraper import KEYWORDS_VERSION
+
+DEFAULT_LRU_SIZE = 4096
+
+
+class AnalysisCache:
+    """LRU in memory, SQLite on disk; new entries are written on flush()."""
+
+    def __init__(self, path: str, lru_size: int = DEFAULT_LRU_SIZE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lru_size = lru_size
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lru: OrderedDict[str, tuple] = OrderedDict()
+        self._pending: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS analysis (key TEXT PRIMARY KEY, industry TEXT, traits TEXT)")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'keywords_version'").fetchone()
+            if row is None or row[0] != KEYWORDS_VERSION:
+                self.conn.execute("DELETE FROM analysis")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('keywords_version', ?)", (KEYWORDS_VERSION,)
+                )
+
+    def _remember(self, key: str, value: tuple) -> None:
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> tuple | None:
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            value = self._pending.get(key)
+            if value is None:
+                row = self.conn.execute("SELECT industry, traits FROM analysis WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                value = (row[0], tuple(json.loads(row[1])))
+            self.disk_hits += 1
+            self._remember(key, value)
+            return value
+
+    def put(self, key: str, value: tuple) -> None:
+        with self._lock:
+            self._pending[key] = value
+            self._remember(key, value)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO analysis (key, industry, traits) VALUES (?, ?, ?)",
+                    [(k, industry, json.dumps(list(traits))) for k, (industry, traits) in self._pending.items()],
+                )
+            self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+    def report(self) -> str:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        if not lookups:
+            return "Text analysis cache: no lookups"
+        hits = self.memory_hits + self.disk_hits
+        return (f"Text analysis cache: {hits}/{lookups} hits ({hits / lookups:.0%}; "
+                f"{self.memory_hits} memory, {self.disk_hits} disk), {self.misses} misses")
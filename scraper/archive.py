@@ -0,0 +1,158 @@
+"""
+Deal Hunter — Columnar deal archive
+Every run appends its processed deals as one Parquet file under a
+date partition:
+
+    <archive dir>/scrape_date=2026-10-19/run-<run id>.parquet
+
+Files are never rewritten, so the archive is a full history of weekly
+snapshots for cross-week analysis (price drops, re-listings, source
+yield). The schema is derived from the Deal dataclass plus run metadata.
+
+Reading goes through pyarrow.dataset: date ranges prune whole partitions
+and column projection only decodes the requested columns.
+
+    from archive import read_archive
+    import pyarrow.dataset as ds
+    table = read_archive("scraper/.state/archive", columns=["url", "asking_price", "scrape_date"],
+                         since="2026-01-01", where=ds.field("source") == "BizBuySell")
+
+pyarrow is imported lazily so the scraper still runs without it.
+"""
+
+import json
+import os
+import uuid
+from dataclasses import fields
+from datetime import date, datetime, timezone
+from typing import Iterator, Optional, get_args, get_type_hints
+
+from deal_hunter_scraper import Deal
+
+PARTITION_COLUMN = "scrape_date"
+
+
+def _arrow_type(annotation):
+    import pyarrow as pa
+
+    args = [a for a in get_args(annotation) if a is not type(None)]
+    base = args[0] if args else annotation
+    if base is float:
+        return pa.float64()
+    if base is int:
+        return pa.int64()
+    if base is list:
+        return pa.list_(pa.string())
+    return pa.string()
+
+
+def deal_schema():
+    """Arrow schema of an archived row: every Deal field, then run metadata."""
+    import pyarrow as pa
+
+    hints = get_type_hints(Deal)
+    columns = [pa.field(f.name, _arrow_type(hints[f.name])) for f in fields(Deal)]
+    columns += [
+        pa.field("scraped_at", pa.timestamp("us", tz="UTC")),
+        pa.field("run_id", pa.string()),
+        pa.field("criteria_version", pa.string()),
+        # {profile_id: score} as JSON; profiles differ between runs
+        pa.field("profile_scores", pa.string()),
+    ]
+    return pa.schema(columns)
+
+
+def write_archive(
+    deals: list[dict],
+    root: str,
+    criteria_version: str = "",
+    scraped_at: Optional[datetime] = None,
+    run_id: Optional[str] = None,
+) -> Optional[str]:
+    """Append one run's processed deals to the archive; returns the file written."""
+    if not deals:
+        return None
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    scraped_at = scraped_at or datetime.now(timezone.utc)
+    run_id = run_id or f"{scraped_at.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    schema = deal_schema()
+    deal_fields = [f.name for f in fields(Deal)]
+
+    columns = {name: [d.get(name) for d in deals] for name in deal_fields}
+    columns["scraped_at"] = [scraped_at] * len(deals)
+    columns["run_id"] = [run_id] * len(deals)
+    columns["criteria_version"] = [criteria_version] * len(deals)
+    columns["profile_scores"] = [
+        json.dumps(d["profile_scores"], sort_keys=True) if d.get("profile_scores") is not None else None
+        for d in deals
+    ]
+    table = pa.Table.from_pydict(columns, schema=schema)
+
+    partition = os.path.join(root, f"{PARTITION_COLUMN}={scraped_at.date().isoformat()}")
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"run-{run_id}.parquet")
+    # Dot-prefixed names are ignored by dataset discovery until renamed
+    tmp = os.path.join(partition, f".run-{run_id}.parquet.tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+    return path
+
+
+def _dataset(root: str):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([pa.field(PARTITION_COLUMN, pa.date32())]), flavor="hive")
+    return ds.dataset(root, format="parquet", partitioning=partitioning, exclude_invalid_files=True)
+
+
+def _filter(since, until, where):
+    import pyarrow.dataset as ds
+
+    expr = where
+    for op, value in (("ge", since), ("le", until)):
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = date.fromisoformat(value)
+        column = ds.field(PARTITION_COLUMN)
+        clause = column >= value if op == "ge" else column <= value
+        expr = clause if expr is None else expr & clause
+    return expr
+
+
+def scan_archive(
+    root: str,
+    columns: Optional[list[str]] = None,
+    since=None,
+    until=None,
+    where=None,
+    batch_size: int = 64_000,
+) -> Iterator:
+    """Stream matching rows as pyarrow RecordBatches.
+
+    ``since``/``until`` (dates or ISO strings, inclusive) prune partitions
+    without opening their files; ``where`` is any pyarrow.dataset
+    expression and is pushed down to Parquet row-group statistics.
+    """
+    if not os.path.isdir(root):
+        return iter(())
+    dataset = _dataset(root)
+    return dataset.to_batches(columns=columns, filter=_filter(since, until, where), batch_size=batch_size)
+
+
+def read_archive(
+    root: str,
+    columns: Optional[list[str]] = None,
+    since=None,
+    until=None,
+    where=None,
+):
+    """Like scan_archive, but returns a single pyarrow Table."""
+    if not os.path.isdir(root):
+        schema = deal_schema()
+        return schema.empty_table() if columns is None else schema.empty_table().select(
+            [c for c in columns if c in schema.names])
+    return _dataset(root).to_table(columns=columns, filter=_filter(since, until, where))
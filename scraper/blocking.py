@@ -0,0 +1,133 @@
+"""
+Deal Hunter — Playwright resource blocking
+Rendered pages are only read for DOM text and outerHTML, so images, media,
+fonts, stylesheets and requests to ad/analytics domains are aborted before
+they download. A source can re-allow resource types or domains with a
+`resource_allowlist` block in sources.json:
+
+    "resource_allowlist": {"types": ["stylesheet"], "domains": ["cdn.example.com"]}
+
+The Playwright scripts report what they blocked on stderr as one
+STATS_PREFIX line, which the caller hands to BLOCK_STATS.
+"""
+
+import json
+import threading
+
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font", "stylesheet")
+
+BLOCKED_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "segment.io",
+    "newrelic.com",
+    "nr-data.net",
+    "optimizely.com",
+    "bat.bing.com",
+    "snap.licdn.com",
+    "ads-twitter.com",
+    "quantserve.com",
+    "scorecardresearch.com",
+    "taboola.com",
+    "outbrain.com",
+    "criteo.com",
+    "adnxs.com",
+    "hs-scripts.com",
+    "hs-analytics.net",
+    "intercom.io",
+    "zopim.com",
+    "livechatinc.com",
+)
+
+# Aborted requests never report a size, so savings are estimated from
+# typical transfer sizes per resource type (HTTP Archive medians, bytes)
+TYPICAL_BYTES = {
+    "image": 15_000,
+    "media": 250_000,
+    "font": 30_000,
+    "stylesheet": 12_000,
+    "script": 25_000,
+}
+DEFAULT_TYPICAL_BYTES = 5_000
+
+STATS_PREFIX = "@@blocked "
+
+
+def blocking_policy(source: dict | None = None) -> dict:
+    """Resource types and domains to block for a source, after its allowlist."""
+    allow = (source or {}).get("resource_allowlist") or {}
+    allow_types = set(allow.get("types", []))
+    return {
+        "types": [t for t in BLOCKED_RESOURCE_TYPES if t not in allow_types],
+        "domains": list(BLOCKED_DOMAINS),
+        "allow_domains": list(allow.get("domains", [])),
+    }
+
+
+def route_script(policy: dict) -> str:
+    """JS (inside the async main) that installs the blocking route on ``context``.
+
+    Defines ``blocked``; the script prints it with reportBlocked() at the end.
+    """
+    return f"""
+    const blockPolicy = {json.dumps(policy)};
+    const blocked = {{}};
+    const hostMatches = (host, domains) => domains.some(d => host === d || host.endsWith('.' + d));
+    await context.route('**/*', route => {{
+        const request = route.request();
+        const type = request.resourceType();
+        let host = '';
+        try {{ host = new URL(request.url()).hostname; }} catch (e) {{}}
+        const deniedHost = hostMatches(host, blockPolicy.domains) && !hostMatches(host, blockPolicy.allow_domains);
+        if (type !== 'document' && (blockPolicy.types.includes(type) || deniedHost)) {{
+            blocked[type] = (blocked[type] || 0) + 1;
+            return route.abort();
+        }}
+        return route.continue();
+    }});
+    const reportBlocked = () => console.error('{STATS_PREFIX}' + JSON.stringify(blocked));
+"""
+
+
+class BlockStats:
+    """Blocked request counts per resource type across all Playwright runs."""
+
+    def __init__(self):
+        self.by_type: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, stderr: str) -> list[str]:
+        """Record the stats line in a script's stderr; returns the other lines."""
+        lines = []
+        for line in stderr.strip().split("\n"):
+            if not line.startswith(STATS_PREFIX):
+                lines.append(line)
+                continue
+            try:
+                counts = json.loads(line[len(STATS_PREFIX):])
+            except json.JSONDecodeError:
+                continue
+            with self._lock:
+                for resource_type, count in counts.items():
+                    self.by_type[resource_type] = self.by_type.get(resource_type, 0) + count
+        return [line for line in lines if line]
+
+    def bytes_saved(self) -> int:
+        return sum(count * TYPICAL_BYTES.get(t, DEFAULT_TYPICAL_BYTES) for t, count in self.by_type.items())
+
+    def report(self) -> str:
+        total = sum(self.by_type.values())
+        if not total:
+            return "Browser requests blocked: none"
+        kinds = ", ".join(f"{t}: {n}" for t, n in sorted(self.by_type.items(), key=lambda kv: -kv[1]))
+        return f"Browser requests blocked: {total} ({kinds}), ~{self.bytes_saved() / 1e6:.1f} MB saved (estimated)"
+
+
+BLOCK_STATS = BlockStats()
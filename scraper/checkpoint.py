@@ -0,0 +1,118 @@
+"""
+Deal Hunter — Crash-safe run checkpoints
+A run appends the work it has finished to a JSON-lines journal in the
+state dir. It records each results page it fetched (its listings without
+HTML, plus the next page link) and each batch of processed deals. Lines
+are flushed as they are written and fsynced every SYNC_SECONDS. A torn
+last line is ignored on load, so a killed run loses only the work that was
+in flight.
+
+With `run_scrape.py --resume`:
+- pages already in the journal are served from it instead of the network;
+- listings that were already processed are skipped;
+- their deals go straight to upload.
+
+The journal only resumes a run with the same key (criteria version and
+shard). It is removed once a run's deals are uploaded or its shard file
+is written.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+SYNC_SECONDS = 10.0
+
+# Bulky per-listing fields that are never journaled
+_UNJOURNALED = ("html", "detail_html")
+
+
+class Checkpoint:
+    """Append-only journal of finished pages and processed deals."""
+
+    def __init__(self, path: str, run_key: str, resume: bool = False):
+        self.path = path
+        self.run_key = run_key
+        self.pages: dict[str, dict] = {}
+        self.deals: list[dict] = []
+        self.processed: set[str] = set()
+        self.resumed = False
+        self._lock = threading.Lock()
+        self._last_sync = time.monotonic()
+        if resume:
+            self._load()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a" if self.resumed else "w")
+        if not self.resumed:
+            self._write({"type": "run", "key": run_key, "started": datetime.now(timezone.utc).isoformat()})
+
+    def _load(self) -> None:
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            print("No checkpoint to resume from, starting a fresh run")
+            return
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Torn write from the crash
+                break
+        if not records or records[0].get("type") != "run" or records[0].get("key") != self.run_key:
+            print("Checkpoint belongs to a different run (criteria or shard changed), starting a fresh run")
+            return
+        for record in records[1:]:
+            if record["type"] == "page":
+                self.pages[record["url"]] = record
+            elif record["type"] == "deals":
+                self.deals.extend(record["deals"])
+                self.processed.update(record["keys"])
+        self.resumed = True
+
+    def _write(self, record: dict) -> None:
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            now = time.monotonic()
+            if now - self._last_sync >= SYNC_SECONDS:
+                os.fsync(self._file.fileno())
+                self._last_sync = now
+
+    def page(self, url: str) -> dict | None:
+        """The journaled page record for ``url`` ({listings, next_url, complete}), if any."""
+        return self.pages.get(url)
+
+    def record_page(self, url: str, listings: list[dict], next_url: str | None = None, complete: bool = True) -> None:
+        listings = [{k: v for k, v in l.items() if k not in _UNJOURNALED} for l in listings]
+        self._write({"type": "page", "url": url, "listings": listings, "next_url": next_url, "complete": complete})
+
+    def record_deals(self, keys: list[str], deals: list[dict]) -> None:
+        self._write({"type": "deals", "keys": keys, "deals": deals})
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def clear(self) -> None:
+        """Drop the journal once the run's results are safely stored."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Could not remove checkpoint {self.path}: {e}", file=sys.stderr)
+
+    def report(self) -> str:
+        if not self.resumed:
+            return "Checkpoint: fresh run"
+        return f"Checkpoint: resuming with {len(self.pages)} journaled pages and {len(self.deals)} processed deals"
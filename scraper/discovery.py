@@ -0,0 +1,222 @@
+"""
+Deal Hunter — Sitemap / RSS / Atom listing discovery
+Finds listing URLs for a source without downloading its HTML index page.
+
+A source opts in with a `discovery` block in sources.json:
+
+    "discovery": {
+      "sitemap": "https://example.com/sitemap.xml",
+      "feed": "https://example.com/listings/feed/",
+      "listing_pattern": "/business-for-sale/",
+      "max_urls": 50
+    }
+
+Sitemaps (including sitemap indexes and .xml.gz) and feeds are parsed as a
+stream with iterparse, and only entries whose lastmod/updated date is newer
+than the previous successful run for that source are returned.
+"""
+
+import gzip
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterator
+
+import requests
+
+DEFAULT_MAX_URLS = 50
+
+# Nested sitemap indexes deeper than this are ignored
+MAX_SITEMAP_DEPTH = 3
+
+
+def _local(tag: str) -> str:
+    """Strip the XML namespace from an element tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_date(text: str | None) -> datetime | None:
+    """Parse a W3C (sitemap/Atom) or RFC 822 (RSS) date into an aware UTC datetime."""
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(text)
+        except (TypeError, ValueError):
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _open_stream(url: str, headers: dict, timeout: int):
+    resp = requests.get(url, headers=headers, timeout=timeout, stream=True)
+    resp.raise_for_status()
+    resp.raw.decode_content = True
+    if url.endswith(".gz"):
+        return resp, gzip.GzipFile(fileobj=resp.raw)
+    return resp, resp.raw
+
+
+def iter_sitemap_urls(
+    url: str,
+    since: datetime | None,
+    headers: dict,
+    timeout: int = 20,
+    depth: int = 0,
+) -> Iterator[tuple[str, datetime | None]]:
+    """Yield (loc, lastmod) for pages in a sitemap changed after ``since``.
+
+    Sitemap indexes are followed recursively; child sitemaps whose own
+    lastmod is older than ``since`` are skipped without downloading them.
+    """
+    resp, stream = _open_stream(url, headers, timeout)
+    children = []
+    try:
+        loc = None
+        lastmod = None
+        for _event, elem in ET.iterparse(stream, events=("end",)):
+            tag = _local(elem.tag)
+            if tag == "loc" and loc is None:
+                # First <loc> is the page; later ones belong to image/video extensions
+                loc = (elem.text or "").strip()
+            elif tag == "lastmod":
+                lastmod = _parse_date(elem.text)
+            elif tag in ("url", "sitemap"):
+                changed = since is None or lastmod is None or lastmod > since
+                if loc and changed:
+                    if tag == "url":
+                        yield loc, lastmod
+                    else:
+                        children.append(loc)
+                loc = None
+                lastmod = None
+                # Drop parsed entries so memory stays flat on large sitemaps
+                elem.clear()
+    finally:
+        resp.close()
+
+    if depth < MAX_SITEMAP_DEPTH:
+        for child in children:
+            try:
+                yield from iter_sitemap_urls(child, since, headers, timeout, depth + 1)
+            except (requests.RequestException, ET.ParseError, OSError) as e:
+                print(f"  Sitemap {child} failed: {e}", file=sys.stderr)
+
+
+def iter_feed_entries(
+    url: str,
+    since: datetime | None,
+    headers: dict,
+    timeout: int = 20,
+) -> Iterator[dict]:
+    """Yield {href, title, updated} for RSS items / Atom entries newer than ``since``."""
+    resp, stream = _open_stream(url, headers, timeout)
+    try:
+        entry = None
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            tag = _local(elem.tag)
+            if event == "start":
+                if tag in ("item", "entry"):
+                    entry = {}
+                continue
+            if entry is None:
+                # Channel/feed-level metadata
+                continue
+            if tag == "title":
+                entry.setdefault("title", (elem.text or "").strip())
+            elif tag == "link":
+                # RSS: <link>url</link>; Atom: <link rel="alternate" href="url"/>
+                href = elem.get("href") or (elem.text or "").strip()
+                if href and elem.get("rel", "alternate") == "alternate":
+                    entry.setdefault("href", href)
+            elif tag in ("pubDate", "updated", "published"):
+                entry.setdefault("updated", _parse_date(elem.text))
+            elif tag in ("item", "entry"):
+                updated = entry.get("updated")
+                if entry.get("href") and (since is None or updated is None or updated > since):
+                    yield entry
+                entry = None
+                elem.clear()
+    finally:
+        resp.close()
+
+
+def discover_source(source: dict, since: datetime | None, headers: dict) -> tuple[list[dict], bool]:
+    """Return raw listings (href + title when known) for a source's discovery block.
+
+    The listings carry no card HTML; they go straight to detail fetching.
+    The second value is False when a fetch failed or more than max_urls
+    listings were found, in which case the caller should not advance the source's
+    last-run time.
+    """
+    config = source.get("discovery") or {}
+    name = source["name"]
+    max_urls = config.get("max_urls", DEFAULT_MAX_URLS)
+    pattern = re.compile(config["listing_pattern"]) if config.get("listing_pattern") else None
+
+    listings = []
+    seen = set()
+    complete = True
+
+    def add(href: str, title: str = "") -> bool:
+        """Record a listing; False once one beyond max_urls turns up."""
+        if href in seen or (pattern and not pattern.search(href)):
+            return True
+        if len(listings) >= max_urls:
+            return False
+        seen.add(href)
+        listings.append({"title": title, "href": href, "text": "", "html": "", "source": name})
+        return True
+
+    if config.get("feed"):
+        try:
+            for entry in iter_feed_entries(config["feed"], since, headers):
+                if not add(entry["href"], entry.get("title", "")):
+                    complete = False
+                    break
+        except (requests.RequestException, ET.ParseError, OSError) as e:
+            print(f"  [{name}] Feed failed: {e}", file=sys.stderr)
+            complete = False
+
+    if config.get("sitemap") and complete:
+        try:
+            for loc, _lastmod in iter_sitemap_urls(config["sitemap"], since, headers):
+                if not add(loc):
+                    complete = False
+                    break
+        except (requests.RequestException, ET.ParseError, OSError) as e:
+            print(f"  [{name}] Sitemap failed: {e}", file=sys.stderr)
+            complete = False
+
+    return listings, complete
+
+
+def load_discovery_state(path: str) -> dict[str, datetime]:
+    """Load {source name: last successful discovery time}."""
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    state = {}
+    for name, value in raw.items():
+        dt = _parse_date(value)
+        if dt:
+            state[name] = dt
+    return state
+
+
+def save_discovery_state(path: str, state: dict[str, datetime]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({name: dt.isoformat() for name, dt in state.items()}, f, indent=2)
+    os.replace(tmp, path)
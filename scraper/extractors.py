@@ -0,0 +1,109 @@
+"""
+Deal Hunter — Selector-driven listing extractors
+Turns a source's `selectors` block from sources.json into compiled CSS
+matchers and pulls structured listing cards out of an index page.
+"""
+
+from urllib.parse import urljoin
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+# Card fields read from a source's `selectors` block (besides listing_card).
+CARD_FIELDS = ("title", "price", "location", "description", "revenue", "cash_flow")
+
+# Cards with shorter titles are navigation crumbs, not listings.
+MIN_TITLE_LENGTH = 5
+
+_compiled_selectors: dict[str, soupsieve.SoupSieve] = {}
+_extractors: dict[str, "SourceExtractor | None"] = {}
+
+
+def compile_selector(css: str) -> soupsieve.SoupSieve | None:
+    """Compile a CSS selector once; identical selectors are shared across sources."""
+    css = (css or "").strip()
+    if not css:
+        return None
+    if css not in _compiled_selectors:
+        _compiled_selectors[css] = soupsieve.compile(css)
+    return _compiled_selectors[css]
+
+
+class SourceExtractor:
+    """Compiled selectors for one source."""
+
+    def __init__(self, name: str, base_url: str, selectors: dict):
+        self.name = name
+        self.base_url = base_url
+        self.listing_card = compile_selector(selectors.get("listing_card", ""))
+        self.fields = {}
+        for field_name in CARD_FIELDS:
+            compiled = compile_selector(selectors.get(field_name, ""))
+            if compiled is not None:
+                self.fields[field_name] = compiled
+
+    def extract(self, soup: BeautifulSoup, page_url: str | None = None) -> list[dict]:
+        """Return one structured card per listing_card match, in page order.
+
+        Relative links resolve against ``page_url``, the page the soup was
+        fetched from, falling back to the source's landing URL.
+        """
+        link_base = page_url or self.base_url
+        cards = []
+        seen_hrefs = set()
+
+        for card in self.listing_card.select(soup):
+            title_sel = self.fields.get("title")
+            title_el = title_sel.select_one(card) if title_sel else None
+            if title_el is None:
+                continue
+            title = title_el.get_text(strip=True)
+            if len(title) < MIN_TITLE_LENGTH:
+                continue
+
+            link = title_el if title_el.name == "a" else title_el.find("a", href=True)
+            if link is None and card.name == "a":
+                link = card
+            href = urljoin(link_base, link["href"]) if link is not None and link.get("href") else ""
+            if href and href in seen_hrefs:
+                continue
+            seen_hrefs.add(href)
+
+            fields = {}
+            for field_name, compiled in self.fields.items():
+                if field_name == "title":
+                    continue
+                el = compiled.select_one(card)
+                if el is not None:
+                    fields[field_name] = el.get_text(" ", strip=True)
+
+            cards.append({
+                "title": title,
+                "href": href,
+                "text": card.get_text(" ", strip=True),
+                "html": str(card),
+                "source": self.name,
+                "fields": fields,
+            })
+
+        return cards
+
+
+def get_extractor(source: dict) -> SourceExtractor | None:
+    """Return the cached extractor for a source, or None if it has no card selectors."""
+    name = source["name"]
+    if name not in _extractors:
+        selectors = source.get("selectors") or {}
+        if selectors.get("listing_card") and selectors.get("title"):
+            _extractors[name] = SourceExtractor(name, source.get("url", ""), selectors)
+        else:
+            _extractors[name] = None
+    return _extractors[name]
+
+
+def extract_cards(soup: BeautifulSoup, source: dict, page_url: str | None = None) -> list[dict]:
+    """Extract structured cards using the source's selectors ([] when it has none)."""
+    extractor = get_extractor(source)
+    if extractor is None:
+        return []
+    return extractor.extract(soup, page_url)
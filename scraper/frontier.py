@@ -0,0 +1,139 @@
+"""
+Deal Hunter — Crawl frontier
+Priority queue of pages to fetch, ordered by the source `priority` from
+sources.json (P0 first), then pagination depth, then an optional score
+(e.g. historical yield, highest first), then insertion order.
+URLs are deduplicated when enqueued and every source has a page budget.
+"""
+
+import heapq
+import itertools
+import re
+from dataclasses import dataclass, field
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from bs4 import BeautifulSoup
+
+PRIORITY_RANK = {"P0": 0, "P1": 1, "P2": 2, "P3": 3}
+
+DEFAULT_MAX_DEPTH = 2
+DEFAULT_PAGE_BUDGET = 20
+
+_NEXT_TEXT_RE = re.compile(r"^\s*(next|next page|older|›|»|>)\s*$", re.IGNORECASE)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for dedup: lowercase host, no fragment, sorted query."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+@dataclass(order=True)
+class FrontierItem:
+    rank: int
+    depth: int
+    neg_score: float
+    seq: int
+    url: str = field(compare=False)
+    source: str = field(compare=False)
+
+
+class CrawlFrontier:
+    """Priority queue of pages with enqueue-time dedup and per-source budgets."""
+
+    def __init__(self, max_depth: int = DEFAULT_MAX_DEPTH, default_budget: int = DEFAULT_PAGE_BUDGET):
+        self.max_depth = max_depth
+        self.default_budget = default_budget
+        self._heap: list[FrontierItem] = []
+        self._seen: set[str] = set()
+        self._seq = itertools.count()
+        self._budgets: dict[str, int] = {}
+        self._popped: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def set_budget(self, source: str, pages: int) -> None:
+        self._budgets[source] = pages
+
+    def budget_left(self, source: str) -> int:
+        return self._budgets.get(source, self.default_budget) - self._popped.get(source, 0)
+
+    def push(self, url: str, source: str, priority: str = "P1", depth: int = 0, score: float = 0.0) -> bool:
+        """Enqueue a page; returns False for duplicates and pages past max_depth."""
+        if depth >= self.max_depth:
+            return False
+        key = normalize_url(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        rank = PRIORITY_RANK.get(priority, len(PRIORITY_RANK))
+        heapq.heappush(self._heap, FrontierItem(rank, depth, -score, next(self._seq), url, source))
+        return True
+
+    def pop(self) -> FrontierItem | None:
+        """Return the best page whose source still has budget, or None."""
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            if self.budget_left(item.source) <= 0:
+                continue
+            self._popped[item.source] = self._popped.get(item.source, 0) + 1
+            return item
+        return None
+
+    def release(self, item: FrontierItem) -> None:
+        """Refund the budget of a popped page that was skipped without a fetch."""
+        self._popped[item.source] = max(self._popped.get(item.source, 0) - 1, 0)
+
+    def pop_batch(self, limit: int, same_depth: bool = False) -> list[FrontierItem]:
+        """Pop up to ``limit`` pages in priority order.
+
+        With ``same_depth`` the batch stops before the first page deeper than
+        its first page, so deeper pages wait for the results of shallower ones.
+        """
+        batch = []
+        while len(batch) < limit:
+            if same_depth and batch and self._heap and self._heap[0].depth != batch[0].depth:
+                break
+            item = self.pop()
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def pages_fetched(self, source: str) -> int:
+        return self._popped.get(source, 0)
+
+
+def find_next_page(soup: BeautifulSoup, page_url: str) -> str | None:
+    """Find the "next page" link on a results page, if any."""
+    link = soup.select_one("link[rel~='next'], a[rel~='next']")
+    if link is None:
+        link = soup.select_one(
+            ".pagination a.next, .pagination .next a, a.next, a.next-page, "
+            "li.next a, a[aria-label='Next'], a[aria-label='Next page']"
+        )
+    if link is None:
+        for a in soup.select(".pagination a, .pager a, nav a, .nav-links a"):
+            if _NEXT_TEXT_RE.match(a.get_text(strip=True)):
+                link = a
+                break
+    if link is None or not link.get("href"):
+        return None
+    next_url = urljoin(page_url, link["href"])
+    if normalize_url(next_url) == normalize_url(page_url):
+        return None
+    return next_url
+
+
+def bizbuysell_page_url(url: str, page: int) -> str:
+    """Return results page ``page`` of a BizBuySell search URL (/.../2/?query)."""
+    parts = urlsplit(url)
+    path = re.sub(r"/\d+/?$", "/", parts.path)
+    if not path.endswith("/"):
+        path += "/"
+    if page > 1:
+        path = f"{path}{page}/"
+    return urlunsplit((parts.scheme, parts.netloc, path, parts.query, ""))
@@ -0,0 +1,188 @@
+"""
+Deal Hunter — Per-host request control
+Keeps a concurrency limit per host that grows additively while requests
+succeed and halves on throttling (429/503) or errors (AIMD), waits out
+`Retry-After`, and opens a circuit breaker for a host after repeated
+failures so a dead site stops costing a full timeout per request.
+"""
+
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+# Statuses that mean "slow down" rather than "broken"
+THROTTLE_STATUSES = {429, 503}
+
+MAX_CONCURRENCY = 4
+FAILURE_THRESHOLD = 3
+CIRCUIT_OPEN_SECONDS = 300.0
+
+# Backoff used after throttling when the server sends no Retry-After
+DEFAULT_BACKOFF_SECONDS = 5.0
+
+# A Retry-After longer than this is treated as "host unavailable this run"
+MAX_RETRY_AFTER_SECONDS = 120.0
+
+READY = "ready"
+WAIT = "wait"
+OPEN = "open"
+
+
+class HostUnavailable(requests.RequestException):
+    """Raised instead of requesting a host whose circuit breaker is open."""
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class HostState:
+    limit: float = 1.0
+    in_flight: int = 0
+    failures: int = 0
+    not_before: float = 0.0
+    open_until: float = 0.0
+    probing: bool = False
+    requests: int = 0
+    throttled: int = 0
+    errors: int = 0
+    trips: int = 0
+
+
+class HostController:
+    """AIMD concurrency limits, Retry-After waits and circuit breakers per host."""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.hosts: dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> HostState:
+        return self.hosts.setdefault(host, HostState())
+
+    def try_acquire(self, host: str) -> str:
+        """Take a request slot for ``host``: READY, WAIT (try again soon) or OPEN."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host)
+            if state.open_until:
+                if now < state.open_until:
+                    return OPEN
+                # Half-open: let a single probe through
+                if state.probing or state.in_flight:
+                    return WAIT
+                state.probing = True
+            elif now < state.not_before or state.in_flight >= int(state.limit):
+                return WAIT
+            state.in_flight += 1
+            state.requests += 1
+            return READY
+
+    def wait_seconds(self, host: str) -> float:
+        """How long until ``host`` might have a free slot."""
+        with self._lock:
+            state = self._state(host)
+            return max(0.05, state.not_before - time.monotonic())
+
+    def release(
+        self,
+        host: str,
+        status: int | None = None,
+        error: bool = False,
+        retry_after: float | None = None,
+    ) -> str:
+        """Record a finished request; returns "ok", "throttled" or "failed"."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            probing, state.probing = state.probing, False
+
+            if error or (status is not None and status >= 500 and status not in THROTTLE_STATUSES):
+                outcome = "failed"
+                state.errors += 1
+            elif status in THROTTLE_STATUSES:
+                outcome = "throttled"
+                state.throttled += 1
+            else:
+                # Success (including 4xx, which says nothing about host health)
+                state.failures = 0
+                state.open_until = 0.0
+                state.limit = min(self.max_concurrency, state.limit + 1.0 / state.limit)
+                return "ok"
+
+            state.failures += 1
+            state.limit = max(1.0, state.limit / 2)
+            wait_for = retry_after if retry_after is not None else DEFAULT_BACKOFF_SECONDS * state.failures
+            if probing or state.failures >= self.failure_threshold or wait_for > MAX_RETRY_AFTER_SECONDS:
+                state.open_until = now + max(self.open_seconds, wait_for)
+                state.trips += 1
+                print(f"  [{host}] Circuit open for {state.open_until - now:.0f}s after {state.failures} failures",
+                      file=sys.stderr)
+            else:
+                state.not_before = max(state.not_before, now + wait_for)
+            return outcome
+
+    def get(self, url: str, headers: dict, timeout: float, retries: int = 2) -> requests.Response:
+        """requests.get under this host's limit, retrying throttled/failed attempts.
+
+        Raises HostUnavailable when the host's circuit is open; other
+        request errors propagate as usual after the last attempt.
+        """
+        host = host_of(url)
+        for attempt in range(retries + 1):
+            while (slot := self.try_acquire(host)) == WAIT:
+                time.sleep(self.wait_seconds(host))
+            if slot == OPEN:
+                raise HostUnavailable(f"circuit open for {host}")
+            try:
+                resp = requests.get(url, headers=headers, timeout=timeout)
+            except requests.RequestException:
+                self.release(host, error=True)
+                if attempt == retries:
+                    raise
+                continue
+            outcome = self.release(host, resp.status_code, retry_after=parse_retry_after(resp.headers.get("Retry-After")))
+            if outcome == "ok" or attempt == retries:
+                return resp
+        return resp
+
+    def report(self) -> list[str]:
+        """One line per host that was throttled, errored or tripped its breaker."""
+        lines = []
+        for host, s in sorted(self.hosts.items()):
+            if s.throttled or s.errors or s.trips:
+                state = "open" if s.open_until > time.monotonic() else f"limit {s.limit:.1f}"
+                lines.append(f"  {host}: {s.requests} requests, {s.throttled} throttled, "
+                             f"{s.errors} errors, {s.trips} breaker trips ({state})")
+        return lines
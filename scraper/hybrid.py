@@ -0,0 +1,136 @@
+"""
+Deal Hunter — HTTP-first hybrid fetching
+Pages are fetched with a plain HTTP client first and only rendered in the
+browser (Playwright) when the HTML fails the caller's check, e.g. the
+source's selectors find no cards. The outcome is remembered per source and
+URL pattern in the state dir, so patterns that need JavaScript go straight
+to the browser on later runs while the rest never pay for it. Patterns
+decided for the browser are re-probed over HTTP every REPROBE_EVERY uses.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+HTTP = "http"
+BROWSER = "browser"
+
+# HTTP attempts needed before a pattern can be sent to the browser
+MIN_SAMPLES = 2
+
+# Share of HTTP attempts that must succeed to keep using HTTP
+MIN_HTTP_SUCCESS = 0.5
+
+REPROBE_EVERY = 10
+
+# Older runs count for less, as in the yield tracker: a pattern's stored
+# outcomes are scaled by this the first time a run records a new one
+DECISION_DECAY = 0.7
+
+_WORD_RE = re.compile(r"^[a-z]+(?:-[a-z]+)*$")
+
+# A numeric listing id (page numbers are shorter); the segment before it is the listing's slug
+_LISTING_ID_RE = re.compile(r"^\d{4,}$")
+
+
+def url_pattern(url: str) -> str:
+    """Host plus path shape: segments that are not words (page numbers, ids) become "*".
+
+    Word segments, hyphenated or not, are kept, except a listing's slug
+    right before its numeric id. /hvac-businesses-for-sale/2/ and
+    /plumbing-businesses-for-sale/2/ are distinct patterns, while
+    /business-opportunity/acme-co/2345678/ and
+    /business-opportunity/other-co/3456789/ share one.
+    """
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.lower().split("/") if s]
+    shape = [
+        s if _WORD_RE.match(s) and not (i + 1 < len(segments) and _LISTING_ID_RE.match(segments[i + 1])) else "*"
+        for i, s in enumerate(segments)
+    ]
+    return f"{parts.netloc.lower()}/{'/'.join(shape)}"
+
+
+class FetchPlanner:
+    """Learns, per source and URL pattern, whether plain HTTP is enough."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats: dict[str, dict] = {}
+        self.http_ok = 0
+        self.fallbacks = 0
+        self.browser_direct = 0
+        self._decayed: set[str] = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for key, entry in data.items():
+            ok, fail = entry.get("ok", 0.0), entry.get("fail", 0.0)
+            self.stats[key] = {
+                "ok": ok,
+                "fail": fail,
+                # HTTP attempts ever recorded; files from before it was kept only have the decayed weights
+                "samples": entry.get("samples", math.ceil(ok + fail)),
+                "since_probe": entry.get("since_probe", 0),
+            }
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock, open(tmp, "w") as f:
+            json.dump(self.stats, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def key(source: str, url: str) -> str:
+        return f"{source}|{url_pattern(url)}"
+
+    def choose(self, source: str, url: str) -> str:
+        """HTTP or BROWSER for this page."""
+        with self._lock:
+            entry = self.stats.get(self.key(source, url))
+            if entry is None:
+                return HTTP
+            weight = entry["ok"] + entry["fail"]
+            if entry["samples"] < MIN_SAMPLES or not weight or entry["ok"] / weight >= MIN_HTTP_SUCCESS:
+                return HTTP
+            entry["since_probe"] += 1
+            if entry["since_probe"] >= REPROBE_EVERY:
+                entry["since_probe"] = 0
+                return HTTP
+            self.browser_direct += 1
+            return BROWSER
+
+    def record(self, source: str, url: str, http_usable: bool) -> None:
+        """Record whether the plain HTTP response for this page was usable."""
+        key = self.key(source, url)
+        with self._lock:
+            entry = self.stats.setdefault(key, {"ok": 0.0, "fail": 0.0, "samples": 0, "since_probe": 0})
+            if key not in self._decayed:
+                self._decayed.add(key)
+                entry["ok"] *= DECISION_DECAY
+                entry["fail"] *= DECISION_DECAY
+            entry["samples"] += 1
+            if http_usable:
+                entry["ok"] += 1
+                self.http_ok += 1
+            else:
+                entry["fail"] += 1
+                self.fallbacks += 1
+
+    def report(self) -> str:
+        total = self.http_ok + self.fallbacks + self.browser_direct
+        if not total:
+            return "Hybrid fetch: no pages"
+        return (f"Hybrid fetch: {self.http_ok}/{total} pages served over plain HTTP "
+                f"({self.http_ok / total:.0%}), {self.fallbacks} fell back to the browser, "
+                f"{self.browser_direct} sent straight to the browser")
@@ -0,0 +1,89 @@
+"""
+Deal Hunter — Known deal URLs
+Local copy of the set of deal URLs the web app already stores, synced
+from GET /api/deals/known. URLs are kept as 64-bit SHA-1 prefixes, the
+same hashes the endpoint sends, and the sync is incremental: only deals
+added since the last seen version are downloaded.
+
+When the endpoint is unreachable, URLs this scraper has successfully
+uploaded before (from the local deal store) stand in for it.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+
+import requests
+
+
+def url_hash(url: str) -> int:
+    """First 8 bytes of the URL's SHA-1, as the web app computes it."""
+    return struct.unpack(">Q", hashlib.sha1(url.encode("utf-8")).digest()[:8])[0]
+
+
+def _unpack(packed: str) -> list[int]:
+    raw = base64.b64decode(packed)
+    return list(struct.unpack(f">{len(raw) // 8}Q", raw[: len(raw) // 8 * 8]))
+
+
+def _pack(hashes) -> str:
+    ordered = sorted(hashes)
+    return base64.b64encode(struct.pack(f">{len(ordered)}Q", *ordered)).decode("ascii")
+
+
+class KnownUrls:
+    """Hashes of deal URLs already on the server, plus the sync version."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = 0
+        self.hashes: set[int] = set()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __contains__(self, url: str) -> bool:
+        return bool(url) and url_hash(url) in self.hashes
+
+    def _load(self) -> None:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.version = data.get("version", 0)
+        self.hashes = set(_unpack(data.get("hashes", "")))
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": self.version, "hashes": _pack(self.hashes)}, f)
+        os.replace(tmp, self.path)
+
+    def add(self, urls) -> None:
+        self.hashes.update(url_hash(u) for u in urls if u)
+
+    def sync(self, app_url: str, api_secret: str, timeout: int = 30) -> int | None:
+        """Fetch URLs added since our version; returns how many, or None if unavailable."""
+        base = app_url.rstrip("/").replace("http://", "https://")
+        try:
+            resp = requests.get(
+                f"{base}/api/deals/known",
+                params={"since": self.version},
+                headers={"Authorization": f"Bearer {api_secret}"},
+                timeout=timeout,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"Known-URL sync failed: {e}", file=sys.stderr)
+            return None
+        new = _unpack(data.get("hashes", ""))
+        self.hashes.update(new)
+        self.version = max(self.version, data.get("version", self.version))
+        return len(new)
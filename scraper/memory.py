@@ -0,0 +1,164 @@
+"""
+Deal Hunter — Memory-budgeted runs
+With `run_scrape.py --max-memory SIZE`, Python allocations are traced
+with tracemalloc. While the traced total is over the budget, detail pages
+waiting between the detail and process stages are spilled to files in the
+state dir and read back just before parsing. At the end the run reports
+its peak and, for the moment of the peak, how much data each pipeline
+stage was holding.
+
+A stage holds the items queued for it and the batches its workers have
+in hand (Pipeline.holdings()); those are sized by walking their
+containers when a peak snapshot is taken, whatever the depth of the
+stack that allocated them. Memory no stage holds (parsers, caches, the
+interpreter) is reported as "other".
+"""
+
+import os
+import re
+import sys
+import threading
+import tracemalloc
+import uuid
+
+SAMPLE_SECONDS = 0.5
+
+# Take a new peak snapshot only when the peak grew by this much
+SNAPSHOT_GROWTH = 1.1
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    """Bytes from "512M", "1.5G", "800000" (binary units)."""
+    m = _SIZE_RE.match(text)
+    if not m:
+        raise ValueError(f"not a size: {text!r}")
+    return int(float(m.group(1)) * _UNITS[m.group(2).lower()])
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 ** 2:.1f} MB"
+
+
+def deep_size(obj, seen: set | None = None) -> int:
+    """Approximate bytes reachable from ``obj`` through dicts, lists, tuples and sets.
+
+    Objects already in ``seen`` (ids) are not counted again, so sizing
+    several stages with one set counts shared items once.
+    """
+    seen = set() if seen is None else seen
+    total, stack = 0, [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        try:
+            if isinstance(o, dict):
+                stack.extend(list(o.keys()))
+                stack.extend(list(o.values()))
+            elif isinstance(o, (list, tuple, set, frozenset)):
+                stack.extend(list(o))
+        except RuntimeError:
+            # A worker changed the container mid-walk; its size is still counted
+            pass
+    return total
+
+
+class MemoryBudget:
+    """Traces allocations, spills detail pages over budget, reports per-stage usage."""
+
+    def __init__(self, max_bytes: int, spill_dir: str):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spilled = 0
+        self.spilled_bytes = 0
+        self._pipeline = None
+        self._peak_snapshot: tracemalloc.Snapshot | None = None
+        self._peak_current = 0
+        self._peak_held: dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def watch(self, pipeline) -> None:
+        """Size ``pipeline``'s per-stage holdings at each peak snapshot."""
+        self._pipeline = pipeline
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self._thread = threading.Thread(target=self._watch, name="memory-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._snapshot_if_peak()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(SAMPLE_SECONDS):
+            self._snapshot_if_peak()
+
+    def _snapshot_if_peak(self) -> None:
+        if not tracemalloc.is_tracing():
+            return
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self._peak_current * SNAPSHOT_GROWTH:
+            self._peak_current = current
+            self._peak_snapshot = tracemalloc.take_snapshot()
+            if self._pipeline is not None:
+                seen: set = set()
+                self._peak_held = {
+                    stage: deep_size(items, seen) for stage, items in self._pipeline.holdings().items()
+                }
+
+    def over_budget(self) -> bool:
+        return tracemalloc.is_tracing() and tracemalloc.get_traced_memory()[0] > self.max_bytes
+
+    def spill(self, raw: dict) -> None:
+        """Move a listing's detail HTML to disk if the run is over budget."""
+        html = raw.get("detail_html")
+        if not html or not self.over_budget():
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"{uuid.uuid4().hex}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        raw["detail_html_file"] = path
+        del raw["detail_html"]
+        self.spilled += 1
+        self.spilled_bytes += len(html)
+
+    @staticmethod
+    def unspill(raw: dict) -> None:
+        """Load a spilled detail page back onto its listing and delete the file."""
+        path = raw.pop("detail_html_file", None)
+        if not path:
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                raw["detail_html"] = f.read()
+            os.remove(path)
+        except OSError as e:
+            print(f"Could not read spilled page {path}: {e}", file=sys.stderr)
+
+    def report(self) -> str:
+        _, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        lines = [f"Memory: peak {_mb(peak)} traced (budget {_mb(self.max_bytes)}), "
+                 f"{self.spilled} detail pages spilled to disk ({_mb(self.spilled_bytes)})"]
+        if self._peak_held:
+            held = sum(self._peak_held.values())
+            lines.append(f"Data held by stage at the peak ({_mb(held)} of {_mb(self._peak_current)} traced):")
+            by_stage = {**self._peak_held, "other": max(0, self._peak_current - held)}
+            for stage, size in sorted(by_stage.items(), key=lambda kv: -kv[1]):
+                lines.append(f"  {stage:<12} {_mb(size):>10}")
+        if self._peak_snapshot is not None:
+            lines.append("Top allocation sites at the peak:")
+            for stat in self._peak_snapshot.statistics("lineno")[:5]:
+                frame = stat.traceback[0]
+                site = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                lines.append(f"  {site:<28} {_mb(stat.size):>10}")
+        return "\n".join(lines)
@@ -0,0 +1,229 @@
+"""
+Deal Hunter — Staged streaming pipeline
+Runs a scrape as concurrent stages connected by bounded queues:
+
+    sources ──▶ stage 1 ──▶ stage 2 ──▶ … ──▶ results
+
+Every source generator runs in its own thread and every stage has its own
+worker threads. A full queue blocks the stage feeding it (backpressure),
+so memory stays bounded and the run takes roughly as long as its slowest
+stage instead of the sum of all stages. A stage's input queue can be
+ordered by a priority function instead of arrival order.
+"""
+
+import itertools
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+# Queued after the last real item, once per worker of the receiving stage
+_DONE = object()
+_DONE_RANK = float("inf")
+
+# How long a worker waits for more items to fill a batch
+BATCH_WAIT_SECONDS = 0.2
+
+
+@dataclass
+class Stage:
+    """One pipeline stage: ``fn`` takes a list of items and returns an iterable of outputs."""
+
+    name: str
+    fn: Callable[[list], Iterable]
+    workers: int = 1
+    queue_size: int = 64
+    batch_size: int = 1
+    batch_wait: float = BATCH_WAIT_SECONDS
+    # Lower values leave the queue first; None keeps arrival order
+    priority: Callable[[object], float] | None = None
+
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    finished_at: float | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class _StageQueue:
+    """Bounded FIFO or priority queue that also carries end-of-stream markers."""
+
+    def __init__(self, stage: Stage):
+        self.priority = stage.priority
+        self._seq = itertools.count()
+        self._q = queue.PriorityQueue(stage.queue_size) if stage.priority else queue.Queue(stage.queue_size)
+
+    def put(self, item) -> None:
+        if self.priority is None:
+            self._q.put(item)
+        elif item is _DONE:
+            self._q.put((_DONE_RANK, next(self._seq), item))
+        else:
+            self._q.put((self.priority(item), next(self._seq), item))
+
+    def get(self, timeout: float | None = None):
+        entry = self._q.get(timeout=timeout)
+        return entry if self.priority is None else entry[2]
+
+    def items(self) -> list:
+        """The items waiting right now, without the end-of-stream markers."""
+        with self._q.mutex:
+            entries = list(self._q.queue)
+        items = entries if self.priority is None else [entry[2] for entry in entries]
+        return [item for item in items if item is not _DONE]
+
+
+class Pipeline:
+    """Sources feeding a chain of stages; run() returns the last stage's outputs."""
+
+    def __init__(self, sources: list[Callable[[], Iterable]], stages: list[Stage], profiler=None):
+        self.sources = sources
+        self.stages = stages
+        # Anything with a thread_stage(name) context manager (profiling.StageProfiler)
+        self.profiler = profiler
+        self.results: list = []
+        self.started = 0.0
+        self.finished = 0.0
+        self._queues: list[_StageQueue] = []
+        # Worker thread id -> (stage index, the batch or outputs it has in hand)
+        self._in_flight: dict[int, tuple[int, list]] = {}
+
+    def holdings(self) -> dict[str, list]:
+        """Items each stage holds right now: queued for it or in a worker's hands.
+
+        Safe to call from another thread while the pipeline runs; the
+        lists are copies, the items themselves are shared.
+        """
+        held = {stage.name: queue.items() for stage, queue in zip(self.stages, self._queues)}
+        for index, items in list(self._in_flight.values()):
+            held[self.stages[index].name].extend(items)
+        held["results"] = list(self.results)
+        return held
+
+    def _emit(self, index: int, item) -> float:
+        """Hand an item to stage ``index`` (or the results); returns seconds blocked."""
+        if index == len(self.stages):
+            self.results.append(item)
+            return 0.0
+        started = time.monotonic()
+        self._queues[index].put(item)
+        return time.monotonic() - started
+
+    def _close(self, index: int) -> None:
+        if index < len(self.stages):
+            for _ in range(self.stages[index].workers):
+                self._queues[index].put(_DONE)
+
+    def _in_stage(self, name: str, target: Callable, *args) -> None:
+        """Thread body: run ``target`` profiled as stage ``name`` when profiling."""
+        if self.profiler is None:
+            target(*args)
+        else:
+            with self.profiler.thread_stage(name):
+                target(*args)
+
+    def _run_source(self, source: Callable[[], Iterable]) -> None:
+        try:
+            for item in source():
+                self._emit(0, item)
+        except Exception as e:
+            print(f"Pipeline source failed: {e}", file=sys.stderr)
+        finally:
+            with self._sources_lock:
+                self._sources_left -= 1
+                last = self._sources_left == 0
+            if last:
+                self._close(0)
+
+    def _run_worker(self, index: int) -> None:
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        done = False
+        try:
+            while not done:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + stage.batch_wait
+                while len(batch) < stage.batch_size:
+                    try:
+                        item = inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+
+                me = threading.get_ident()
+                self._in_flight[me] = (index, batch)
+                started = time.monotonic()
+                try:
+                    outputs = list(stage.fn(batch))
+                except Exception as e:
+                    print(f"[{stage.name}] Failed on {len(batch)} items: {e}", file=sys.stderr)
+                    outputs = []
+                    with stage._lock:
+                        stage.errors += 1
+                busy = time.monotonic() - started
+
+                self._in_flight[me] = (index, outputs)
+                blocked = 0.0
+                for output in outputs:
+                    blocked += self._emit(index + 1, output)
+                del self._in_flight[me]
+                with stage._lock:
+                    stage.items_in += len(batch)
+                    stage.items_out += len(outputs)
+                    stage.busy_seconds += busy
+                    stage.blocked_seconds += blocked
+        finally:
+            with stage._lock:
+                self._workers_left[index] -= 1
+                last = self._workers_left[index] == 0
+                if last:
+                    stage.finished_at = time.monotonic()
+            if last:
+                self._close(index + 1)
+
+    def run(self) -> list:
+        self.started = time.monotonic()
+        self._queues = [_StageQueue(stage) for stage in self.stages]
+        self._workers_left = [stage.workers for stage in self.stages]
+        self._sources_left = len(self.sources)
+        self._sources_lock = threading.Lock()
+
+        threads = [
+            threading.Thread(target=self._in_stage, args=("sources", self._run_source, source),
+                             name=f"source-{i}", daemon=True)
+            for i, source in enumerate(self.sources)
+        ]
+        for index, stage in enumerate(self.stages):
+            threads += [
+                threading.Thread(target=self._in_stage, args=(stage.name, self._run_worker, index),
+                                 name=f"{stage.name}-{i}", daemon=True)
+                for i in range(stage.workers)
+            ]
+        if not self.sources:
+            self._close(0)
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.finished = time.monotonic()
+        return self.results
+
+    def report(self) -> str:
+        lines = [f"Pipeline finished in {self.finished - self.started:.1f}s"]
+        for stage in self.stages:
+            line = (f"  {stage.name:<10} {stage.workers} workers  {stage.items_in:>5} in  {stage.items_out:>5} out  "
+                    f"busy {stage.busy_seconds:7.1f}s  blocked {stage.blocked_seconds:6.1f}s")
+            if stage.errors:
+                line += f"  {stage.errors} errors"
+            lines.append(line)
+        return "\n".join(lines)
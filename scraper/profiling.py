@@ -0,0 +1,192 @@
+"""
+Deal Hunter — Per-stage profiling for scraper runs
+With `run_scrape.py --profile`, every profiled stage of a run runs under
+cProfile (deterministic, for the hot-function summary; threads started
+during the stage get their own profiler) and a wall-clock stack sampler
+(covers every thread, including time spent waiting on the network or the
+Playwright subprocess). Sampled stacks are rooted at the thread name.
+For each stage it writes:
+
+    <stage>.prof       pstats file (snakeviz, `python -m pstats`)
+    <stage>.collapsed  collapsed stacks for flamegraph.pl / speedscope
+
+The streaming pipeline runs its stages concurrently inside one profiled
+stage; its threads report under their own stage name (thread_stage), so
+sources, prefilter, detail, process and upload still get a file pair each.
+
+Without the flag, NULL_PROFILER hands out a shared no-op context manager.
+"""
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+DEFAULT_TOP_N = 20
+
+
+class StackSampler:
+    """Samples the stacks of all other threads at a fixed wall-clock interval."""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                parts.append(names.get(ident, "thread"))
+                self.stacks[";".join(reversed(parts))] += 1
+
+    def write_collapsed(self, path: str, threads: set | None = None) -> None:
+        """Write the sampled stacks, only those of the named ``threads`` if given."""
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                if threads is None or stack.split(";", 1)[0] in threads:
+                    f.write(f"{stack} {count}\n")
+
+
+class StageProfiler:
+    """Profiles named pipeline stages and writes one file pair per stage."""
+
+    def __init__(self, out_dir: str, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.stage_seconds: dict[str, float] = {}
+        self._stats: pstats.Stats | None = None
+        # Stage name -> profilers, thread names and wall span of threads run via thread_stage
+        self._threads: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        os.makedirs(out_dir, exist_ok=True)
+
+    @contextlib.contextmanager
+    def thread_stage(self, name: str):
+        """Profile the calling thread as part of stage ``name`` (pipeline workers).
+
+        Written out, with the sampled stacks of those threads, when the
+        enclosing stage() ends; that stage should not hook new threads.
+        """
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            finished = time.perf_counter()
+            with self._lock:
+                entry = self._threads.setdefault(
+                    name, {"profilers": [], "threads": set(), "started": started, "finished": finished}
+                )
+                entry["profilers"].append(profiler)
+                entry["threads"].add(threading.current_thread().name)
+                entry["started"] = min(entry["started"], started)
+                entry["finished"] = max(entry["finished"], finished)
+
+    def _add(self, stats: pstats.Stats) -> None:
+        if self._stats is None:
+            self._stats = stats
+        else:
+            self._stats.add(stats)
+
+    def _write_thread_stages(self, sampler: StackSampler) -> None:
+        with self._lock:
+            entries, self._threads = self._threads, {}
+        for name, entry in entries.items():
+            stats = pstats.Stats(entry["profilers"][0], stream=io.StringIO())
+            for thread_profiler in entry["profilers"][1:]:
+                stats.add(thread_profiler)
+            stats.dump_stats(os.path.join(self.out_dir, f"{name}.prof"))
+            sampler.write_collapsed(os.path.join(self.out_dir, f"{name}.collapsed"), entry["threads"])
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + entry["finished"] - entry["started"]
+            self._add(stats)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, profile_threads: bool = True):
+        profiler = cProfile.Profile()
+        thread_profilers = []
+
+        def profile_new_thread(*_args):
+            # Runs as the first profile event of each thread started during
+            # the stage; enabling a profiler replaces this hook
+            thread_profiler = cProfile.Profile()
+            thread_profilers.append(thread_profiler)
+            thread_profiler.enable()
+
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        started = time.perf_counter()
+        if profile_threads:
+            threading.setprofile(profile_new_thread)
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            threading.setprofile(None)
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + time.perf_counter() - started
+            sampler.stop()
+            stats = pstats.Stats(profiler, stream=io.StringIO())
+            for thread_profiler in thread_profilers:
+                stats.add(thread_profiler)
+            stats.dump_stats(os.path.join(self.out_dir, f"{name}.prof"))
+            sampler.write_collapsed(os.path.join(self.out_dir, f"{name}.collapsed"))
+            self._add(stats)
+            self._write_thread_stages(sampler)
+
+    def summary(self, top_n: int = DEFAULT_TOP_N) -> str:
+        """Stage wall times plus the top-N functions by own time across all stages."""
+        lines = ["Stage wall time:"]
+        for name, seconds in self.stage_seconds.items():
+            lines.append(f"  {name:<20} {seconds:8.2f}s")
+        if self._stats is not None:
+            out = io.StringIO()
+            self._stats.stream = out
+            self._stats.sort_stats("tottime").print_stats(top_n)
+            lines.append(f"Top {top_n} functions by own time (all threads):")
+            lines.append(out.getvalue().strip())
+        lines.append(f"Profiles written to {self.out_dir}")
+        return "\n".join(lines)
+
+
+class _NullProfiler:
+    """Stand-in when profiling is off: stage() costs one method call."""
+
+    _context = contextlib.nullcontext()
+
+    def stage(self, name: str, profile_threads: bool = True):
+        return self._context
+
+    def thread_stage(self, name: str):
+        return self._context
+
+
+NULL_PROFILER = _NullProfiler()
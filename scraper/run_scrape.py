@@ -5,7 +5,8 @@ Scrapes BizBuySell + broker sites, processes results, and POSTs deals to the API
 Designed to be called from GitHub Actions or manually.
 
 Usage:
-  python scraper/run_scrape.py [--send-digest] [--dry-run]
+  python scraper/run_scrape.py [--send-digest] [--dry-run] [--deadline SECONDS] [--profiles FILE]
+                               [--digest-dir DIR] [--profile [DIR]]
 
 Environment variables:
   APP_URL          - Base URL of the Deal Hunter app (default: http://localhost:3000)
@@ -15,14 +16,16 @@ Environment variables:
 import argparse
 import json
 import os
+import pickle
 import sys
 import time
 import hashlib
 import subprocess
 import re
-from dataclasses import dataclass, field, asdict
-from datetime import datetime
-from typing import Optional
+import threading
+from dataclasses import dataclass, field, fields, asdict, replace
+from datetime import datetime, timezone
+from typing import Iterator, Optional
 from urllib.parse import quote, urljoin
 
 import requests
@@ -32,51 +35,248 @@ from bs4 import BeautifulSoup
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from deal_hunter_scraper import (
-    CRITERIA,
+    DEFAULT_CRITERIA,
+    CompiledCriteria,
     Deal,
+    ProfileScore,
+    attach_scoring_model,
+    compile_criteria,
+    extract_structured_data,
     parse_listing_card,
     parse_detail_page,
+    prefilter_reason,
     process_deal,
+    process_deal_profiles,
+    set_analysis_cache,
+    prepare_profiles,
     passes_financial_filters,
     build_search_urls_with_filters,
+    generate_user_digests,
+    parse_money,
 )
+from gazetteer import GAZETTEER_VERSION
+from scoring_model import load_scoring_models, model_for
+from analysis_cache import AnalysisCache
+from archive import write_archive
+from blocking import BLOCK_STATS, blocking_policy, route_script
+from checkpoint import Checkpoint
+from hosts import HostController
+from hybrid import BROWSER, FetchPlanner
+from known_urls import KnownUrls
+from memory import MemoryBudget, parse_size
+from pipeline import Pipeline, Stage
+from sharding import Shard, merge_deals, parse_shard, read_shard_outputs, write_shard_output
+from store import DealStore, deal_key
+from profiling import DEFAULT_TOP_N, NULL_PROFILER, StageProfiler
+from discovery import discover_source, load_discovery_state, save_discovery_state
+from extractors import CARD_FIELDS, MIN_TITLE_LENGTH, extract_cards, get_extractor
+from scheduler import DeadlineScheduler, YieldTracker, reserve_from_history
+from frontier import (
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_PAGE_BUDGET,
+    CrawlFrontier,
+    bizbuysell_page_url,
+    find_next_page,
+    normalize_url,
+)
+
+
+SCRAPER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Local state that survives between runs (criteria cache, etc.). CI restores
+# this directory with actions/cache.
+STATE_DIR = os.environ.get("DEAL_HUNTER_STATE_DIR", os.path.join(SCRAPER_DIR, ".state"))
+CRITERIA_CACHE_FILE = os.path.join(STATE_DIR, "criteria.pickle")
+DISCOVERY_STATE_FILE = os.path.join(STATE_DIR, "discovery.json")
+ARCHIVE_DIR = os.environ.get("DEAL_HUNTER_ARCHIVE_DIR", os.path.join(STATE_DIR, "archive"))
+ANALYSIS_CACHE_FILE = os.path.join(STATE_DIR, "analysis.sqlite")
+KNOWN_URLS_FILE = os.path.join(STATE_DIR, "known_urls.json")
+DEAL_STORE_FILE = os.path.join(STATE_DIR, "deals.sqlite")
+FETCH_MODES_FILE = os.path.join(STATE_DIR, "fetch_modes.json")
+SCORING_MODEL_FILE = os.path.join(STATE_DIR, "scoring_model.json")
+YIELD_STATS_FILE = os.path.join(STATE_DIR, "yield.json")
+SHARD_DIR = os.path.join(STATE_DIR, "shards")
+CHECKPOINT_FILE = os.path.join(STATE_DIR, "checkpoint.jsonl")
+
 
+def fetch_criteria_from_api(app_url: str, etag: str | None = None) -> tuple[str, dict | None, str | None]:
+    """Fetch deal criteria from the web app's API, if available.
 
-def fetch_criteria_from_api(app_url: str) -> dict | None:
-    """Fetch deal criteria from the web app's API, if available."""
+    Sends ``If-None-Match`` when we hold a cached copy. Returns
+    (status, criteria, etag) where status is "ok", "not_modified" or
+    "unavailable".
+    """
     base = app_url.rstrip("/").replace("http://", "https://")
     url = f"{base}/api/criteria"
+    headers = {"If-None-Match": etag} if etag else {}
     try:
-        resp = requests.get(url, timeout=15)
+        resp = requests.get(url, headers=headers, timeout=15)
+        if resp.status_code == 304:
+            return "not_modified", None, etag
         if resp.status_code == 200:
             data = resp.json()
             if "ev_min" in data:
-                return data
+                return "ok", data, resp.headers.get("ETag")
     except Exception as e:
         print(f"Could not fetch criteria from API: {e}", file=sys.stderr)
-    return None
+    return "unavailable", None, None
+
+
+def _read_criteria_cache() -> dict | None:
+    try:
+        with open(CRITERIA_CACHE_FILE, "rb") as f:
+            cached = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # Stale pickle from an older CompiledCriteria layout, truncated file, ...
+        print(f"Ignoring unreadable criteria cache: {e}", file=sys.stderr)
+        return None
+    if not isinstance(cached, dict) or not isinstance(cached.get("criteria"), CompiledCriteria):
+        return None
+    criteria = cached["criteria"]
+    if cached.get("gazetteer") != GAZETTEER_VERSION or not all(hasattr(criteria, f.name) for f in fields(CompiledCriteria)):
+        # Geography compiled with other gazetteer tables, or an older CompiledCriteria layout
+        cached["criteria"] = compile_criteria(criteria.as_dict(), version=criteria.version)
+    return cached
+
+
+def _write_criteria_cache(cached: dict) -> None:
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = f"{CRITERIA_CACHE_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(cached, f)
+    os.replace(tmp, CRITERIA_CACHE_FILE)
+
+
+def load_criteria(app_url: str) -> tuple[CompiledCriteria, str]:
+    """Return the compiled criteria for this run and where they came from.
+
+    The compiled snapshot is cached on disk together with the API's ETag and
+    ``updated_at``; unchanged criteria are neither re-downloaded (304) nor
+    recompiled. Falls back to the last cached copy, then to the defaults.
+    """
+    cached = _read_criteria_cache()
+    status, data, etag = fetch_criteria_from_api(app_url, cached.get("etag") if cached else None)
+
+    if status == "not_modified" and cached:
+        return cached["criteria"], "cache"
+
+    if status == "ok":
+        updated_at = str(data.get("updated_at") or "")
+        if cached and updated_at and cached["criteria"].version == updated_at:
+            return cached["criteria"], "cache"
+        compiled = compile_criteria(data, version=updated_at)
+        try:
+            _write_criteria_cache({"etag": etag, "criteria": compiled, "gazetteer": GAZETTEER_VERSION})
+        except OSError as e:
+            print(f"Could not write criteria cache: {e}", file=sys.stderr)
+        return compiled, "api"
 
+    if cached:
+        return cached["criteria"], "cache (API unavailable)"
+    return DEFAULT_CRITERIA, "default"
 
-def apply_api_criteria(api_criteria: dict) -> None:
-    """Override the in-memory CRITERIA dict with values from the API."""
-    CRITERIA["ev_min"] = api_criteria.get("ev_min", CRITERIA["ev_min"])
-    CRITERIA["ev_max"] = api_criteria.get("ev_max", CRITERIA["ev_max"])
-    CRITERIA["revenue_min"] = api_criteria.get("revenue_min", CRITERIA["revenue_min"])
-    CRITERIA["revenue_max"] = api_criteria.get("revenue_max", CRITERIA["revenue_max"])
-    CRITERIA["ebitda_min"] = api_criteria.get("ebitda_min", CRITERIA["ebitda_min"])
-    CRITERIA["max_multiple"] = api_criteria.get("max_multiple", CRITERIA["max_multiple"])
-    CRITERIA["geography"] = api_criteria.get("geography", CRITERIA["geography"])
 
-    if api_criteria.get("preferred_traits"):
-        CRITERIA["preferred_traits"] = api_criteria["preferred_traits"]
-    if api_criteria.get("avoid_traits"):
-        CRITERIA["avoid_traits"] = api_criteria["avoid_traits"]
-    if api_criteria.get("target_industries"):
-        CRITERIA["target_industries"] = api_criteria["target_industries"]
-    if api_criteria.get("search_keywords"):
-        CRITERIA["search_keywords"] = api_criteria["search_keywords"]
+def load_profiles(path: str) -> list[dict]:
+    """Load a JSON list of per-user criteria profiles (same shape as /api/criteria)."""
+    try:
+        with open(path) as f:
+            profiles = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Could not load profiles from {path}: {e}", file=sys.stderr)
+        return []
+    if not isinstance(profiles, list):
+        print(f"Profiles file {path} must contain a JSON list", file=sys.stderr)
+        return []
+    return profiles
+
+
+def write_profile_digests(
+    deals: list[dict], profiles: list[dict], prepared_profiles: list[CompiledCriteria], out_dir: str
+) -> list[str]:
+    """Render every profile's digest in one pass over the run's deals; returns the files written.
+
+    Deals are ranked per profile by their ``profile_scores`` and left out of
+    the digests of profiles they don't pass. A profile may carry ``email``
+    and ``rated_urls`` (deals that user already rated).
+    """
+    deal_fields = {f.name for f in fields(Deal)}
+    ids = [p.profile_id for p in prepared_profiles]
+    digest_deals, vectors = [], []
+    for d in deals:
+        digest_deals.append(Deal(**{k: v for k, v in d.items() if k in deal_fields}))
+        scores = d.get("profile_scores") or {}
+        vectors.append([ProfileScore(pid, scores.get(pid, 0), [], [], pid in scores) for pid in ids])
+    recipients = [
+        {"email": profile.get("email") or f"profile-{pid}", "rated_urls": profile.get("rated_urls")}
+        for profile, pid in zip(profiles, ids)
+    ]
+    digests = generate_user_digests(digest_deals, recipients, profile_scores=vectors)
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for email, html in digests.items():
+        path = os.path.join(out_dir, re.sub(r"[^\w.@-]", "_", email) + ".html")
+        with open(path, "w") as f:
+            f.write(html)
+        paths.append(path)
+    return paths
+
+
+def load_models(path: str) -> dict:
+    """Load trained scoring models (see train_scoring.py); {} falls back to hand-tuned scores."""
+    try:
+        return load_scoring_models(path)
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError) as e:
+        print(f"Could not load scoring model from {path}: {e}; using hand-tuned scores", file=sys.stderr)
+        return {}
+
 
-SOURCES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sources.json")
+SOURCES_FILE = os.path.join(SCRAPER_DIR, "sources.json")
+
+# Default pages per broker site per run (override with `page_budget` in sources.json)
+BROKER_PAGE_BUDGET = 3
+
+# Rough wall-clock cost of one fetch, used to fit work into --deadline
+BROKER_PAGE_SECONDS = 4.0
+BROKER_DETAIL_SECONDS = 2.0
+PLAYWRIGHT_PAGE_SECONDS = 10.0
+DETAIL_PAGE_SECONDS = 6.0
+
+# Detail pages per broker source per run (sitemap/feed sources: all new ones)
+BROKER_DETAIL_LIMIT = 10
+
+# Most BizBuySell detail pages fetched per run
+DETAIL_PAGE_LIMIT = 50
+
+# Pipeline stage sizing. Detail workers fetch broker pages over HTTP
+# (each host held to its own limit by HOST_CONTROLLER) and BizBuySell
+# pages with at most DETAIL_BROWSERS Playwright browsers at a time.
+PIPELINE_QUEUE_SIZE = 64
+DETAIL_WORKERS = 4
+DETAIL_BATCH = 5
+DETAIL_BROWSERS = 2
+PROCESS_WORKERS = 2
+PROCESS_BATCH = 10
+UPLOAD_BATCH = 25
+UPLOAD_BATCH_WAIT = 5.0
+
+# Card text shipped back from the browser is cut to this many characters
+CARD_TEXT_LIMIT = 1500
+
+# Financial labels read from card text (lowercase) and the Deal field each fills
+FINANCIAL_LABELS = {
+    "asking price": "asking_price",
+    "cash flow": "cash_flow_sde",
+    "sde": "cash_flow_sde",
+    "gross revenue": "revenue",
+    "revenue": "revenue",
+    "ebitda": "ebitda",
+}
+FINANCIAL_LABEL_PATTERN = (
+    "(" + "|".join(sorted(FINANCIAL_LABELS, key=len, reverse=True)) + r")\s*:?\s*(\$\s?[\d,.]+(?:\s?[MmKk]\b)?)"
+)
 
 HTTP_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -84,10 +284,51 @@ HTTP_HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
 }
 
+# Shared by every HTTP fetch so throttling and outages are seen per host
+HOST_CONTROLLER = HostController()
 
-def scrape_with_playwright(urls: list[str]) -> list[dict]:
-    """Run Playwright to scrape listing pages and return raw listing data."""
-    urls_json = json.dumps(urls[:20])  # Limit to avoid rate limiting
+
+def _json_lines(stdout: str | bytes | None) -> list:
+    """Decode a Playwright script's JSON-lines output, skipping a torn last line."""
+    if isinstance(stdout, bytes):
+        stdout = stdout.decode("utf-8", "replace")
+    items = []
+    for line in (stdout or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            print(f"Skipping unreadable scraper output line: {e}", file=sys.stderr)
+    return items
+
+
+def scrape_with_playwright(
+    urls: list[str],
+    timeout: float = 600,
+    source: dict | None = None,
+    card_html: bool = False,
+) -> list[dict]:
+    """Run Playwright to scrape listing pages and return raw listing data.
+
+    Cards are extracted inside the browser with ``source``'s selectors and
+    come back as compact fields (title, href, selector fields, financial
+    label/value pairs and trimmed text); their outerHTML is only included
+    with ``card_html``, for debugging. Each listing carries the results
+    ``page`` it was found on. Callers bound the number of URLs (see
+    CrawlFrontier page budgets). Requests are filtered by ``source``'s
+    blocking policy (see blocking.py).
+    """
+    urls_json = json.dumps(urls)
+    extract_args = json.dumps({
+        "selectors": (source or {}).get("selectors") or {},
+        "fieldNames": [f for f in CARD_FIELDS if f != "title"],
+        "minTitle": MIN_TITLE_LENGTH,
+        "labelPattern": FINANCIAL_LABEL_PATTERN,
+        "textLimit": CARD_TEXT_LIMIT,
+        "cardHtml": card_html,
+    })
 
     script = f"""
 const {{ chromium }} = require('playwright');
@@ -106,7 +347,7 @@ const {{ chromium }} = require('playwright');
         viewport: {{ width: 1440, height: 900 }},
         locale: 'en-US',
     }});
-
+{route_script(blocking_policy(source))}
     const page = await context.newPage();
 
     // Remove webdriver flag
@@ -115,7 +356,7 @@ const {{ chromium }} = require('playwright');
     }});
 
     const urls = {urls_json};
-    const allListings = [];
+    const extractArgs = {extract_args};
     const seen = new Set();
 
     for (const url of urls) {{
@@ -127,32 +368,66 @@ const {{ chromium }} = require('playwright');
             // Wait for content to render
             await page.waitForTimeout(3000);
 
-            // Try multiple selector strategies for BizBuySell
-            const listings = await page.evaluate(() => {{
+            const listings = await page.evaluate((args) => {{
                 const results = [];
+                const clean = (s) => (s || '').replace(/\\s+/g, ' ').trim();
+                const labelRe = new RegExp(args.labelPattern, 'gi');
+                const compact = (title, href, card, fields) => {{
+                    const text = clean(card?.textContent);
+                    const financials = [...text.matchAll(labelRe)].map(m => [m[1], m[2]]);
+                    const item = {{ title, href, text: text.slice(0, args.textLimit), fields, financials }};
+                    if (args.cardHtml) item.html = card?.outerHTML || '';
+                    return item;
+                }};
+
+                // Strategy 1: the source's selectors, as in extractors.py
+                const sel = args.selectors;
+                if (sel.listing_card && sel.title) {{
+                    try {{
+                        const seenHrefs = new Set();
+                        for (const card of document.querySelectorAll(sel.listing_card)) {{
+                            const titleEl = card.querySelector(sel.title);
+                            if (!titleEl) continue;
+                            const title = clean(titleEl.textContent);
+                            if (title.length < args.minTitle) continue;
+                            let link = titleEl.tagName === 'A' ? titleEl : titleEl.querySelector('a[href]');
+                            if (!link && card.tagName === 'A') link = card;
+                            const href = link?.getAttribute('href') || '';
+                            if (href && seenHrefs.has(href)) continue;
+                            seenHrefs.add(href);
+                            const fields = {{}};
+                            for (const name of args.fieldNames) {{
+                                const el = sel[name] ? card.querySelector(sel[name]) : null;
+                                if (el) fields[name] = clean(el.textContent);
+                            }}
+                            results.push(compact(title, href, card, fields));
+                        }}
+                    }} catch (e) {{
+                        console.error(`  Selector error: ${{e.message}}`);
+                    }}
+                }}
 
-                // Strategy 1: Look for links to business-opportunity pages
-                const links = document.querySelectorAll('a[href*="/businesses-for-sale/"], a[href*="business-opportunity"]');
-                const seenHrefs = new Set();
-
-                for (const link of links) {{
-                    const href = link.getAttribute('href') || '';
-                    if (seenHrefs.has(href)) continue;
-                    seenHrefs.add(href);
+                // Strategy 2: Look for links to business-opportunity pages
+                if (results.length === 0) {{
+                    const links = document.querySelectorAll('a[href*="/businesses-for-sale/"], a[href*="business-opportunity"]');
+                    const seenHrefs = new Set();
 
-                    // Walk up to find the listing card container
-                    let card = link.closest('[class*="listing"], [class*="result"], [class*="card"], article, .row');
-                    if (!card) card = link.parentElement?.parentElement || link.parentElement;
+                    for (const link of links) {{
+                        const href = link.getAttribute('href') || '';
+                        if (seenHrefs.has(href)) continue;
+                        seenHrefs.add(href);
 
-                    const title = link.textContent?.trim() || '';
-                    if (!title || title.length < 5) continue;
+                        // Walk up to find the listing card container
+                        let card = link.closest('[class*="listing"], [class*="result"], [class*="card"], article, .row');
+                        if (!card) card = link.parentElement?.parentElement || link.parentElement;
 
-                    const text = card?.textContent || '';
-                    const html = card?.outerHTML || link.outerHTML;
-                    results.push({{ title, href, text, html }});
+                        const title = link.textContent?.trim() || '';
+                        if (!title || title.length < args.minTitle) continue;
+                        results.push(compact(title, href, card || link, {{}}));
+                    }}
                 }}
 
-                // Strategy 2: If no results, try broader selectors
+                // Strategy 3: If no results, try broader selectors
                 if (results.length === 0) {{
                     const cards = document.querySelectorAll('[class*="listing"], [class*="search-result"], [class*="bizCard"]');
                     for (const card of cards) {{
@@ -160,20 +435,24 @@ const {{ chromium }} = require('playwright');
                         if (!titleEl) continue;
                         const title = titleEl.textContent?.trim() || '';
                         const href = titleEl.getAttribute('href') || '';
-                        if (!title || title.length < 5) continue;
-                        results.push({{ title, href, text: card.textContent || '', html: card.outerHTML }});
+                        if (!title || title.length < args.minTitle) continue;
+                        results.push(compact(title, href, card, {{}}));
                     }}
                 }}
 
                 return results;
-            }});
+            }}, extractArgs);
 
+            // One JSON line per page, so a killed run still yields finished pages
+            const fresh = [];
             for (const l of listings) {{
                 if (l.title && !seen.has(l.title)) {{
                     seen.add(l.title);
-                    allListings.push(l);
+                    l.page = url;
+                    fresh.push(l);
                 }}
             }}
+            console.log(JSON.stringify(fresh));
 
             console.error(`  Found ${{listings.length}} listings`);
 
@@ -185,7 +464,7 @@ const {{ chromium }} = require('playwright');
         }}
     }}
 
-    console.log(JSON.stringify(allListings));
+    reportBlocked();
     await browser.close();
 }})();
 """
@@ -195,36 +474,43 @@ const {{ chromium }} = require('playwright');
             ["node", "-e", script],
             capture_output=True,
             text=True,
-            timeout=600,
+            timeout=timeout,
         )
 
         # Always show stderr so we can see per-URL status
-        if result.stderr.strip():
-            for line in result.stderr.strip().split('\n'):
-                print(f"  [playwright] {line}")
+        for line in BLOCK_STATS.consume(result.stderr):
+            print(f"  [playwright] {line}")
 
         if result.returncode != 0:
             print(f"Playwright exited with code {result.returncode}", file=sys.stderr)
 
-        if result.stdout.strip():
-            return json.loads(result.stdout.strip())
-    except subprocess.TimeoutExpired:
-        print("Scraper timed out after 10 minutes", file=sys.stderr)
-    except json.JSONDecodeError as e:
-        print(f"Failed to parse scraper output: {e}", file=sys.stderr)
+        return [l for page in _json_lines(result.stdout) for l in page]
+    except subprocess.TimeoutExpired as e:
+        listings = [l for page in _json_lines(e.stdout) for l in page]
+        print(f"Scraper timed out after {timeout:.0f}s, keeping {len(listings)} listings from finished pages",
+              file=sys.stderr)
+        return listings
     except FileNotFoundError:
         print("Node.js not found — is it installed?", file=sys.stderr)
 
     return []
 
 
-def scrape_detail_pages(listing_urls: list[str]) -> dict[str, str]:
-    """Visit individual listing detail pages with Playwright and return {url: html}."""
+def scrape_detail_pages(
+    listing_urls: list[str],
+    limit: int = 50,
+    timeout: float = 600,
+    source: dict | None = None,
+) -> dict[str, str]:
+    """Visit individual listing detail pages with Playwright and return {url: html}.
+
+    Requests are filtered by ``source``'s blocking policy (see blocking.py).
+    """
     if not listing_urls:
         return {}
 
     # Limit to avoid excessive runtime (detail pages take ~4s each)
-    urls_to_visit = listing_urls[:50]
+    urls_to_visit = listing_urls[:limit]
     urls_json = json.dumps(urls_to_visit)
 
     script = f"""
@@ -241,15 +527,13 @@ const {{ chromium }} = require('playwright');
         viewport: {{ width: 1440, height: 900 }},
         locale: 'en-US',
     }});
-
+{route_script(blocking_policy(source))}
     const page = await context.newPage();
     await page.addInitScript(() => {{
         Object.defineProperty(navigator, 'webdriver', {{ get: () => false }});
     }});
 
     const urls = {urls_json};
-    const results = {{}};
-
     for (const url of urls) {{
         try {{
             console.error(`Detail: ${{url}}`);
@@ -258,7 +542,8 @@ const {{ chromium }} = require('playwright');
 
             await page.waitForTimeout(2000);
             const html = await page.content();
-            results[url] = html;
+            // One JSON line per page, so a killed run still yields finished pages
+            console.log(JSON.stringify({{ [url]: html }}));
 
             const delay = 1500 + Math.random() * 2500;
             await page.waitForTimeout(delay);
@@ -267,7 +552,7 @@ const {{ chromium }} = require('playwright');
         }}
     }}
 
-    console.log(JSON.stringify(results));
+    reportBlocked();
     await browser.close();
 }})();
 """
@@ -277,28 +562,42 @@ const {{ chromium }} = require('playwright');
             ["node", "-e", script],
             capture_output=True,
             text=True,
-            timeout=600,
+            timeout=timeout,
         )
 
-        if result.stderr.strip():
-            for line in result.stderr.strip().split('\n'):
-                print(f"  [detail] {line}")
+        for line in BLOCK_STATS.consume(result.stderr):
+            print(f"  [detail] {line}")
 
         if result.returncode != 0:
             print(f"Detail scraper exited with code {result.returncode}", file=sys.stderr)
 
-        if result.stdout.strip():
-            return json.loads(result.stdout.strip())
-    except subprocess.TimeoutExpired:
-        print("Detail scraper timed out", file=sys.stderr)
-    except json.JSONDecodeError as e:
-        print(f"Failed to parse detail scraper output: {e}", file=sys.stderr)
+        return {url: html for page in _json_lines(result.stdout) for url, html in page.items()}
+    except subprocess.TimeoutExpired as e:
+        pages = {url: html for page in _json_lines(e.stdout) for url, html in page.items()}
+        print(f"Detail scraper timed out, keeping {len(pages)} finished pages", file=sys.stderr)
+        return pages
     except FileNotFoundError:
         print("Node.js not found", file=sys.stderr)
 
     return {}
 
 
+def load_marketplace_sources() -> list[dict]:
+    """Load marketplace entries from sources.json."""
+    try:
+        with open(SOURCES_FILE) as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Could not load sources.json: {e}", file=sys.stderr)
+        return []
+    return data.get("marketplaces", [])
+
+
+def find_marketplace(name: str) -> dict:
+    """The sources.json entry of a marketplace ({} if it isn't listed)."""
+    return next((m for m in load_marketplace_sources() if m["name"] == name), {})
+
+
 def load_broker_sources() -> list[dict]:
     """Load broker sites from sources.json that don't require JS or login."""
     try:
@@ -316,148 +615,573 @@ def load_broker_sources() -> list[dict]:
     return brokers
 
 
-def scrape_broker_site(broker: dict) -> list[dict]:
-    """Scrape a single broker site via HTTP and extract listing links."""
-    url = broker["url"]
-    name = broker["name"]
+# Links whose URL contains any of these are never listings (social, contact, about, etc.)
+LINK_SKIP_PATTERNS = (
+    "facebook", "twitter", "linkedin", "instagram", "youtube",
+    "mailto:", "tel:", "#", "javascript:", "/contact", "/about",
+    "/privacy", "/terms", "/login", "/register", "/blog",
+    "/team", "/faq", "/careers",
+)
+_LINK_SKIP_RE = re.compile("|".join(re.escape(p) for p in LINK_SKIP_PATTERNS), re.IGNORECASE)
+
+
+def extract_links_generic(soup: BeautifulSoup, url: str, name: str) -> list[dict]:
+    """Fallback for sources without selectors: treat content links as listings."""
     listings = []
+    index_url = url.rstrip("/")
 
-    try:
-        resp = requests.get(url, headers=HTTP_HEADERS, timeout=20)
-        if resp.status_code != 200:
-            print(f"  [{name}] HTTP {resp.status_code}")
-            return []
+    # Find all links that look like individual listing/detail pages
+    for a in soup.find_all("a", href=True):
+        text = a.get_text(strip=True)
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+        # Skip navigation, empty, or very short links
+        if not text or len(text) < 8:
+            continue
 
-        # Find all links that look like individual listing/detail pages
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            text = a.get_text(strip=True)
+        # Build absolute URL
+        full_url = urljoin(url, a["href"])
 
-            # Skip navigation, empty, or very short links
-            if not text or len(text) < 8:
-                continue
+        # Skip links that point back to the same listing index page
+        if full_url.rstrip("/") == index_url:
+            continue
 
-            # Build absolute URL
-            full_url = urljoin(url, href)
+        if _LINK_SKIP_RE.search(full_url):
+            continue
 
-            # Skip links that point back to the same listing index page
-            if full_url.rstrip("/") == url.rstrip("/"):
-                continue
+        # Walk up to find the containing card/element for financial data
+        card = a.find_parent(["article", "div", "li", "tr"])
+        card_html = str(card) if card else str(a)
+        card_text = card.get_text(" ", strip=True) if card else text
 
-            # Skip obviously non-listing links (social, contact, about, etc.)
-            skip_patterns = [
-                "facebook", "twitter", "linkedin", "instagram", "youtube",
-                "mailto:", "tel:", "#", "javascript:", "/contact", "/about",
-                "/privacy", "/terms", "/login", "/register", "/blog",
-                "/team", "/faq", "/careers",
-            ]
-            if any(p in full_url.lower() for p in skip_patterns):
-                continue
+        listings.append({
+            "title": text,
+            "href": full_url,
+            "text": card_text,
+            "html": card_html,
+            "source": name,
+        })
 
-            # Walk up to find the containing card/element for financial data
-            card = a.find_parent(["article", "div", "li", "tr"])
-            card_html = str(card) if card else str(a)
-            card_text = card.get_text(" ", strip=True) if card else text
+    return listings
 
-            listings.append({
-                "title": text,
-                "href": full_url,
-                "text": card_text,
-                "html": card_html,
-                "source": name,
-            })
 
+def fetch_page_http(name: str, url: str, timeout: float = 20) -> str | None:
+    """GET a page through HOST_CONTROLLER; the HTML, or None on any failure."""
+    try:
+        resp = HOST_CONTROLLER.get(url, HTTP_HEADERS, timeout=timeout)
     except requests.RequestException as e:
         print(f"  [{name}] Request failed: {e}")
+        return None
+    if resp.status_code != 200:
+        print(f"  [{name}] HTTP {resp.status_code}")
+        return None
+    return resp.text
+
+
+def parse_broker_page(broker: dict, url: str, html: str) -> tuple[list[dict], str | None]:
+    """Listings and next page URL from a broker results page's HTML.
+
+    Uses the source's `selectors` from sources.json when present and falls
+    back to the generic link scan when it has none or they match nothing.
+    """
+    name = broker["name"]
+    soup = BeautifulSoup(html, "html.parser")
+    next_url = find_next_page(soup, url)
+
+    listings = extract_cards(soup, broker, url)
+    if listings:
+        return listings, next_url
+    if get_extractor(broker) is not None:
+        print(f"  [{name}] Selectors matched no cards, falling back to link scan")
+    listings = extract_links_generic(soup, url, name)
+    if next_url:
+        # The generic scan picks up pagination links too
+        next_key = normalize_url(next_url)
+        listings = [l for l in listings if normalize_url(l["href"]) != next_key]
+    return listings, next_url
+
+
+def scrape_broker_page(
+    broker: dict,
+    url: str,
+    planner: FetchPlanner | None = None,
+    browser_timeout: float = 120,
+) -> tuple[list[dict], str | None]:
+    """Scrape one results page of a broker site, HTTP first.
+
+    Sources marked `requires_js` fall back to rendering the page with
+    Playwright when the plain HTML yields no listings; ``planner`` learns
+    which of their URL patterns need that and skips the HTTP attempt for
+    them. Returns (listings, next page URL or None).
+    """
+    name = broker["name"]
+    requires_js = broker.get("requires_js", False)
+
+    if not (requires_js and planner and planner.choose(name, url) == BROWSER):
+        html = fetch_page_http(name, url)
+        listings, next_url = parse_broker_page(broker, url, html) if html else ([], None)
+        if not requires_js:
+            return listings, next_url
+        if planner:
+            planner.record(name, url, bool(listings))
+        if listings:
+            return listings, next_url
+        print(f"  [{name}] No listings in plain HTML, rendering with Playwright")
 
+    html = scrape_detail_pages([url], 1, browser_timeout, broker).get(url)
+    if not html:
+        return [], None
+    return parse_broker_page(broker, url, html)
+
+
+def scrape_broker_site(broker: dict) -> list[dict]:
+    """Scrape the first results page of a broker site."""
+    listings, _next_url = scrape_broker_page(broker, broker["url"])
     return listings
 
 
-def scrape_all_brokers() -> list[dict]:
-    """Scrape all non-JS, non-login broker sites from sources.json."""
+def iter_broker_listings(
+    discovery_state: dict | None = None,
+    full_discovery: bool = False,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    scheduler: DeadlineScheduler | None = None,
+    tracker: YieldTracker | None = None,
+    planner: FetchPlanner | None = None,
+    shard: Shard | None = None,
+    checkpoint: Checkpoint | None = None,
+) -> Iterator[list[dict]]:
+    """Yield listings from all non-login broker sites, one page at a time.
+
+    Sources with a `discovery` block are read from their sitemap/feed instead
+    of their index page. ``discovery_state`` maps source name to the last
+    completed discovery time; it is updated in place and the caller saves it
+    once the run's deals are safely posted.
+
+    Index pages go through a CrawlFrontier ordered by source priority that
+    follows pagination up to ``max_depth`` pages, within each source's
+    `page_budget` (default BROKER_PAGE_BUDGET). Within a priority tier,
+    sources with the best historical yield go first, and crawling stops
+    when ``scheduler`` says the deadline leaves no time for another fetch.
+    Pages of `requires_js` sources are fetched HTTP-first with a browser
+    fallback (see scrape_broker_page). With ``shard``, only the sources
+    that shard owns are scraped. Pages journaled in ``checkpoint`` are
+    replayed from it instead of being fetched again.
+
+    Every listing carries ``detail_limit``: how many of its source's
+    listings may get detail pages (None for sitemap/feed discoveries,
+    which are already limited to new listings).
+    """
+    scheduler = scheduler or DeadlineScheduler(None)
     brokers = load_broker_sources()
-    all_listings = []
-    seen_titles = set()
+    if shard:
+        brokers = [b for b in brokers if shard.owns(b["name"])]
+    if discovery_state is None:
+        discovery_state = {}
+    run_started = datetime.now(timezone.utc)
 
     print(f"Scraping {len(brokers)} broker sites...")
 
+    frontier = CrawlFrontier(max_depth=max_depth, default_budget=BROKER_PAGE_BUDGET)
+    brokers_by_name = {}
+
     for broker in brokers:
         name = broker["name"]
-        requires_js = broker.get("requires_js", False)
-
-        if requires_js:
-            print(f"  [{name}] Skipping (requires JS)")
-            continue
-
-        print(f"  [{name}] Scraping {broker['url']}")
-        listings = scrape_broker_site(broker)
+        brokers_by_name[name] = broker
+        if broker.get("discovery"):
+            journaled = checkpoint.page(f"discovery:{name}") if checkpoint else None
+            if journaled is not None:
+                listings, complete = journaled["listings"], journaled["complete"]
+                print(f"  [{name}] {len(listings)} discovered listings from checkpoint")
+            else:
+                since = None if full_discovery else discovery_state.get(name)
+                print(f"  [{name}] Discovering via sitemap/feed (changed since {since.isoformat() if since else 'ever'})")
+                listings, complete = discover_source(broker, since, HTTP_HEADERS)
+                if checkpoint:
+                    checkpoint.record_page(f"discovery:{name}", listings, complete=complete)
+            if complete:
+                discovery_state[name] = run_started
+            print(f"  [{name}] Found {len(listings)} new listings")
+            for l in listings:
+                l["detail_limit"] = None
+            yield listings
+        else:
+            if "page_budget" in broker:
+                frontier.set_budget(name, broker["page_budget"])
+            score = tracker.rate(source_key(name)) if tracker else 0.0
+            frontier.push(broker["url"], name, broker.get("priority", "P1"), score=score)
+
+    while (item := frontier.pop()) is not None:
+        broker = brokers_by_name[item.source]
+        journaled = checkpoint.page(item.url) if checkpoint else None
+        if journaled is not None:
+            listings, next_url = journaled["listings"], journaled["next_url"]
+        else:
+            if not scheduler.can_start(BROKER_PAGE_SECONDS):
+                print(f"  Deadline reached, leaving {len(frontier) + 1} broker pages unvisited")
+                break
+            page_seconds = PLAYWRIGHT_PAGE_SECONDS if broker.get("requires_js") else BROKER_PAGE_SECONDS
+            if page_seconds > BROKER_PAGE_SECONDS and not scheduler.can_start(page_seconds):
+                print(f"  [{item.source}] Deadline too close for a rendered page, skipping {item.url}")
+                # Skipped, not fetched: the source's other pages may still fit
+                frontier.release(item)
+                continue
+            fetch_started = time.monotonic()
+            listings, next_url = scrape_broker_page(broker, item.url, planner, scheduler.subprocess_timeout(120))
+            if tracker:
+                tracker.record_fetch(source_key(item.source), time.monotonic() - fetch_started)
+            # Empty pages may be failed fetches; only pages with listings count as done
+            if checkpoint and listings:
+                checkpoint.record_page(item.url, listings, next_url)
+        print(f"  [{item.source}] Found {len(listings)} listings on page {item.depth + 1}"
+              + (" (from checkpoint)" if journaled is not None else ""))
+        if listings and next_url:
+            score = tracker.rate(source_key(item.source)) if tracker else 0.0
+            frontier.push(next_url, item.source, broker.get("priority", "P1"), item.depth + 1, score)
+        for l in listings:
+            l["detail_limit"] = BROKER_DETAIL_LIMIT
+        yield listings
+
+        if journaled is None:
+            # Be polite between pages
+            time.sleep(1)
+
+
+def iter_bizbuysell_listings(
+    urls: list[str],
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    scheduler: DeadlineScheduler | None = None,
+    tracker: YieldTracker | None = None,
+    planner: FetchPlanner | None = None,
+    card_html: bool = False,
+    checkpoint: Checkpoint | None = None,
+) -> Iterator[list[dict]]:
+    """Scrape BizBuySell search URLs, yielding each batch's new listings.
+
+    Page 1 of every search runs first; page N+1 of a search is only queued
+    when page N produced new listings. The whole crawl shares the
+    BizBuySell page budget from sources.json (default 20 pages). Searches
+    with the best historical yield run first, and batches shrink to what
+    fits before the ``scheduler`` deadline.
+
+    Each page is tried over plain HTTP with the source's card selectors
+    first; pages that come back empty (or whose URL pattern ``planner``
+    has learned needs JavaScript) go to Playwright. Pages journaled in
+    ``checkpoint`` are replayed from it.
+    """
+    scheduler = scheduler or DeadlineScheduler(None)
+    marketplace = find_marketplace("BizBuySell")
+    priority = marketplace.get("priority", "P0")
+    frontier = CrawlFrontier(max_depth=max_depth, default_budget=marketplace.get("page_budget", DEFAULT_PAGE_BUDGET))
+    for url in urls:
+        score = tracker.rate(query_key(url)) if tracker else 0.0
+        frontier.push(url, "BizBuySell", priority, score=score)
 
+    seen_titles = set()
+    while len(frontier):
+        # One depth per Playwright batch so page 2s only follow productive page 1s
+        limit = scheduler.affordable(PLAYWRIGHT_PAGE_SECONDS, frontier.budget_left("BizBuySell"))
+        batch = frontier.pop_batch(limit, same_depth=True)
+        if not batch:
+            if len(frontier):
+                print(f"Deadline reached, leaving {len(frontier)} BizBuySell pages unvisited")
+            break
+
+        fetch_started = time.monotonic()
+        listings = []
+        browser_urls = []
+        fetched = []
+        for item in batch:
+            journaled = checkpoint.page(item.url) if checkpoint else None
+            if journaled is not None:
+                listings.extend(journaled["listings"])
+                continue
+            fetched.append(item)
+            if planner is None or planner.choose("BizBuySell", item.url) == BROWSER:
+                browser_urls.append(item.url)
+                continue
+            html = fetch_page_http("BizBuySell", item.url)
+            cards = extract_cards(BeautifulSoup(html, "html.parser"), marketplace, item.url) if html else []
+            planner.record("BizBuySell", item.url, bool(cards))
+            if not cards:
+                browser_urls.append(item.url)
+            for card in cards:
+                card["page"] = item.url
+            listings.extend(cards)
+        if browser_urls:
+            print(f"Running Playwright scraper on {len(browser_urls)} page-{batch[0].depth + 1} URLs...")
+            listings.extend(scrape_with_playwright(browser_urls, scheduler.subprocess_timeout(600), marketplace, card_html))
+        if tracker and fetched:
+            per_page = (time.monotonic() - fetch_started) / len(fetched)
+            for item in fetched:
+                tracker.record_fetch(query_key(item.url), per_page)
+                tracker.record_fetch(source_key("BizBuySell"), per_page)
+        if checkpoint:
+            by_page: dict[str, list[dict]] = {}
+            for l in listings:
+                by_page.setdefault(l.get("page", ""), []).append(l)
+            for item in fetched:
+                if by_page.get(item.url):
+                    checkpoint.record_page(item.url, by_page[item.url])
+
+        new_listings = []
+        new_per_page: dict[str, int] = {}
         for l in listings:
-            if l["title"] not in seen_titles:
-                seen_titles.add(l["title"])
-                all_listings.append(l)
-
-        # Fetch detail pages for broker listings (HTTP, up to 10 per broker)
-        detail_count = 0
-        for l in listings[:10]:
-            detail_url = l.get("href", "")
-            if not detail_url or "bizbuysell.com" in detail_url:
+            if l["title"] in seen_titles:
                 continue
-            html = fetch_broker_detail_page(detail_url)
-            if html:
-                l["detail_html"] = html
-                detail_count += 1
-            time.sleep(0.5)
+            seen_titles.add(l["title"])
+            new_listings.append(l)
+            new_per_page[l.get("page", "")] = new_per_page.get(l.get("page", ""), 0) + 1
+        print(f"Scraped {len(new_listings)} new BizBuySell listings")
+        yield new_listings
 
-        print(f"  [{name}] Found {len(listings)} listings, fetched {detail_count} detail pages")
+        for item in batch:
+            if new_per_page.get(item.url):
+                score = tracker.rate(query_key(item.url)) if tracker else 0.0
+                frontier.push(bizbuysell_page_url(item.url, item.depth + 2), "BizBuySell", priority, item.depth + 1, score)
 
-        # Be polite between sites
-        time.sleep(1)
 
-    return all_listings
+# A dollar figure shortly after a financial label, matched in raw detail page HTML
+_FINANCIAL_MARKER_RE = re.compile(
+    r"(?:asking\s+price|cash\s+flow|gross\s+revenue|revenue)\b[^$]{0,200}\$\s?\d", re.IGNORECASE
+)
 
 
-def fetch_broker_detail_page(url: str) -> str | None:
-    """Fetch a single broker detail page via HTTP."""
-    try:
-        resp = requests.get(url, headers=HTTP_HEADERS, timeout=15)
-        if resp.status_code == 200:
-            return resp.text
-    except requests.RequestException:
-        pass
+def detail_has_financials(html: str) -> bool:
+    """Cheap check that a detail page fetched over HTTP carries financials.
+
+    Decides HTTP vs browser without parsing the page; the process stage
+    parses it once, later.
+    """
+    values, _ = extract_structured_data(html)
+    if any(values.get(f) for f in ("asking_price", "cash_flow_sde", "revenue")):
+        return True
+    return _FINANCIAL_MARKER_RE.search(html) is not None
+
+
+def bizbuysell_detail_url(raw: dict) -> str | None:
+    """Absolute URL of a BizBuySell listing's detail page, or None for other links."""
+    href = raw.get("href", "")
+    if not href:
+        return None
+    if href.startswith("/"):
+        href = f"https://www.bizbuysell.com{href}"
+    # Only visit detail pages (not search/category pages)
+    if "bizbuysell.com" in href and (
+        "/businesses-for-sale/" in href or "business-opportunity" in href
+    ):
+        # Skip search index pages (no trailing slug/ID)
+        if re.search(r"/\d+/?$", href) or re.search(r"/[a-z].*-[a-z].*-\d+", href):
+            return href
     return None
 
 
+class DetailFetcher:
+    """Pipeline stage that attaches detail-page HTML to the listings worth enriching.
+
+    Broker pages are fetched over HTTP through HOST_CONTROLLER. BizBuySell
+    pages are tried over HTTP too when ``planner`` allows it, and kept if
+    parse_detail_page finds financials in them; the rest are rendered with
+    Playwright (at most DETAIL_BROWSERS browsers at once). The
+    stage's input queue is ordered by card score, so when the per-source
+    limits or the deadline cut fetching short, the most promising listings
+    already have full financials. With a memory ``budget``, pages fetched
+    while the run is over it are spilled to disk until processing.
+    """
+
+    def __init__(
+        self,
+        scheduler: DeadlineScheduler,
+        tracker: YieldTracker | None = None,
+        planner: FetchPlanner | None = None,
+        budget: MemoryBudget | None = None,
+    ):
+        self.scheduler = scheduler
+        self.tracker = tracker
+        self.planner = planner
+        self.budget = budget
+        self.marketplace = find_marketplace("BizBuySell")
+        self.fetched = 0
+        self.skipped = 0
+        self._per_source: dict[str, int] = {}
+        self._bizbuysell = 0
+        self._lock = threading.Lock()
+        self._browsers = threading.Semaphore(DETAIL_BROWSERS)
+
+    def _attach(self, raw: dict, html: str) -> None:
+        raw["detail_html"] = html
+        if self.budget:
+            self.budget.spill(raw)
+
+    def _claim(self, raw: dict) -> str | None:
+        """Return the URL to fetch for a listing, reserving its place in the limits."""
+        if raw.get("known"):
+            return None
+        with self._lock:
+            url = bizbuysell_detail_url(raw)
+            if url:
+                if self._bizbuysell >= DETAIL_PAGE_LIMIT:
+                    return None
+                self._bizbuysell += 1
+                return url
+            href = raw.get("href", "")
+            if not href or "bizbuysell.com" in href or raw.get("detail_html") or raw.get("detail_html_file"):
+                return None
+            limit = raw.get("detail_limit", BROKER_DETAIL_LIMIT)
+            count = self._per_source.get(raw.get("source", ""), 0)
+            if limit is not None and count >= limit:
+                return None
+            self._per_source[raw.get("source", "")] = count + 1
+            return href
+
+    def _count(self, fetched: int, skipped: int = 0) -> None:
+        with self._lock:
+            self.fetched += fetched
+            self.skipped += skipped
+
+    def _bizbuysell_http(self, url: str) -> str | None:
+        """The page over plain HTTP if the planner allows it and it has financials."""
+        if self.planner is None or self.planner.choose("BizBuySell", url) == BROWSER:
+            return None
+        if not self.scheduler.can_start(BROKER_DETAIL_SECONDS):
+            return None
+        html = fetch_page_http("BizBuySell", url, timeout=15)
+        usable = bool(html) and detail_has_financials(html)
+        self.planner.record("BizBuySell", url, usable)
+        return html if usable else None
+
+    def __call__(self, batch: list[dict]) -> list[dict]:
+        bizbuysell: dict[str, list[dict]] = {}
+        for raw in batch:
+            url = self._claim(raw)
+            if not url:
+                continue
+            if "bizbuysell.com" in url:
+                bizbuysell.setdefault(url, []).append(raw)
+                continue
+            if not self.scheduler.can_start(BROKER_DETAIL_SECONDS):
+                self._count(0, 1)
+                continue
+            fetch_started = time.monotonic()
+            try:
+                resp = HOST_CONTROLLER.get(url, HTTP_HEADERS, timeout=15)
+            except requests.RequestException:
+                resp = None
+            if self.tracker:
+                self.tracker.record_fetch(source_key(raw.get("source") or "BizBuySell"), time.monotonic() - fetch_started)
+            if resp is not None and resp.status_code == 200:
+                self._attach(raw, resp.text)
+                self._count(1)
+
+        for url in list(bizbuysell):
+            fetch_started = time.monotonic()
+            html = self._bizbuysell_http(url)
+            if html is None:
+                continue
+            if self.tracker:
+                self.tracker.record_fetch(source_key("BizBuySell"), time.monotonic() - fetch_started)
+            for raw in bizbuysell.pop(url):
+                self._attach(raw, html)
+            self._count(1)
+
+        if bizbuysell:
+            with self._browsers:
+                count = self.scheduler.affordable(DETAIL_PAGE_SECONDS, len(bizbuysell))
+                urls = list(bizbuysell)[:count]
+                self._count(0, len(bizbuysell) - len(urls))
+                if urls:
+                    fetch_started = time.monotonic()
+                    detail_html_map = scrape_detail_pages(
+                        urls, len(urls), self.scheduler.subprocess_timeout(600), self.marketplace
+                    )
+                    if self.tracker:
+                        self.tracker.record_fetch(source_key("BizBuySell"), time.monotonic() - fetch_started)
+                    self._count(len(detail_html_map))
+                    while detail_html_map:
+                        url, html = detail_html_map.popitem()
+                        for raw in bizbuysell.get(url, []):
+                            self._attach(raw, html)
+        return batch
+
+
+def source_key(name: str) -> str:
+    """Yield-tracker key for a source."""
+    return f"source:{name}"
+
+
+def listing_key(raw: dict) -> str:
+    """Identity of a scraped listing within a run (title, or href without one)."""
+    return raw["title"] or raw["href"]
+
+
+def query_key(url: str) -> str:
+    """Yield-tracker key for a BizBuySell search, shared by all its result pages."""
+    return f"query:{bizbuysell_page_url(url, 1)}"
+
+
+def record_yield(raw_listings: list[dict], tracker: YieldTracker) -> None:
+    """Credit each qualifying listing to its source and, for searches, its query."""
+    for raw in raw_listings:
+        if not raw.get("qualified"):
+            continue
+        tracker.record_deals(source_key(raw.get("source") or "BizBuySell"))
+        if raw.get("page"):
+            tracker.record_deals(query_key(raw["page"]))
+
+
+def _money_from_text(text: str) -> float | None:
+    """Parse the first money amount in a selector field like 'Asking: $1.2M'."""
+    m = re.search(r"\$?\s*(\d[\d,]*(?:\.\d+)?\s*[MmKk]?)\b", text or "")
+    return parse_money(m.group(1)) if m else None
+
+
+def _deal_from_fields(raw: dict) -> Deal:
+    """Build a Deal from a card extracted with selectors, without parsing its HTML."""
+    fields = raw["fields"]
+    deal = Deal(
+        title=raw.get("title", ""),
+        location=fields.get("location", ""),
+        description=fields.get("description", "")[:500],
+        asking_price=_money_from_text(fields.get("price", "")),
+        revenue=_money_from_text(fields.get("revenue", "")),
+        cash_flow_sde=_money_from_text(fields.get("cash_flow", "")),
+        date_found=datetime.now().strftime("%Y-%m-%d"),
+    )
+    # Label/value pairs from in-browser extraction fill what the selectors missed
+    for label, value in raw.get("financials", ()):
+        attr = FINANCIAL_LABELS.get(label.lower())
+        if attr and getattr(deal, attr) is None:
+            setattr(deal, attr, _money_from_text(value))
+    match = re.search(r"/(\d+)/?$", raw.get("href", ""))
+    if match:
+        deal.listing_id = match.group(1)
+    return deal
+
+
 def _extract_financials_from_text(deal: Deal, text: str) -> None:
     """Try to pull financial figures from plain text when HTML parsing missed them."""
-    from deal_hunter_scraper import parse_money as _pm
-
     if not deal.asking_price:
         m = re.search(r"(?:asking|price|listed)[^$]*\$([\d,]+(?:\.\d+)?(?:[MmKk])?)", text, re.IGNORECASE)
         if m:
-            deal.asking_price = _pm(m.group(1))
+            deal.asking_price = parse_money(m.group(1))
         else:
             # Grab the first dollar amount as a rough asking price
             m = re.search(r"\$([\d,]{6,}(?:\.\d+)?)", text)
             if m:
-                deal.asking_price = _pm(m.group(1))
+                deal.asking_price = parse_money(m.group(1))
 
     if not deal.revenue:
         m = re.search(r"(?:revenue|gross)[^$]*\$([\d,]+(?:\.\d+)?(?:[MmKk])?)", text, re.IGNORECASE)
         if m:
-            deal.revenue = _pm(m.group(1))
+            deal.revenue = parse_money(m.group(1))
 
     if not deal.ebitda:
         m = re.search(r"EBITDA[^$]*\$([\d,]+(?:\.\d+)?(?:[MmKk])?)", text, re.IGNORECASE)
         if m:
-            deal.ebitda = _pm(m.group(1))
+            deal.ebitda = parse_money(m.group(1))
 
     if not deal.cash_flow_sde:
         m = re.search(r"(?:cash\s*flow|SDE|seller.?s?\s+discretionary)[^$]*\$([\d,]+(?:\.\d+)?(?:[MmKk])?)", text, re.IGNORECASE)
         if m:
-            deal.cash_flow_sde = _pm(m.group(1))
+            deal.cash_flow_sde = parse_money(m.group(1))
 
     if not deal.year_established:
         m = re.search(r"(?:Established|Founded|Year\s+Est)[^\d]*((?:19|20)\d{2})", text, re.IGNORECASE)
@@ -470,53 +1194,223 @@ def _extract_financials_from_text(deal: Deal, text: str) -> None:
             deal.employees = int(m.group(1))
 
 
-def process_raw_listings(raw_listings: list[dict]) -> list[dict]:
-    """Process raw scraper output into Deal objects ready for the API."""
+def card_to_deal(raw: dict) -> Deal:
+    """Build a Deal from the listing card alone (no detail page)."""
+    if "fields" in raw:
+        deal = _deal_from_fields(raw)
+    else:
+        deal = parse_listing_card(raw.get("html", ""), "")
+    if not deal:
+        deal = Deal()
+
+    # Fall back to raw scraped data when parse_listing_card couldn't
+    # extract fields (common for broker sites whose HTML doesn't match
+    # BizBuySell selectors).
+    if not deal.title and raw.get("title"):
+        deal.title = raw["title"]
+    if not deal.description and raw.get("text"):
+        deal.description = raw["text"][:500]
+
+    # Override with direct data if available
+    if raw.get("source"):
+        deal.source = raw["source"]
+    if raw.get("href"):
+        href = raw["href"]
+        if href.startswith("http"):
+            deal.url = href
+        elif href.startswith("/"):
+            deal.url = f"https://www.bizbuysell.com{href}"
+        else:
+            deal.url = href
+
+    # Try to extract financials from the raw card text when the HTML
+    # parser missed them (broker sites use varied formats).
+    if raw.get("text"):
+        _extract_financials_from_text(deal, raw["text"])
+
+    return deal
+
+
+class PrefilterStats:
+    """Counts of listings rejected from card data, for the run report."""
+
+    def __init__(self):
+        self.checked = 0
+        self.rejected: dict[str, int] = {}
+        self.fetches_avoided = 0
+        self.known = 0
+
+    def report(self) -> str:
+        total = sum(self.rejected.values())
+        reasons = ", ".join(f"{reason}: {n}" for reason, n in sorted(self.rejected.items()))
+        line = f"Pre-filter: rejected {total} of {self.checked} listings from card data"
+        if reasons:
+            line += f" ({reasons})"
+        if self.known:
+            line += f"; {self.known} already stored, refreshed from their cards"
+        return f"{line}; {self.fetches_avoided} detail fetches avoided"
+
+
+class StructuredDataStats:
+    """Per-source detail pages served by the JSON-LD / __NEXT_DATA__ fast path."""
+
+    def __init__(self):
+        self.sources: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, source: str, filled: int, complete: bool) -> None:
+        with self._lock:
+            counts = self.sources.setdefault(source, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += bool(filled)
+            counts[2] += complete
+
+    def report(self) -> str:
+        if not self.sources:
+            return "Structured data: no detail pages parsed"
+        lines = ["Structured data fast path (pages with data / DOM parse skipped):"]
+        for source, (pages, hits, complete) in sorted(self.sources.items()):
+            lines.append(f"  {source:<30} {hits:>4}/{pages:<4} ({hits / pages:4.0%})  {complete:>4} skipped DOM")
+        return "\n".join(lines)
+
+
+def estimate_card_score(
+    deal: Deal,
+    criteria: CompiledCriteria,
+    prepared_profiles: list | None = None,
+) -> float:
+    """Preliminary score from card data alone (industry, traits, estimated multiple).
+
+    Runs the normal process_deal scoring on a copy of the card deal; with
+    profiles, the best score among the profiles the card passes counts.
+    """
+    deal = replace(deal)
+    if prepared_profiles:
+        vector = process_deal_profiles(deal, prepared_profiles, criteria)
+        return max([deal.score] + [p.score for p in vector if p.passes])
+    return process_deal(deal, criteria).score
+
+
+# Card fields that update a known deal; the rest keep their detail-page values
+CARD_REFRESH_FIELDS = ("title", "asking_price", "revenue", "cash_flow_sde", "ebitda", "location")
+
+
+def refresh_known_deal(stored: dict, card: Deal) -> Deal:
+    """A stored deal updated with what its listing card shows this run.
+
+    The description, traits and other detail-page fields stay as stored:
+    the card's shorter versions would overwrite them on upload.
+    """
+    deal = Deal(**stored)
+    for name in CARD_REFRESH_FIELDS:
+        value = getattr(card, name)
+        if value not in (None, ""):
+            setattr(deal, name, value)
+    return deal
+
+
+def prefilter_listings(
+    raw_listings: list[dict],
+    criteria: CompiledCriteria,
+    prepared_profiles: list | None = None,
+    reject_avoid_traits: bool = False,
+    stats: PrefilterStats | None = None,
+    known: KnownUrls | None = None,
+    store: DealStore | None = None,
+) -> list[dict]:
+    """Drop listings whose card data already rules them out.
+
+    A listing survives if it could still pass the global criteria or any
+    profile. Survivors keep their parsed card as ``card_deal`` so
+    process_raw_listings does not parse the card twice, and their
+    preliminary ``card_score`` for ordering detail fetches.
+
+    A listing whose URL is in ``known`` (already stored by the web app) and
+    in the local ``store`` skips its detail fetch: its ``card_deal`` is the
+    stored deal refreshed from the card, and it is marked ``known`` so it
+    still reaches the store, the upload delta and the archive.
+    """
+    kept = []
+    for raw in raw_listings:
+        if "card_deal" in raw:
+            kept.append(raw)
+            continue
+        deal = card_to_deal(raw)
+        if stats:
+            stats.checked += 1
+        stored = None
+        if known is not None and store is not None and deal.url in known:
+            stored = store.get(deal_key(asdict(deal)))
+            if stored:
+                deal = refresh_known_deal(stored, deal)
+        reason = prefilter_reason(deal, criteria, reject_avoid_traits)
+        if reason and prepared_profiles:
+            if any(prefilter_reason(deal, p, reject_avoid_traits) is None for p in prepared_profiles):
+                reason = None
+        if reason:
+            if stats:
+                stats.rejected[reason] = stats.rejected.get(reason, 0) + 1
+                if raw.get("href"):
+                    stats.fetches_avoided += 1
+            continue
+        if stored:
+            raw["known"] = True
+            if stats:
+                stats.known += 1
+                if raw.get("href"):
+                    stats.fetches_avoided += 1
+        raw["card_deal"] = asdict(deal)
+        raw["card_score"] = estimate_card_score(deal, criteria, prepared_profiles)
+        kept.append(raw)
+    return kept
+
+
+def process_raw_listings(
+    raw_listings: list[dict],
+    criteria: CompiledCriteria = DEFAULT_CRITERIA,
+    prepared_profiles: list[CompiledCriteria] | None = None,
+    structured_stats: StructuredDataStats | None = None,
+) -> list[dict]:
+    """Process raw scraper output into Deal objects ready for the API.
+
+    With ``prepared_profiles`` (prepare_profiles, compiled once per run),
+    every deal is also scored against each criteria profile; a deal is kept
+    if it passes the global filters or any profile, and carries a
+    ``profile_scores`` map of {profile_id: score} for the profiles it
+    passes.
+    """
     deals = []
+    prepared = prepared_profiles or None
 
     for raw in raw_listings:
         try:
-            deal = parse_listing_card(raw.get("html", ""), "")
-            if not deal:
-                deal = Deal()
-
-            # Fall back to raw scraped data when parse_listing_card couldn't
-            # extract fields (common for broker sites whose HTML doesn't match
-            # BizBuySell selectors).
-            if not deal.title and raw.get("title"):
-                deal.title = raw["title"]
-            if not deal.description and raw.get("text"):
-                deal.description = raw["text"][:500]
-
-            if not deal.title:
-                continue
+            if "card_deal" in raw:
+                deal = Deal(**raw["card_deal"])
+            else:
+                deal = card_to_deal(raw)
 
-            # Override with direct data if available
-            if raw.get("source"):
-                deal.source = raw["source"]
-            if raw.get("href"):
-                href = raw["href"]
-                if href.startswith("http"):
-                    deal.url = href
-                elif href.startswith("/"):
-                    deal.url = f"https://www.bizbuysell.com{href}"
-                else:
-                    deal.url = href
-
-            # Try to extract financials from the raw card text when the HTML
-            # parser missed them (broker sites use varied formats).
-            if raw.get("text"):
-                _extract_financials_from_text(deal, raw["text"])
+            # Sitemap/feed discoveries may only get a title from their detail page
+            if not deal.title and not raw.get("detail_html"):
+                continue
 
             # Enrich from the detail page if we scraped it
-            if raw.get("detail_html"):
-                deal = parse_detail_page(raw["detail_html"], deal)
+            # Parsed once, so release the page straight away
+            detail_html = raw.pop("detail_html", None)
+            if detail_html:
+                deal = parse_detail_page(detail_html, deal, structured_stats)
+                if not deal.title:
+                    continue
 
             deal.date_found = deal.date_found or datetime.now().strftime("%Y-%m-%d")
-            deal = process_deal(deal)
-
-            if not passes_financial_filters(deal):
-                continue
+            if prepared:
+                vector = process_deal_profiles(deal, prepared, criteria)
+                matching = {p.profile_id: p.score for p in vector if p.passes}
+                if not matching and not passes_financial_filters(deal, criteria):
+                    continue
+            else:
+                deal = process_deal(deal, criteria)
+                if not passes_financial_filters(deal, criteria):
+                    continue
 
             deal_dict = asdict(deal)
             # Rename fields to match API expectations
@@ -524,7 +1418,10 @@ def process_raw_listings(raw_listings: list[dict]) -> list[dict]:
             deal_dict["cash_flow_sde"] = deal_dict.pop("cash_flow_sde", deal.cash_flow_sde)
             deal_dict["year_established"] = deal_dict.pop("year_established", deal.year_established)
             deal_dict["raw_html"] = raw.get("html", "")[:5000]
+            if prepared:
+                deal_dict["profile_scores"] = matching
 
+            raw["qualified"] = True
             deals.append(deal_dict)
         except Exception as e:
             print(f"Error processing listing: {e}", file=sys.stderr)
@@ -552,12 +1449,142 @@ def post_deals_to_api(deals: list[dict], app_url: str, api_secret: str, send_dig
         return {"error": str(e)}
 
 
+class Uploader:
+    """Pipeline stage that records deals in the local store and posts the new or changed ones.
+
+    Chunks are posted as they arrive, except that the latest one is held
+    back until finish() so only the run's final request carries
+    ``send_digest``. A chunk's deals are marked uploaded (locally and in
+    ``known``) only once the API reports them stored; deals it filters out
+    (no revenue yet) are posted again until their detail page yields one.
+    """
+
+    def __init__(
+        self,
+        app_url: str,
+        api_secret: str,
+        send_digest: bool = False,
+        dry_run: bool = False,
+        full_upload: bool = False,
+        known: KnownUrls | None = None,
+    ):
+        self.app_url = app_url
+        self.api_secret = api_secret
+        self.send_digest = send_digest
+        self.dry_run = dry_run
+        self.full_upload = full_upload
+        self.known = known
+        self.new = 0
+        self.to_upload: list[dict] = []
+        self.posted = 0
+        self.failed = False
+        self._held: list[dict] | None = None
+
+    def __call__(self, deals: list[dict]) -> list[dict]:
+        with DealStore(DEAL_STORE_FILE) as store:
+            changed, new = store.upsert(deals)
+        self.new += new
+        upload = deals if self.full_upload else changed
+        self.to_upload.extend(upload)
+        if upload and not self.dry_run:
+            if self._held:
+                self._post(self._held, send_digest=False)
+            self._held = upload
+        return deals
+
+    def finish(self) -> None:
+        if self._held:
+            self._post(self._held, self.send_digest)
+            self._held = None
+        if self.known is not None and self.posted:
+            self.known.save()
+
+    def _post(self, deals: list[dict], send_digest: bool) -> None:
+        print(f"Posting {len(deals)} deals to API...")
+        result = post_deals_to_api(deals, self.app_url, self.api_secret, send_digest)
+        print(f"API response: {json.dumps(result)}")
+        if "error" in result:
+            self.failed = True
+            return
+        stored = result.get("stored")
+        if stored is not None:
+            # Deals without a URL can't be matched up; the API keys them by title
+            stored = set(stored)
+            deals = [d for d in deals if not d.get("url") or d["url"] in stored]
+        with DealStore(DEAL_STORE_FILE) as store:
+            store.mark_uploaded(deals)
+        if self.known is not None and stored is not None:
+            self.known.add(d["url"] for d in deals if d.get("url"))
+        self.posted += len(deals)
+
+
+def write_shard(shard: Shard, shard_dir: str, deals: list[dict], discovery_state: dict, criteria_version: str) -> str:
+    """Write a shard's deals for the merge step and record them in the shard's own store.
+
+    Shards never upload, but the next run of the same shard needs the
+    stored deals to refresh known listings from their cards instead of
+    fetching their detail pages again (prefilter_listings).
+    """
+    with DealStore(DEAL_STORE_FILE) as store:
+        store.upsert(deals)
+    owned = {name: dt for name, dt in discovery_state.items() if shard.owns(name)}
+    return write_shard_output(shard_dir, shard, deals, owned, criteria_version)
+
+
+def archive_deals(deals: list[dict], criteria_version: str, profiler) -> None:
+    """Archive a run's deals alongside the upload."""
+    with profiler.stage("archive"):
+        try:
+            path = write_archive(deals, ARCHIVE_DIR, criteria_version)
+            print(f"Archived {len(deals)} deals to {path}")
+        except ImportError:
+            print("pyarrow not installed, skipping deal archive", file=sys.stderr)
+        except OSError as e:
+            print(f"Failed to write deal archive: {e}", file=sys.stderr)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Deal Hunter Scraper")
     parser.add_argument("--send-digest", action="store_true", help="Send weekly digest email after scraping")
     parser.add_argument("--dry-run", action="store_true", help="Scrape but don't post to API")
+    parser.add_argument("--full-discovery", action="store_true", help="Ignore sitemap/feed lastmod state and rediscover every listing")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH, help=f"Results pages to follow per search/broker (default {DEFAULT_MAX_DEPTH})")
+    parser.add_argument("--deadline", type=float, help="Seconds this run may take; fetching stops early so processing and upload still finish")
+    parser.add_argument("--profiles", help="JSON file with a list of per-user criteria profiles to score against")
+    parser.add_argument("--digest-dir", help="Write each profile's digest HTML to this directory (with --profiles)")
+    parser.add_argument("--prefilter-avoid-traits", action="store_true", help="Also drop listings whose card mentions an avoid trait before fetching detail pages")
+    parser.add_argument("--refresh-known", action="store_true", help="Re-scrape and re-upload listings the web app already has")
+    parser.add_argument("--full-upload", action="store_true", help="Post every processed deal, not just those new or changed since the last upload")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last run's checkpoint, skipping pages and deals it already finished")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N", help="Scrape only shard I of N (sources and searches split by stable hash) and write its deals to --shard-dir instead of uploading")
+    parser.add_argument("--merge", action="store_true", help="Combine the shard files in --shard-dir, drop duplicates and upload once")
+    parser.add_argument("--shard-dir", default=SHARD_DIR, help="Where shard files are written and merged from (default: state dir)")
+    parser.add_argument("--max-memory", type=parse_size, metavar="SIZE", help="Trace memory and spill fetched detail pages to disk while Python allocations exceed SIZE (e.g. 512M); reports per-stage usage at the peak")
+    parser.add_argument("--scoring-model", nargs="?", const="", metavar="FILE", help="Score with weights trained by train_scoring.py (default file: state dir)")
+    parser.add_argument("--card-html", action="store_true", help="Also ship each card's outerHTML back from the browser (debugging)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="DIR", help="Profile each pipeline stage; writes .prof and .collapsed files to DIR (default: state dir)")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_TOP_N, help=f"Hot functions listed in the profile summary (default {DEFAULT_TOP_N})")
     args = parser.parse_args()
+    if args.shard and args.merge:
+        parser.error("--shard and --merge are separate steps")
+    entry = run_merge if args.merge else run
 
+    if args.profile is None:
+        entry(args, NULL_PROFILER)
+        return
+
+    out_dir = args.profile or os.path.join(STATE_DIR, "profiles", datetime.now().strftime("%Y%m%d-%H%M%S"))
+    profiler = StageProfiler(out_dir)
+    try:
+        entry(args, profiler)
+    finally:
+        print()
+        print("--- Profile ---")
+        print(profiler.summary(args.profile_top))
+
+
+def run(args: argparse.Namespace, profiler) -> None:
+    """Load criteria and state, run the scrape pipeline, then report and archive."""
     app_url = os.environ.get("APP_URL", "http://localhost:3000")
     api_secret = os.environ.get("SCRAPE_API_SECRET", "")
 
@@ -567,97 +1594,277 @@ def main():
 
     # --- Fetch criteria from the web app ---
     print("--- Fetching Deal Criteria ---")
-    api_criteria = fetch_criteria_from_api(app_url)
-    if api_criteria:
-        apply_api_criteria(api_criteria)
-        print(f"Loaded criteria from API (updated {api_criteria.get('updated_at', 'unknown')})")
-        print(f"  EV range: ${CRITERIA['ev_min']:,.0f} - ${CRITERIA['ev_max']:,.0f}")
-        print(f"  EBITDA min: ${CRITERIA['ebitda_min']:,.0f}")
-        print(f"  Max multiple: {CRITERIA['max_multiple']}x")
-        print(f"  Target industries: {len(CRITERIA['target_industries'])}")
-        print(f"  Search keywords: {len(CRITERIA['search_keywords'])}")
-    else:
+    with profiler.stage("criteria"):
+        criteria, origin = load_criteria(app_url)
+    if origin == "default":
         print("Using default criteria (API not available)")
+    else:
+        print(f"Loaded criteria from {origin} (version {criteria.version})")
+        print(f"  EV range: ${criteria.ev_min:,.0f} - ${criteria.ev_max:,.0f}")
+        print(f"  EBITDA min: ${criteria.ebitda_min:,.0f}")
+        print(f"  Max multiple: {criteria.max_multiple}x")
+        print(f"  Target industries: {len(criteria.target_industries)}")
+        print(f"  Search keywords: {len(criteria.search_keywords)}")
+        print(f"  Geography: {criteria.geo.describe()}")
+    if criteria.geo.ignored:
+        print(f"Unrecognized geography ignored: {', '.join(criteria.geo.ignored)}", file=sys.stderr)
+    profiles = load_profiles(args.profiles) if args.profiles else None
+    if profiles:
+        print(f"Scoring against {len(profiles)} criteria profiles")
+    elif args.digest_dir:
+        print("--digest-dir needs --profiles; no digests will be written", file=sys.stderr)
+    scoring_models = None
+    if args.scoring_model is not None:
+        scoring_models = load_models(args.scoring_model or SCORING_MODEL_FILE)
+        criteria = attach_scoring_model(criteria, model_for(scoring_models))
+        if scoring_models:
+            per_user = len([user_id for user_id in scoring_models if user_id])
+            print(f"Scoring with trained model (criteria version {criteria.version}, {per_user} per-user models)")
     print()
 
-    all_raw_listings = []
+    tracker = YieldTracker(YIELD_STATS_FILE)
+    scheduler = DeadlineScheduler(args.deadline, reserve_from_history(tracker))
+    planner = FetchPlanner(FETCH_MODES_FILE)
+    if scheduler.enabled:
+        print(f"Deadline: {args.deadline:.0f}s ({scheduler.reserve:.0f}s reserved for processing and upload)")
+        print()
 
-    # --- Scrape broker sites (HTTP, no JS needed) ---
-    print("--- Broker Sites (HTTP) ---")
-    broker_listings = scrape_all_brokers()
-    print(f"Total broker listings: {len(broker_listings)}")
-    all_raw_listings.extend(broker_listings)
-    print()
+    # Listings whose card data already fails every profile are dropped
+    # before their detail pages are fetched.
+    prepared_profiles = prepare_profiles(profiles, scoring_models) if profiles else None
+    prefilter_stats = PrefilterStats()
+    structured_stats = StructuredDataStats()
+
+    # Industry/trait matching of listing text is memoized across runs
+    analysis_cache = AnalysisCache(ANALYSIS_CACHE_FILE)
+    set_analysis_cache(analysis_cache)
+
+    # Listings the web app already stores skip enrichment and upload
+    known = None
+    if not args.refresh_known:
+        known = KnownUrls(KNOWN_URLS_FILE)
+        synced = known.sync(app_url, api_secret)
+        if synced is None:
+            with DealStore(DEAL_STORE_FILE) as store:
+                known.add(store.uploaded_urls())
+            print(f"Known URLs: {len(known)} from local uploads (server sync unavailable)")
+        else:
+            known.save()
+            print(f"Known URLs: {len(known)} (version {known.version}, {synced} new since last sync)")
+        print()
 
-    # --- Scrape BizBuySell (Playwright) ---
-    print("--- BizBuySell (Playwright) ---")
-    urls = build_search_urls_with_filters()
-    print(f"Generated {len(urls)} search URLs")
-    print("Running Playwright scraper...")
-    bbs_listings = scrape_with_playwright(urls)
-    print(f"Scraped {len(bbs_listings)} BizBuySell listings")
-    all_raw_listings.extend(bbs_listings)
+    # Finished pages and processed deals are journaled so --resume can
+    # pick up after a crash or timeout
+    run_key = f"{criteria.version}|{args.shard or ''}"
+    checkpoint_file = CHECKPOINT_FILE
+    if args.shard:
+        # Shards running side by side share the state dir
+        checkpoint_file = os.path.join(STATE_DIR, f"checkpoint-{args.shard.filename[:-len('.json')]}.jsonl")
+    checkpoint = Checkpoint(checkpoint_file, run_key, resume=args.resume)
+    print(checkpoint.report())
     print()
 
-    # --- Scrape detail pages for full financials ---
-    # Collect listing URLs that point to individual deal pages
-    detail_urls = []
-    for raw in all_raw_listings:
-        href = raw.get("href", "")
-        if not href:
-            continue
-        if href.startswith("/"):
-            href = f"https://www.bizbuysell.com{href}"
-        # Only visit detail pages (not search/category pages)
-        if "bizbuysell.com" in href and (
-            "/businesses-for-sale/" in href or "business-opportunity" in href
-        ):
-            # Skip search index pages (no trailing slug/ID)
-            if re.search(r"/\d+/?$", href) or re.search(r"/[a-z].*-[a-z].*-\d+", href):
-                detail_urls.append(href)
-
-    # Deduplicate
-    detail_urls = list(dict.fromkeys(detail_urls))
-
-    if detail_urls:
-        print(f"--- Detail Pages ({len(detail_urls)} listings) ---")
-        print("Scraping individual listing pages for full financials...")
-        detail_html_map = scrape_detail_pages(detail_urls)
-        print(f"Successfully scraped {len(detail_html_map)} detail pages")
-        print()
+    seen_keys = set(checkpoint.processed)
+
+    def prefilter(pages: list[list[dict]]) -> Iterator[dict]:
+        for listings in pages:
+            fresh = []
+            for l in listings:
+                key = listing_key(l)
+                if key not in seen_keys:
+                    seen_keys.add(key)
+                    fresh.append(l)
+            with DealStore(DEAL_STORE_FILE) as store:
+                kept = prefilter_listings(
+                    fresh, criteria, prepared_profiles, args.prefilter_avoid_traits, prefilter_stats, known, store
+                )
+            yield from kept
+
+    # Only what record_yield needs is kept of each processed listing
+    all_raw_listings = []
 
-        # Attach detail HTML to raw listings for enrichment during processing
-        for raw in all_raw_listings:
-            href = raw.get("href", "")
-            if href.startswith("/"):
-                href = f"https://www.bizbuysell.com{href}"
-            if href in detail_html_map:
-                raw["detail_html"] = detail_html_map[href]
+    def process(batch: list[dict]) -> list[dict]:
+        for raw in batch:
+            MemoryBudget.unspill(raw)
+        deals = process_raw_listings(batch, criteria, prepared_profiles, structured_stats)
+        checkpoint.record_deals([listing_key(raw) for raw in batch], deals)
+        for raw in batch:
+            all_raw_listings.append({k: raw.get(k) for k in ("source", "page", "qualified")})
+        return deals
+
+    discovery_state = load_discovery_state(DISCOVERY_STATE_FILE)
+    # With a deadline every keyword is a candidate; yield ranking and the
+    # remaining time decide which searches actually run.
+    urls = build_search_urls_with_filters(criteria, None if scheduler.enabled else 15)
+    if args.shard:
+        urls = [u for u in urls if args.shard.owns(query_key(u))]
+        print(f"Shard {args.shard}: {len(urls)} BizBuySell search URLs")
     else:
-        print("No detail page URLs found to enrich.")
-        print()
+        print(f"Generated {len(urls)} BizBuySell search URLs")
+
+    budget = None
+    if args.max_memory:
+        budget = MemoryBudget(args.max_memory, os.path.join(STATE_DIR, "spill"))
+    details = DetailFetcher(scheduler, tracker, planner, budget)
+    uploader = Uploader(app_url, api_secret, args.send_digest, args.dry_run, args.full_upload, known)
+    detail_stage = Stage("detail", details, workers=DETAIL_WORKERS, queue_size=PIPELINE_QUEUE_SIZE,
+                         batch_size=DETAIL_BATCH, priority=lambda raw: -raw.get("card_score", 0.0))
+    stages = [
+        Stage("prefilter", prefilter, queue_size=PIPELINE_QUEUE_SIZE),
+        detail_stage,
+        Stage("process", process, workers=PROCESS_WORKERS, queue_size=PIPELINE_QUEUE_SIZE,
+              batch_size=PROCESS_BATCH),
+    ]
+    # Shards hand their deals to the merge step instead of uploading
+    if not args.shard:
+        stages.append(Stage("upload", uploader, queue_size=PIPELINE_QUEUE_SIZE, batch_size=UPLOAD_BATCH,
+                            batch_wait=UPLOAD_BATCH_WAIT))
+    pipeline = Pipeline(
+        sources=[
+            lambda: iter_broker_listings(
+                discovery_state, args.full_discovery, args.max_depth, scheduler, tracker, planner, args.shard,
+                checkpoint,
+            ),
+            lambda: iter_bizbuysell_listings(
+                urls, args.max_depth, scheduler, tracker, planner, args.card_html, checkpoint
+            ),
+        ],
+        stages=stages,
+        profiler=profiler,
+    )
+
+    # discover → prefilter → fetch detail → parse/score/filter → upload,
+    # all running at once
+    print("--- Scrape Pipeline ---")
+    if budget:
+        budget.watch(pipeline)
+        budget.start()
+    # Pipeline threads are profiled per stage (sources, prefilter, detail, ...)
+    with profiler.stage("pipeline", profile_threads=False):
+        # Deals processed before the checkpoint go straight to upload
+        if not args.shard:
+            for start in range(0, len(checkpoint.deals), UPLOAD_BATCH):
+                uploader(checkpoint.deals[start:start + UPLOAD_BATCH])
+        deals = checkpoint.deals + pipeline.run()
+        uploader.finish()
+    checkpoint.close()
+    if budget:
+        budget.stop()
+    finish_started = detail_stage.finished_at or time.monotonic()
+    print()
+    print(pipeline.report())
+    print(prefilter_stats.report())
+    print(f"Detail pages: {details.fetched} fetched, {details.skipped} skipped for the deadline")
+    print(planner.report())
+    print(BLOCK_STATS.report())
+    print(structured_stats.report())
+    if budget:
+        print(budget.report())
+    host_report = HOST_CONTROLLER.report()
+    if host_report:
+        print("Throttled or failing hosts:")
+        print("\n".join(host_report))
+    print(f"Processed {len(deals)} deals from {len(all_raw_listings)} listings (after filtering)")
+    analysis_cache.flush()
+    print(analysis_cache.report())
+    if not args.shard:
+        print(f"Local store: {uploader.new} new deals, {len(uploader.to_upload)} of {len(deals)} to upload")
+    record_yield(all_raw_listings, tracker)
+    tracker.save()
+    planner.save()
+
+    if args.shard:
+        path = write_shard(args.shard, args.shard_dir, deals, discovery_state, criteria.version)
+        checkpoint.clear()
+        print(f"Wrote {len(deals)} deals for shard {args.shard} to {path}")
+        print("\nDone! Run with --merge once every shard has finished.")
+        return
 
-    # Process all listings
-    print(f"Processing {len(all_raw_listings)} total raw listings...")
-    deals = process_raw_listings(all_raw_listings)
-    print(f"Processed {len(deals)} deals (after filtering)")
+    if args.digest_dir and prepared_profiles:
+        paths = write_profile_digests(deals, profiles, prepared_profiles, args.digest_dir)
+        print(f"Wrote {len(paths)} profile digests to {args.digest_dir}")
 
     if args.dry_run:
         print("\n[DRY RUN] Would post these deals:")
-        for d in deals[:5]:
+        for d in uploader.to_upload[:5]:
             print(f"  - {d.get('title', 'Unknown')} | Score: {d.get('score', 0)} | {d.get('industry', 'Unknown')}")
-        if len(deals) > 5:
-            print(f"  ... and {len(deals) - 5} more")
+        if len(uploader.to_upload) > 5:
+            print(f"  ... and {len(uploader.to_upload) - 5} more")
         return
 
-    if not deals:
-        print("No deals to post. Exiting.")
+    if deals:
+        archive_deals(deals, criteria.version, profiler)
+
+    if not uploader.to_upload:
+        print("No new or changed deals to post.")
+    else:
+        print(f"Posted {uploader.posted} of {len(uploader.to_upload)} deals")
+
+    # Only advance sitemap/feed cursors (and drop the checkpoint) once the
+    # deals they found are stored
+    if not uploader.failed:
+        save_discovery_state(DISCOVERY_STATE_FILE, discovery_state)
+        checkpoint.clear()
+
+    tracker.finish_seconds = time.monotonic() - finish_started
+    tracker.save()
+    if scheduler.enabled:
+        print(f"Finished in {scheduler.elapsed():.0f}s of {args.deadline:.0f}s deadline")
+
+    print("\nDone!")
+
+
+def run_merge(args: argparse.Namespace, profiler) -> None:
+    """Combine shard files, drop duplicate deals, then upload and archive once."""
+    app_url = os.environ.get("APP_URL", "http://localhost:3000")
+    api_secret = os.environ.get("SCRAPE_API_SECRET", "")
+
+    print(f"Deal Hunter Scraper (merge) — {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Target: {app_url}")
+    print()
+
+    outputs, paths = read_shard_outputs(args.shard_dir)
+    if not outputs:
+        print(f"No shard files in {args.shard_dir}", file=sys.stderr)
+        sys.exit(1)
+    with profiler.stage("merge"):
+        deals = merge_deals([output["deals"] for output in outputs])
+    total = sum(len(output["deals"]) for output in outputs)
+    print(f"Merged {len(outputs)} shards: {total} deals, {len(deals)} after dropping duplicates")
+
+    known = None
+    if not args.refresh_known:
+        known = KnownUrls(KNOWN_URLS_FILE)
+        known.sync(app_url, api_secret)
+
+    uploader = Uploader(app_url, api_secret, args.send_digest, args.dry_run, args.full_upload, known)
+    with profiler.stage("upload"):
+        for start in range(0, len(deals), UPLOAD_BATCH):
+            uploader(deals[start:start + UPLOAD_BATCH])
+        uploader.finish()
+    print(f"Local store: {uploader.new} new deals, {len(uploader.to_upload)} of {len(deals)} to upload")
+
+    if args.dry_run:
+        print(f"\n[DRY RUN] Would post {len(uploader.to_upload)} deals")
         return
 
-    # Post to API
-    print(f"Posting {len(deals)} deals to API...")
-    result = post_deals_to_api(deals, app_url, api_secret, args.send_digest)
-    print(f"API response: {json.dumps(result, indent=2)}")
+    if deals:
+        archive_deals(deals, outputs[0]["criteria_version"], profiler)
+
+    if not uploader.to_upload:
+        print("No new or changed deals to post.")
+    else:
+        print(f"Posted {uploader.posted} of {len(uploader.to_upload)} deals")
+
+    # Shard cursors only advance once the deals they found are stored
+    if not uploader.failed:
+        discovery_state = load_discovery_state(DISCOVERY_STATE_FILE)
+        for output in outputs:
+            for name, value in output.get("discovery", {}).items():
+                discovery_state[name] = datetime.fromisoformat(value)
+        save_discovery_state(DISCOVERY_STATE_FILE, discovery_state)
+        for path in paths:
+            os.remove(path)
 
     print("\nDone!")
 
@@ -0,0 +1,114 @@
+"""
+Deal Hunter — Yield tracking and deadline-aware scheduling
+Remembers, across runs, how many qualifying deals each source and search
+query produced per second of fetch time, and budgets the current run's
+remaining time so processing and upload still finish before the deadline.
+"""
+
+import json
+import os
+import threading
+import time
+
+# Older runs count for less: stats are multiplied by this once per run.
+YIELD_DECAY = 0.7
+
+# Prior used for unseen work: roughly one qualifying deal per PRIOR_SECONDS
+# of fetching, so new sources and queries still get explored.
+PRIOR_DEALS = 1.0
+PRIOR_SECONDS = 60.0
+
+# Time kept back for processing + upload when no earlier run measured it.
+DEFAULT_RESERVE_SECONDS = 90.0
+MIN_RESERVE_SECONDS = 45.0
+
+
+class YieldTracker:
+    """Qualifying deals per second of fetch time, keyed by source or query."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats: dict[str, dict] = {}
+        self.finish_seconds: float | None = None
+        # Fetch stages record from several threads
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for key, entry in data.get("keys", {}).items():
+            self.stats[key] = {
+                "seconds": entry.get("seconds", 0.0) * YIELD_DECAY,
+                "deals": entry.get("deals", 0.0) * YIELD_DECAY,
+            }
+        self.finish_seconds = data.get("finish_seconds")
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock, open(tmp, "w") as f:
+            json.dump({"keys": self.stats, "finish_seconds": self.finish_seconds}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _entry(self, key: str) -> dict:
+        return self.stats.setdefault(key, {"seconds": 0.0, "deals": 0.0})
+
+    def record_fetch(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._entry(key)["seconds"] += seconds
+
+    def record_deals(self, key: str, count: int = 1) -> None:
+        with self._lock:
+            self._entry(key)["deals"] += count
+
+    def rate(self, key: str) -> float:
+        """Smoothed qualifying deals per second of fetch time."""
+        entry = self.stats.get(key, {})
+        return (entry.get("deals", 0.0) + PRIOR_DEALS) / (entry.get("seconds", 0.0) + PRIOR_SECONDS)
+
+
+class DeadlineScheduler:
+    """Tracks the time left before a deadline, minus a reserve for processing/upload."""
+
+    def __init__(self, deadline_seconds: float | None, reserve_seconds: float = DEFAULT_RESERVE_SECONDS):
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline_seconds if deadline_seconds else None
+        self.reserve = reserve_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.deadline is not None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def fetch_time_left(self) -> float:
+        """Seconds still available for fetching (infinite without a deadline)."""
+        if self.deadline is None:
+            return float("inf")
+        return self.deadline - time.monotonic() - self.reserve
+
+    def can_start(self, estimated_seconds: float) -> bool:
+        return self.fetch_time_left() >= estimated_seconds
+
+    def affordable(self, per_item_seconds: float, cap: int) -> int:
+        """How many items of ``per_item_seconds`` fit in the remaining fetch time (at most ``cap``)."""
+        left = self.fetch_time_left()
+        if left == float("inf"):
+            return cap
+        return max(0, min(cap, int(left // per_item_seconds)))
+
+    def subprocess_timeout(self, default: float) -> float:
+        """Timeout for a fetch subprocess so it is killed before eating the reserve."""
+        return max(1.0, min(default, self.fetch_time_left()))
+
+
+def reserve_from_history(tracker: YieldTracker) -> float:
+    """Reserve 1.5x the last measured processing + upload time."""
+    if tracker.finish_seconds is None:
+        return DEFAULT_RESERVE_SECONDS
+    return max(MIN_RESERVE_SECONDS, tracker.finish_seconds * 1.5)
@@ -0,0 +1,135 @@
+"""
+Deal Hunter — Sharded runs
+`run_scrape.py --shard i/N` scrapes only the broker sources and BizBuySell
+searches whose stable hash falls in shard i of N. Detail pages follow the
+listings that found them. Instead of uploading, a shard writes its deals
+(plus the sitemap/feed cursors of the sources it owns) to a shard file.
+`run_scrape.py --merge` then reads every shard file, drops duplicate
+deals and uploads once. Locally:
+
+    for i in 1 2 3; do python scraper/run_scrape.py --shard $i/3 & done; wait
+    python scraper/run_scrape.py --merge
+
+Hashes are sha1-based, so a key lands in the same shard on every machine
+and every run, and per-shard state caches stay consistent.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+
+from store import deal_key
+
+_SHARD_FILE_RE = re.compile(r"shard-(\d+)-of-(\d+)\.json$")
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard ``index`` (1-based) of ``count``."""
+
+    index: int
+    count: int
+
+    def owns(self, key: str) -> bool:
+        return shard_of(key, self.count) == self.index
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @property
+    def filename(self) -> str:
+        return f"shard-{self.index}-of-{self.count}.json"
+
+
+def shard_of(key: str, count: int) -> int:
+    """1-based shard a key belongs to, stable across processes and machines."""
+    digest = hashlib.sha1(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def parse_shard(text: str) -> Shard:
+    """Parse "i/N" for argparse (1 <= i <= N)."""
+    m = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", text)
+    if not m or not 1 <= int(m.group(1)) <= int(m.group(2)):
+        raise argparse.ArgumentTypeError(f"expected i/N with 1 <= i <= N, got {text!r}")
+    return Shard(int(m.group(1)), int(m.group(2)))
+
+
+def write_shard_output(out_dir: str, shard: Shard, deals: list[dict], discovery: dict, criteria_version: str) -> str:
+    """Write one shard's deals and source cursors; returns the file path."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, shard.filename)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({
+            "shard": str(shard),
+            "criteria_version": criteria_version,
+            "discovery": {name: dt.isoformat() for name, dt in discovery.items()},
+            "deals": deals,
+        }, f, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+def read_shard_outputs(out_dir: str) -> tuple[list[dict], list[str]]:
+    """All shard files in ``out_dir`` for the most common shard count.
+
+    Returns (outputs, paths) for the files that loaded, in the same order;
+    a file that fails to load is reported on stderr and left out of both,
+    so the merge step never deletes it. Missing shards are reported too;
+    files for a different shard count (left over from an old layout) are
+    ignored.
+    """
+    found: dict[int, dict[int, str]] = {}
+    for path in glob.glob(os.path.join(out_dir, "shard-*-of-*.json")):
+        m = _SHARD_FILE_RE.search(path)
+        if m:
+            found.setdefault(int(m.group(2)), {})[int(m.group(1))] = path
+    if not found:
+        return [], []
+    count = max(found, key=lambda n: len(found[n]))
+    paths = [found[count][i] for i in sorted(found[count])]
+    missing = sorted(set(range(1, count + 1)) - set(found[count]))
+    if missing:
+        print(f"Missing shard files for {', '.join(f'{i}/{count}' for i in missing)}", file=sys.stderr)
+    outputs, loaded = [], []
+    for path in paths:
+        try:
+            with open(path) as f:
+                outputs.append(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not read {path}, keeping it for the next merge: {e}", file=sys.stderr)
+            continue
+        loaded.append(path)
+    return outputs, loaded
+
+
+def _completeness(deal: dict) -> tuple:
+    filled = sum(1 for v in deal.values() if v not in (None, "", [], {}))
+    return filled, deal.get("score") or 0
+
+
+def merge_deals(deal_lists: list[list[dict]]) -> list[dict]:
+    """Combine shard deals, keeping the most complete copy of each deal.
+
+    Duplicates (the same listing found by searches in different shards)
+    are matched on store.deal_key; their profile_scores are unioned.
+    """
+    merged: dict[str, dict] = {}
+    for deals in deal_lists:
+        for deal in deals:
+            key = deal_key(deal)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = deal
+                continue
+            best, other = (deal, current) if _completeness(deal) > _completeness(current) else (current, deal)
+            if "profile_scores" in best or "profile_scores" in other:
+                best["profile_scores"] = {**(other.get("profile_scores") or {}), **(best.get("profile_scores") or {})}
+            merged[key] = best
+    return list(merged.values())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Deal Hunter — Local deal store
+SQLite database owned by the scraper. Every processed deal is upserted
+with first_seen/last_seen dates and a content hash; the hash of the last
+version posted to /api/scrape is kept too, so each run only uploads new
+or changed deals.
+
+Query it without the web app:
+  python scraper/store.py top [-n 20] [--industry NAME] [--since YYYY-MM-DD] [--min-score N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from dataclasses import fields
+from datetime import datetime
+from typing import get_args, get_type_hints
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from deal_hunter_scraper import Deal
+
+DEFAULT_DB_PATH = os.path.join(
+    os.environ.get("DEAL_HUNTER_STATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".state")),
+    "deals.sqlite",
+)
+
+DEAL_COLUMNS = [f.name for f in fields(Deal)]
+LIST_COLUMNS = {"traits", "avoid_traits"}
+
+# date_found is stamped on every run, so it is not part of the content hash
+UNHASHED_COLUMNS = {"date_found"}
+
+
+def _sql_type(annotation) -> str:
+    args = [a for a in get_args(annotation) if a is not type(None)]
+    base = args[0] if args else annotation
+    return {float: "REAL", int: "INTEGER"}.get(base, "TEXT")
+
+
+_HINTS = get_type_hints(Deal)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS deals (
+    deal_key TEXT PRIMARY KEY,
+    {", ".join(f"{name} {_sql_type(_HINTS[name])}" for name in DEAL_COLUMNS)},
+    profile_scores TEXT,
+    content_hash TEXT NOT NULL,
+    uploaded_hash TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deals_url ON deals (url);
+CREATE INDEX IF NOT EXISTS idx_deals_listing_id ON deals (listing_id);
+CREATE INDEX IF NOT EXISTS idx_deals_score ON deals (score DESC);
+CREATE INDEX IF NOT EXISTS idx_deals_industry ON deals (industry, score DESC);
+CREATE INDEX IF NOT EXISTS idx_deals_date_found ON deals (date_found);
+"""
+
+
+def deal_key(deal: dict) -> str:
+    """Same identity the web app uses (url), falling back to source + title."""
+    return deal.get("url") or f"{deal.get('source', '')}|{deal.get('title', '')}"
+
+
+def content_hash(deal: dict) -> str:
+    payload = {name: deal.get(name) for name in DEAL_COLUMNS if name not in UNHASHED_COLUMNS}
+    payload["profile_scores"] = deal.get("profile_scores")
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class DealStore:
+    """Scraper-side deal history with delta tracking for uploads."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def upsert(self, deals: list[dict], seen_on: str | None = None) -> tuple[list[dict], int]:
+        """Record this run's deals; returns (deals to upload, number never seen before).
+
+        A deal needs uploading when its content hash differs from the one
+        last confirmed by mark_uploaded (always true for new deals).
+        """
+        seen_on = seen_on or datetime.now().strftime("%Y-%m-%d")
+        changed = []
+        new = 0
+        keys = set()
+        with self.conn:
+            for deal in deals:
+                key = deal_key(deal)
+                if key in keys:
+                    continue
+                keys.add(key)
+                digest = content_hash(deal)
+                row = self.conn.execute(
+                    "SELECT uploaded_hash, date_found FROM deals WHERE deal_key = ?", (key,)
+                ).fetchone()
+                values = {name: deal.get(name) for name in DEAL_COLUMNS}
+                for name in LIST_COLUMNS:
+                    values[name] = json.dumps(values[name] or [])
+                values["profile_scores"] = json.dumps(deal["profile_scores"]) if deal.get("profile_scores") is not None else None
+                if row is None:
+                    new += 1
+                    columns = ["deal_key", *values, "content_hash", "first_seen", "last_seen"]
+                    self.conn.execute(
+                        f"INSERT INTO deals ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        [key, *values.values(), digest, seen_on, seen_on],
+                    )
+                else:
+                    # Keep the date the deal was first found
+                    values["date_found"] = row["date_found"] or values["date_found"]
+                    assignments = ", ".join(f"{name} = ?" for name in values)
+                    self.conn.execute(
+                        f"UPDATE deals SET {assignments}, content_hash = ?, last_seen = ? WHERE deal_key = ?",
+                        [*values.values(), digest, seen_on, key],
+                    )
+                if row is None or row["uploaded_hash"] != digest:
+                    changed.append(deal)
+        return changed, new
+
+    def mark_uploaded(self, deals: list[dict]) -> None:
+        """Remember that these deals' current versions are on the server."""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE deals SET uploaded_hash = content_hash WHERE deal_key = ?",
+                [(deal_key(d),) for d in deals],
+            )
+
+    def get(self, key: str) -> dict | None:
+        """The stored Deal fields for a deal_key, or None if the deal is unknown."""
+        row = self.conn.execute(
+            f"SELECT {', '.join(DEAL_COLUMNS)} FROM deals WHERE deal_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        deal = dict(row)
+        for name in LIST_COLUMNS:
+            deal[name] = json.loads(deal[name] or "[]")
+        return deal
+
+    def uploaded_urls(self) -> list[str]:
+        """URLs of deals that have been posted to the web app at least once."""
+        rows = self.conn.execute("SELECT url FROM deals WHERE uploaded_hash IS NOT NULL AND url != ''")
+        return [row["url"] for row in rows]
+
+    def top(
+        self,
+        limit: int = 20,
+        industry: str | None = None,
+        since: str | None = None,
+        min_score: int | None = None,
+    ) -> list[dict]:
+        """Highest-scoring deals, optionally by industry / last seen on or after ``since``."""
+        clauses, params = [], []
+        if industry:
+            clauses.append("industry = ?")
+            params.append(industry)
+        if since:
+            clauses.append("last_seen >= ?")
+            params.append(since)
+        if min_score is not None:
+            clauses.append("score >= ?")
+            params.append(min_score)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(
+            f"SELECT * FROM deals {where} ORDER BY score DESC, last_seen DESC LIMIT ?",
+            [*params, limit],
+        ).fetchall()
+        deals = []
+        for row in rows:
+            d = dict(row)
+            for name in LIST_COLUMNS:
+                d[name] = json.loads(d[name] or "[]")
+            d["profile_scores"] = json.loads(d["profile_scores"]) if d["profile_scores"] else None
+            deals.append(d)
+        return deals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the scraper's local deal store")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help=f"SQLite file (default {DEFAULT_DB_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    top = sub.add_parser("top", help="List the highest-scoring deals")
+    top.add_argument("-n", "--limit", type=int, default=20)
+    top.add_argument("--industry")
+    top.add_argument("--since", help="Only deals seen on or after this date (YYYY-MM-DD)")
+    top.add_argument("--min-score", type=int)
+    top.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No deal store at {args.db}", file=sys.stderr)
+        sys.exit(1)
+
+    with DealStore(args.db) as store:
+        deals = store.top(args.limit, args.industry, args.since, args.min_score)
+
+    if args.json:
+        print(json.dumps(deals, indent=2))
+        return
+    for d in deals:
+        price = f"${d['asking_price']:,.0f}" if d["asking_price"] else "—"
+        multiple = f"{d['multiple']:.1f}x" if d["multiple"] else "—"
+        print(f"{d['score']:>3}  {price:>12}  {multiple:>5}  {d['industry'][:24]:<24}  "
+              f"{d['first_seen']}..{d['last_seen']}  {d['title'][:60]}")
+        if d["url"]:
+            print(f"     {d['url']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Deal Hunter — Scoring model trainer
+Fits the weights of a scoring_model.ScoringModel to the ratings users
+gave deals in the web app. Export the ratings joined with their deals:
+
+  psql "$DATABASE_URL" -c "\\copy (SELECT r.user_id, r.interest, d.industry, d.traits,
+      d.avoid_traits, d.multiple FROM deal_ratings r JOIN deals d ON d.id = r.deal_id)
+      TO 'ratings.csv' CSV HEADER"
+
+then train, and score a run with the model:
+
+  python scraper/train_scoring.py ratings.csv [-o FILE] [--per-user]
+  python scraper/run_scrape.py --scoring-model [FILE]
+
+Each rating becomes a 0-100 target (INTEREST_TARGETS). The fit is a ridge
+regression on one-hot industry, trait and multiple-bucket features, shrunk
+toward the hand-tuned weights: industries and traits with few ratings keep
+about their current influence. Per-user models are shrunk toward the
+global one. Every fifth rating is held out to compare the trained model
+with the hand-tuned score before the final fit on all ratings.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from deal_hunter_scraper import DEFAULT_CRITERIA, CompiledCriteria, Deal, compute_multiple, hand_tuned_score
+from scoring_model import MULTIPLE_EDGES, ScoringModel
+
+DEFAULT_MODEL_PATH = os.path.join(
+    os.environ.get("DEAL_HUNTER_STATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".state")),
+    "scoring_model.json",
+)
+
+# deal_ratings.interest -> score the rating asks for
+INTEREST_TARGETS = {"very_interested": 100.0, "interested": 70.0, "not_interesting": 30.0, "pass": 0.0}
+
+# Ratings worth of evidence needed to move a weight halfway from its prior
+DEFAULT_STRENGTH = 5.0
+DEFAULT_MIN_USER_RATINGS = 30
+MAX_SWEEPS = 200
+TOLERANCE = 1e-6
+HOLDOUT_EVERY = 5
+
+_DEFAULT_INDUSTRY = "industry:*"
+_UNKNOWN_MULTIPLE = "multiple:none"
+
+
+def _list_field(value) -> list:
+    """Trait lists arrive as JSON lists, Postgres arrays ("{a,b}") or JSON strings."""
+    if isinstance(value, list):
+        return value
+    value = (value or "").strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [t.strip().strip('"') for t in value.strip("{}").split(",") if t.strip()]
+
+
+def _float_field(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def read_ratings(path: str) -> tuple[list[dict], int]:
+    """Ratings from a CSV or JSON export; returns (usable rows, rows skipped)."""
+    with open(path, newline="") as f:
+        rows = json.load(f) if path.endswith(".json") else list(csv.DictReader(f))
+    ratings, skipped = [], 0
+    for row in rows:
+        target = INTEREST_TARGETS.get(str(row.get("interest", "")).strip().lower())
+        if target is None:
+            skipped += 1
+            continue
+        multiple = _float_field(row.get("multiple"))
+        if multiple is None:
+            multiple = compute_multiple(Deal(
+                asking_price=_float_field(row.get("asking_price")),
+                ebitda=_float_field(row.get("ebitda")),
+                cash_flow_sde=_float_field(row.get("cash_flow_sde")),
+            ))
+        ratings.append({
+            "user_id": str(row.get("user_id", "")),
+            "industry": row.get("industry") or "Unknown",
+            "traits": _list_field(row.get("traits")),
+            "avoid_traits": _list_field(row.get("avoid_traits")),
+            "multiple": multiple,
+            "target": target,
+        })
+    return ratings, skipped
+
+
+def prior_weights(criteria: CompiledCriteria) -> dict[str, float]:
+    """The hand-tuned score as additive feature weights.
+
+    Exact except for the hand-tuned trait clamp: avoid traits can push the
+    prior below the score of a deal with no traits, which hand_tuned_score
+    floors at 0 (see tests/test_scoring_model.py).
+    """
+    base = hand_tuned_score([], [], None, "", criteria)
+    per_point = 50 / criteria.max_trait if criteria.max_trait else 0.0
+    weights = {"bias": 0.0, _DEFAULT_INDUSTRY: base, _UNKNOWN_MULTIPLE: 0.0}
+    for industry in criteria.targets:
+        weights[f"industry:{industry}"] = hand_tuned_score([], [], None, industry, criteria)
+    for trait in criteria.preferred:
+        weights[f"trait:{trait}"] = 10 * per_point
+    for trait in criteria.avoid - criteria.preferred:
+        weights[f"trait:{trait}"] = -15 * per_point
+    for i, edge in enumerate(MULTIPLE_EDGES + (float("inf"),)):
+        weights[f"multiple:{i}"] = hand_tuned_score([], [], edge, "", criteria) - base
+    return weights
+
+
+def features(rating: dict) -> list[str]:
+    multiple = rating["multiple"]
+    bucket = _UNKNOWN_MULTIPLE if multiple is None else f"multiple:{bisect_left(MULTIPLE_EDGES, multiple)}"
+    traits = {f"trait:{t}" for t in rating["traits"] + rating["avoid_traits"]}
+    return ["bias", f"industry:{rating['industry']}", bucket, *sorted(traits)]
+
+
+def fit(ratings: list[dict], prior: dict[str, float], strength: float = DEFAULT_STRENGTH) -> dict[str, float]:
+    """Ridge regression toward ``prior`` by coordinate descent.
+
+    Features are binary, so each coordinate update has a closed form: the
+    weight that best fits the residuals of the ratings using it, pulled
+    toward its prior by ``strength`` pseudo-ratings.
+    """
+    weights = dict(prior)
+    rows_by_feature: dict[str, list[int]] = {}
+    for i, rating in enumerate(ratings):
+        for feature in features(rating):
+            if feature not in weights:
+                # Industries the hand-tuned score doesn't target start at its default
+                weights[feature] = prior[_DEFAULT_INDUSTRY] if feature.startswith("industry:") else 0.0
+            rows_by_feature.setdefault(feature, []).append(i)
+    anchors = dict(weights)
+    targets = [r["target"] for r in ratings]
+    predictions = [sum(weights[f] for f in features(r)) for r in ratings]
+
+    for _sweep in range(MAX_SWEEPS):
+        largest = 0.0
+        for feature, rows in rows_by_feature.items():
+            old = weights[feature]
+            residual = sum(targets[i] - predictions[i] for i in rows) + old * len(rows)
+            new = (residual + strength * anchors[feature]) / (len(rows) + strength)
+            delta = new - old
+            if delta:
+                for i in rows:
+                    predictions[i] += delta
+                weights[feature] = new
+                largest = max(largest, abs(delta))
+        if largest < TOLERANCE:
+            break
+    return weights
+
+
+def compile_model(weights: dict[str, float], user_id: str = "") -> ScoringModel:
+    """Pack fitted feature weights into the lookup tables the scorer uses."""
+    return ScoringModel(
+        bias=weights["bias"],
+        industry_weights=tuple(sorted(
+            (name[len("industry:"):], w) for name, w in weights.items()
+            if name.startswith("industry:") and name != _DEFAULT_INDUSTRY
+        )),
+        default_industry=weights[_DEFAULT_INDUSTRY],
+        trait_weights=tuple(sorted((name[len("trait:"):], w) for name, w in weights.items() if name.startswith("trait:"))),
+        multiple_edges=MULTIPLE_EDGES,
+        multiple_weights=tuple(weights[f"multiple:{i}"] for i in range(len(MULTIPLE_EDGES) + 1)),
+        unknown_multiple=weights[_UNKNOWN_MULTIPLE],
+        user_id=user_id,
+    )
+
+
+def mean_abs_error(ratings: list[dict], score) -> float:
+    return sum(abs(score(r) - r["target"]) for r in ratings) / len(ratings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit scoring weights to exported deal ratings")
+    parser.add_argument("ratings", help="CSV or JSON export of deal_ratings joined with deals")
+    parser.add_argument("-o", "--output", default=DEFAULT_MODEL_PATH, help=f"Model file to write (default {DEFAULT_MODEL_PATH})")
+    parser.add_argument("--strength", type=float, default=DEFAULT_STRENGTH, help=f"Pull toward the prior weights, in ratings (default {DEFAULT_STRENGTH})")
+    parser.add_argument("--per-user", action="store_true", help="Also fit a model per user with enough ratings")
+    parser.add_argument("--min-user-ratings", type=int, default=DEFAULT_MIN_USER_RATINGS, help=f"Ratings a user needs for their own model (default {DEFAULT_MIN_USER_RATINGS})")
+    args = parser.parse_args()
+
+    try:
+        ratings, skipped = read_ratings(args.ratings)
+    except (OSError, ValueError) as e:
+        print(f"Could not read ratings from {args.ratings}: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not ratings:
+        print(f"No usable ratings in {args.ratings}", file=sys.stderr)
+        sys.exit(1)
+    users = {r["user_id"] for r in ratings}
+    print(f"Ratings: {len(ratings)} from {len(users)} users ({skipped} skipped)")
+
+    prior = prior_weights(DEFAULT_CRITERIA)
+    train = [r for i, r in enumerate(ratings) if i % HOLDOUT_EVERY != HOLDOUT_EVERY - 1]
+    holdout = [r for i, r in enumerate(ratings) if i % HOLDOUT_EVERY == HOLDOUT_EVERY - 1]
+    if train and holdout:
+        candidate = compile_model(fit(train, prior, args.strength))
+        hand_tuned = mean_abs_error(holdout, lambda r: hand_tuned_score(
+            r["traits"], r["avoid_traits"], r["multiple"], r["industry"], DEFAULT_CRITERIA))
+        trained = mean_abs_error(holdout, lambda r: candidate.score(
+            r["traits"], r["avoid_traits"], r["multiple"], r["industry"]))
+        print(f"Holdout mean error ({len(holdout)} ratings): hand-tuned {hand_tuned:.1f}, trained {trained:.1f}")
+
+    global_weights = fit(ratings, prior, args.strength)
+    model = compile_model(global_weights)
+    output = {
+        "version": model.version,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "ratings": len(ratings),
+        "global": model.to_dict(),
+        "users": {},
+    }
+    if args.per_user:
+        for user_id in sorted(users):
+            own = [r for r in ratings if r["user_id"] == user_id]
+            if len(own) >= args.min_user_ratings:
+                output["users"][user_id] = compile_model(fit(own, global_weights, args.strength), user_id).to_dict()
+        print(f"Per-user models: {len(output['users'])} (users with at least {args.min_user_ratings} ratings)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    tmp = f"{args.output}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(output, f, indent=2, sort_keys=True)
+    os.replace(tmp, args.output)
+    print(f"Wrote model {model.version} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
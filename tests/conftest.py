@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "scraper")]
+
+# run_scrape resolves its state paths at import; keep tests out of scraper/.state
+os.environ.setdefault("DEAL_HUNTER_STATE_DIR", tempfile.mkdtemp(prefix="deal-hunter-tests-"))
@@ -0,0 +1,64 @@
+import analysis_cache
+import deal_hunter_scraper
+from analysis_cache import AnalysisCache
+from deal_hunter_scraper import Deal, analysis_key, analyze_text, compile_criteria, process_deal
+
+TITLE = "Commercial water treatment company"
+DESCRIPTION = "Recurring service contracts with municipal customers."
+
+
+def test_flushed_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "analysis.sqlite")
+    cache = AnalysisCache(path)
+    cache.put("k", ("Water Treatment", ("recurring_revenue",)))
+    cache.close()
+
+    cache = AnalysisCache(path)
+    assert cache.get("k") == ("Water Treatment", ("recurring_revenue",))
+    assert cache.get("k") is not None
+    assert (cache.disk_hits, cache.memory_hits, cache.misses) == (1, 1, 0)
+    assert cache.get("missing") is None and cache.misses == 1
+    cache.close()
+
+
+def test_keyword_table_change_empties_the_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / "analysis.sqlite")
+    cache = AnalysisCache(path)
+    cache.put("k", ("Water Treatment", ()))
+    cache.close()
+
+    monkeypatch.setattr(analysis_cache, "KEYWORDS_VERSION", "edited-keywords")
+    cache = AnalysisCache(path)
+    assert cache.get("k") is None
+    cache.close()
+
+
+def test_lru_evicts_least_recently_used(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "analysis.sqlite"), lru_size=2)
+    cache.put("a", ("A", ()))
+    cache.put("b", ("B", ()))
+    cache.get("a")
+    cache.put("c", ("C", ()))
+    assert list(cache._lru) == ["a", "c"]
+    # Evicted entries are still pending for the disk
+    assert cache.get("b") == ("B", ())
+    cache.close()
+
+
+def test_analyze_text_is_memoized_but_traits_split_per_criteria(tmp_path, monkeypatch):
+    cache = AnalysisCache(str(tmp_path / "analysis.sqlite"))
+    monkeypatch.setattr(deal_hunter_scraper, "_analysis_cache", cache)
+
+    first = analyze_text(TITLE, DESCRIPTION)
+    calls = []
+    monkeypatch.setattr(deal_hunter_scraper, "match_traits", lambda *a: calls.append(a) or [])
+    assert analyze_text(TITLE, DESCRIPTION) == first and calls == []
+    assert cache.get(analysis_key(TITLE, DESCRIPTION)) == (first[0], tuple(first[1]))
+
+    matched = first[1]
+    assert matched, "fixture text should match at least one trait"
+    default = process_deal(Deal(title=TITLE, source="Test", description=DESCRIPTION))
+    other = process_deal(Deal(title=TITLE, source="Test", description=DESCRIPTION),
+                         compile_criteria({"preferred_traits": ["not_a_matched_trait"]}))
+    assert default.traits and other.traits == []
+    cache.close()
@@ -0,0 +1,58 @@
+import os
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+import pytest
+
+from deal_hunter_scraper import Deal
+
+pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds  # noqa: E402
+
+from archive import read_archive, scan_archive, write_archive  # noqa: E402
+
+
+def deal(url, **overrides):
+    fields = {"title": f"Business at {url}", "source": "BizBuySell", "url": url,
+              "asking_price": 1500000.0, "score": 60, "traits": ["recurring_revenue"]}
+    fields.update(overrides)
+    return asdict(Deal(**fields))
+
+
+def write_run(root, day, deals, run_id):
+    return write_archive(deals, str(root), "v1", datetime(2026, 10, day, 12, tzinfo=timezone.utc), run_id)
+
+
+def test_round_trip_keeps_deal_fields_and_run_metadata(tmp_path):
+    scored = {**deal("https://x.example/a"), "profile_scores": {"p1": 80}}
+    path = write_run(tmp_path, 5, [scored, deal("https://x.example/b", asking_price=None)], "r1")
+    assert path == os.path.join(str(tmp_path), "scrape_date=2026-10-05", "run-r1.parquet")
+
+    rows = {r["url"]: r for r in read_archive(str(tmp_path)).to_pylist()}
+    a = rows["https://x.example/a"]
+    assert a["asking_price"] == 1500000.0 and a["traits"] == ["recurring_revenue"]
+    assert (a["run_id"], a["criteria_version"], a["profile_scores"]) == ("r1", "v1", '{"p1": 80}')
+    assert a["scrape_date"].isoformat() == "2026-10-05"
+    assert rows["https://x.example/b"]["asking_price"] is None
+    assert rows["https://x.example/b"]["profile_scores"] is None
+
+
+def test_runs_append_and_dates_prune_partitions(tmp_path):
+    write_run(tmp_path, 5, [deal("https://x.example/a")], "r1")
+    write_run(tmp_path, 12, [deal("https://x.example/a", asking_price=1200000.0)], "r2")
+    write_run(tmp_path, 19, [deal("https://x.example/c", source="Broker")], "r3")
+
+    table = read_archive(str(tmp_path), columns=["url", "asking_price"], since="2026-10-06", until="2026-10-12")
+    assert table.column_names == ["url", "asking_price"]
+    assert table.to_pylist() == [{"url": "https://x.example/a", "asking_price": 1200000.0}]
+
+    rows = [r for batch in scan_archive(str(tmp_path), ["run_id"], where=ds.field("source") == "BizBuySell")
+            for r in batch.to_pylist()]
+    assert sorted(r["run_id"] for r in rows) == ["r1", "r2"]
+
+
+def test_empty_or_missing_archive(tmp_path):
+    assert write_archive([], str(tmp_path)) is None
+    missing = str(tmp_path / "missing")
+    assert read_archive(missing, columns=["url", "nope"]).column_names == ["url"]
+    assert list(scan_archive(missing)) == []
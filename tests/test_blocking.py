@@ -0,0 +1,57 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from blocking import STATS_PREFIX, TYPICAL_BYTES, BlockStats, blocking_policy, route_script
+
+
+def test_allowlist_reallows_types_and_domains():
+    policy = blocking_policy({"resource_allowlist": {"types": ["stylesheet"], "domains": ["cdn.example.com"]}})
+    assert "stylesheet" not in policy["types"] and "image" in policy["types"]
+    assert policy["allow_domains"] == ["cdn.example.com"]
+    assert "stylesheet" in blocking_policy(None)["types"]
+
+
+def test_stats_lines_are_consumed_and_summed():
+    stats = BlockStats()
+    other = stats.consume(f'Error: boom\n{STATS_PREFIX}{{"image": 3, "font": 1}}\n')
+    stats.consume(f'{STATS_PREFIX}{{"image": 2}}\n{STATS_PREFIX}not json')
+    assert other == ["Error: boom"]
+    assert stats.by_type == {"image": 5, "font": 1}
+    assert stats.bytes_saved() == 5 * TYPICAL_BYTES["image"] + TYPICAL_BYTES["font"]
+    assert stats.report().startswith("Browser requests blocked: 6 (image: 5, font: 1)")
+    assert BlockStats().report() == "Browser requests blocked: none"
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_route_script_aborts_blocked_requests():
+    policy = blocking_policy({"resource_allowlist": {"domains": ["widgets.hotjar.com"]}})
+    requests = [
+        ["https://broker.example/listing/1", "document"],
+        ["https://broker.example/logo.png", "image"],
+        ["https://broker.example/app.js", "script"],
+        ["https://www.google-analytics.com/analytics.js", "script"],
+        ["https://widgets.hotjar.com/widget.js", "script"],
+    ]
+    script = f"""
+    (async () => {{
+        let handler;
+        const context = {{ route: async (pattern, h) => {{ handler = h; }} }};
+        {route_script(policy)}
+        const outcomes = {json.dumps(requests)}.map(([url, type]) => handler({{
+            request: () => ({{ url: () => url, resourceType: () => type }}),
+            abort: () => 'abort',
+            continue: () => 'continue',
+        }}));
+        console.log(JSON.stringify(outcomes));
+        reportBlocked();
+    }})();
+    """
+    result = subprocess.run(["node", "-e", script], capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == ["continue", "abort", "continue", "abort", "continue"]
+    stats = BlockStats()
+    assert stats.consume(result.stderr) == []
+    assert stats.by_type == {"image": 1, "script": 1}
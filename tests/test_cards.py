@@ -0,0 +1,60 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+from bs4 import BeautifulSoup
+
+from extractors import extract_cards
+from run_scrape import FINANCIAL_LABEL_PATTERN, card_to_deal
+
+SOURCE = {
+    "name": "Card Broker",
+    "url": "https://broker.example/listings/",
+    "selectors": {"listing_card": "div.card", "title": "h3 a", "price": ".price", "location": ".loc"},
+}
+
+CARD_HTML = """
+<div class="card">
+  <h3><a href="/listing/acme-plumbing/123456">Acme Plumbing Services</a></h3>
+  <span class="price">$1,250,000</span><span class="loc">Dallas, TX</span>
+  <p>Cash Flow: $410,000 Gross Revenue: $2.1M</p>
+</div>
+"""
+
+
+def browser_card(text):
+    """A card as the in-browser extraction returns it (compact fields, no HTML)."""
+    return {
+        "title": "Acme Plumbing Services",
+        "href": "https://broker.example/listing/acme-plumbing/123456",
+        "text": text,
+        "fields": {"price": "$1,250,000", "location": "Dallas, TX"},
+        "financials": [["Cash Flow", "$410,000"], ["Gross Revenue", "$2.1M"]],
+        "source": "Card Broker",
+    }
+
+
+def test_browser_card_matches_the_http_extraction():
+    (http_card,) = extract_cards(BeautifulSoup(CARD_HTML, "html.parser"), SOURCE, SOURCE["url"])
+    http_deal = card_to_deal(http_card)
+    browser_deal = card_to_deal(browser_card(http_card["text"]))
+    assert browser_deal == http_deal
+    assert (browser_deal.asking_price, browser_deal.cash_flow_sde, browser_deal.revenue) == (1250000, 410000, 2100000)
+    assert browser_deal.listing_id == "123456" and browser_deal.location == "Dallas, TX"
+
+
+def test_selector_fields_win_over_financial_pairs():
+    card = browser_card("")
+    card["financials"].append(["Asking Price", "$9,000,000"])
+    assert card_to_deal(card).asking_price == 1250000
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_label_pattern_finds_pairs_in_javascript():
+    text = "Asking Price: $1.2M Cash Flow $300,000 Manufacturing SDE: $310 K EBITDA: n/a"
+    script = (f"const re = new RegExp({json.dumps(FINANCIAL_LABEL_PATTERN)}, 'gi');"
+              f"console.log(JSON.stringify([...{json.dumps(text)}.matchAll(re)].map(m => [m[1], m[2]])));")
+    result = subprocess.run(["node", "-e", script], capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == [["Asking Price", "$1.2M"], ["Cash Flow", "$300,000"], ["SDE", "$310 K"]]
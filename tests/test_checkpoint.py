@@ -0,0 +1,42 @@
+from checkpoint import Checkpoint
+
+
+def journal(path, key="v1|all"):
+    checkpoint = Checkpoint(str(path), key)
+    checkpoint.record_page("https://b.example.com/list", [{"href": "/l/1", "html": "<div>big</div>"}], "/list?p=2")
+    checkpoint.record_deals(["Broker|/l/1"], [{"url": "https://b.example.com/l/1", "score": 60}])
+    checkpoint.close()
+
+
+def test_resume_serves_pages_and_processed_deals(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    journal(path)
+
+    resumed = Checkpoint(str(path), "v1|all", resume=True)
+    assert resumed.resumed
+    page = resumed.page("https://b.example.com/list")
+    assert page["listings"] == [{"href": "/l/1"}] and page["next_url"] == "/list?p=2"
+    assert resumed.processed == {"Broker|/l/1"}
+    assert [d["score"] for d in resumed.deals] == [60]
+    resumed.close()
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    journal(path)
+    with open(path, "a") as f:
+        f.write('{"type": "deals", "keys": ["Broker|/l/2"], "dea')
+
+    resumed = Checkpoint(str(path), "v1|all", resume=True)
+    assert resumed.resumed and resumed.processed == {"Broker|/l/1"}
+    resumed.close()
+
+
+def test_different_run_key_starts_fresh(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    journal(path)
+
+    fresh = Checkpoint(str(path), "v2|all", resume=True)
+    assert not fresh.resumed and not fresh.deals and fresh.page("https://b.example.com/list") is None
+    fresh.clear()
+    assert not path.exists()
@@ -0,0 +1,23 @@
+import run_scrape
+from deal_hunter_scraper import prepare_profiles
+
+
+def deal(url, title, scores):
+    return {"url": url, "title": title, "score": 50, "industry": "HVAC", "profile_scores": scores}
+
+
+def test_profile_digests_rank_and_filter_per_profile(tmp_path):
+    profiles = [{"id": 1, "email": "a@example.com", "rated_urls": ["https://x/2"]}, {"id": 2}]
+    deals = [
+        deal("https://x/1", "Only for one", {"1": 40}),
+        deal("https://x/2", "Rated by one", {"1": 90, "2": 70}),
+        deal("https://x/3", "Best for two", {"1": 10, "2": 95}),
+    ]
+    paths = run_scrape.write_profile_digests(deals, profiles, prepare_profiles(profiles), str(tmp_path))
+
+    assert sorted(p.rsplit("/", 1)[-1] for p in paths) == ["a@example.com.html", "profile-2.html"]
+    first = (tmp_path / "a@example.com.html").read_text()
+    second = (tmp_path / "profile-2.html").read_text()
+    assert "Only for one" in first and "Rated by one" not in first
+    assert "Only for one" not in second
+    assert second.index("Best for two") < second.index("Rated by one")
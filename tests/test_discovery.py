@@ -0,0 +1,20 @@
+import discovery
+
+SOURCE = {"name": "Broker", "discovery": {"sitemap": "https://b.example.com/sitemap.xml",
+                                          "listing_pattern": "/listing/", "max_urls": 3}}
+
+
+def sitemap(monkeypatch, locs):
+    monkeypatch.setattr(discovery, "iter_sitemap_urls", lambda *a, **k: ((loc, None) for loc in locs))
+
+
+def test_exactly_max_urls_is_complete(monkeypatch):
+    sitemap(monkeypatch, [f"https://b.example.com/listing/{i}" for i in range(3)] + ["https://b.example.com/about"])
+    listings, complete = discovery.discover_source(SOURCE, None, {})
+    assert len(listings) == 3 and complete
+
+
+def test_more_than_max_urls_is_incomplete(monkeypatch):
+    sitemap(monkeypatch, [f"https://b.example.com/listing/{i}" for i in range(4)])
+    listings, complete = discovery.discover_source(SOURCE, None, {})
+    assert len(listings) == 3 and not complete
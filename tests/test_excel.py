@@ -0,0 +1,14 @@
+import pytest
+
+from deal_hunter_scraper import compile_criteria, write_deals_to_excel
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def test_criteria_sheet_lists_the_given_profile_industries(tmp_path):
+    criteria = compile_criteria({"target_industries": ["Pallet Recycling", "Septic Services"]}, version="v2")
+    path = write_deals_to_excel([], str(tmp_path / "tracker.xlsx"), criteria)
+
+    sheet = openpyxl.load_workbook(path)["Acquisition Criteria"]
+    column_b = [row[1] for row in sheet.iter_rows(values_only=True)]
+    assert column_b[-2:] == ["Pallet Recycling", "Septic Services"]
@@ -0,0 +1,28 @@
+from bs4 import BeautifulSoup
+
+from extractors import extract_cards
+
+SOURCE = {
+    "name": "Relative Broker",
+    "url": "https://broker.example/businesses-for-sale/",
+    "selectors": {"listing_card": "div.card", "title": "h3 a"},
+}
+
+PAGE = """
+<div class="card"><h3><a href="acme-plumbing-1234">Acme Plumbing Services</a></h3></div>
+<div class="card"><h3><a href="/listing/beta-hvac-5678">Beta HVAC Company</a></h3></div>
+"""
+
+
+def test_relative_links_resolve_against_the_parsed_page():
+    page_url = "https://broker.example/businesses-for-sale/texas/page/2/"
+    cards = extract_cards(BeautifulSoup(PAGE, "html.parser"), SOURCE, page_url)
+    assert [c["href"] for c in cards] == [
+        "https://broker.example/businesses-for-sale/texas/page/2/acme-plumbing-1234",
+        "https://broker.example/listing/beta-hvac-5678",
+    ]
+
+
+def test_links_fall_back_to_the_landing_url():
+    cards = extract_cards(BeautifulSoup(PAGE, "html.parser"), SOURCE)
+    assert cards[0]["href"] == "https://broker.example/businesses-for-sale/acme-plumbing-1234"
@@ -0,0 +1,69 @@
+from bs4 import BeautifulSoup
+
+from frontier import CrawlFrontier, bizbuysell_page_url, find_next_page
+
+
+def test_push_dedups_normalized_urls_and_respects_max_depth():
+    frontier = CrawlFrontier(max_depth=2)
+    assert frontier.push("https://Broker.example/list?b=2&a=1#top", "Broker")
+    assert not frontier.push("https://broker.example/list?a=1&b=2", "Broker")
+    assert not frontier.push("https://broker.example/list?page=3", "Broker", depth=2)
+    assert len(frontier) == 1
+
+
+def test_pop_orders_by_priority_depth_then_score():
+    frontier = CrawlFrontier()
+    frontier.push("https://p1.example/", "P1 Broker", "P1")
+    frontier.push("https://p0.example/2", "P0 Broker", "P0", depth=1)
+    frontier.push("https://p0.example/", "P0 Broker", "P0")
+    frontier.push("https://p0-better.example/", "P0 Better", "P0", score=2.0)
+    assert [item.url for item in frontier.pop_batch(4)] == [
+        "https://p0-better.example/", "https://p0.example/", "https://p0.example/2", "https://p1.example/",
+    ]
+
+
+def test_each_source_stops_at_its_page_budget():
+    frontier = CrawlFrontier(default_budget=2)
+    frontier.set_budget("Small", 1)
+    for i in range(3):
+        frontier.push(f"https://big.example/{i}", "Big")
+        frontier.push(f"https://small.example/{i}", "Small")
+    sources = [item.source for item in frontier.pop_batch(10)]
+    assert sources.count("Big") == 2 and sources.count("Small") == 1
+    assert frontier.budget_left("Small") == 0 and frontier.pages_fetched("Big") == 2
+
+
+def test_same_depth_batch_stops_before_deeper_pages():
+    frontier = CrawlFrontier(max_depth=3)
+    frontier.push("https://a.example/", "A")
+    frontier.push("https://b.example/", "B")
+    frontier.push("https://a.example/2", "A", depth=1)
+    assert [item.depth for item in frontier.pop_batch(5, same_depth=True)] == [0, 0]
+    assert [item.depth for item in frontier.pop_batch(5, same_depth=True)] == [1]
+
+
+def test_find_next_page():
+    page = "https://broker.example/listings/"
+    soup = BeautifulSoup('<div class="pagination"><a href="?page=1">1</a><a href="?page=2">Next</a></div>', "html.parser")
+    assert find_next_page(soup, page) == "https://broker.example/listings/?page=2"
+    soup = BeautifulSoup('<link rel="next" href="/listings/">', "html.parser")
+    assert find_next_page(soup, page) is None
+
+
+def test_bizbuysell_page_url():
+    url = "https://www.bizbuysell.com/texas-businesses-for-sale/?q=plumbing"
+    assert bizbuysell_page_url(url, 1) == url
+    assert bizbuysell_page_url(url, 3) == "https://www.bizbuysell.com/texas-businesses-for-sale/3/?q=plumbing"
+    assert bizbuysell_page_url(bizbuysell_page_url(url, 3), 2).endswith("/texas-businesses-for-sale/2/?q=plumbing")
+
+
+def test_released_page_gives_its_budget_back():
+    frontier = CrawlFrontier(default_budget=2)
+    frontier.push("https://broker.example/a", "Broker")
+    frontier.push("https://broker.example/b", "Broker")
+    frontier.push("https://broker.example/c", "Broker")
+
+    skipped = frontier.pop()
+    frontier.release(skipped)
+    assert frontier.budget_left("Broker") == 2
+    assert len(frontier.pop_batch(5)) == 2
@@ -0,0 +1,24 @@
+from gazetteer import parse_geography, resolve_location
+
+
+def test_resolve_city_state_and_zip():
+    place = resolve_location("Memphis, TN 38103")
+    assert (place.country, place.region, place.metro) == ("US", "US-TN", "US-TN:memphis")
+
+
+def test_resolve_state_name_and_unknown():
+    assert resolve_location("Somewhere in Georgia").region == "US-GA"
+    assert resolve_location("Confidential") is None
+
+
+def test_geography_radius_filter():
+    geo = parse_geography("within 150 miles of Memphis, TN")
+    assert geo.restricted
+    assert geo.allows(resolve_location("Little Rock, AR"))
+    assert not geo.allows(resolve_location("Seattle, WA"))
+
+
+def test_geography_unrecognized_terms_are_reported():
+    geo = parse_geography("TN; Narnia")
+    assert geo.ignored == ("Narnia",)
+    assert geo.allows(resolve_location("Nashville, TN"))
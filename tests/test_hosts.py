@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import hosts
+from hosts import OPEN, READY, WAIT, HostController, parse_retry_after
+
+HOST = "broker.example"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(hosts.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_limit_grows_additively_and_halves_on_throttling(clock):
+    controller = HostController(max_concurrency=4)
+    for _ in range(6):
+        assert controller.try_acquire(HOST) == READY
+        controller.release(HOST, 200)
+    grown = controller.hosts[HOST].limit
+    assert 3.0 < grown <= 4.0
+
+    assert controller.try_acquire(HOST) == READY
+    assert controller.release(HOST, 429, retry_after=0) == "throttled"
+    assert controller.hosts[HOST].limit == pytest.approx(grown / 2)
+
+
+def test_concurrency_is_capped_at_the_limit(clock):
+    controller = HostController()
+    assert controller.try_acquire(HOST) == READY
+    assert controller.try_acquire(HOST) == WAIT
+    controller.release(HOST, 200)
+    assert controller.try_acquire(HOST) == READY
+
+
+def test_retry_after_delays_the_next_request(clock):
+    controller = HostController()
+    controller.try_acquire(HOST)
+    controller.release(HOST, 429, retry_after=30)
+    assert controller.try_acquire(HOST) == WAIT
+    assert controller.wait_seconds(HOST) == pytest.approx(30)
+    clock[0] += 30
+    assert controller.try_acquire(HOST) == READY
+
+
+def test_long_retry_after_opens_the_circuit(clock):
+    controller = HostController()
+    controller.try_acquire(HOST)
+    controller.release(HOST, 503, retry_after=hosts.MAX_RETRY_AFTER_SECONDS + 1)
+    assert controller.try_acquire(HOST) == OPEN
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 < parse_retry_after(later) <= 60
+
+
+def test_breaker_opens_after_repeated_failures_and_probes_once(clock):
+    controller = HostController(failure_threshold=3, open_seconds=300)
+    for _ in range(3):
+        clock[0] += 60  # past any backoff
+        assert controller.try_acquire(HOST) == READY
+        controller.release(HOST, error=True)
+    assert controller.try_acquire(HOST) == OPEN
+
+    clock[0] += 300
+    assert controller.try_acquire(HOST) == READY  # half-open probe
+    assert controller.try_acquire(HOST) == WAIT
+    controller.release(HOST, 200)
+    assert controller.hosts[HOST].open_until == 0.0
+    assert controller.try_acquire(HOST) == READY
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    controller = HostController(failure_threshold=1, open_seconds=300)
+    controller.try_acquire(HOST)
+    controller.release(HOST, 500)
+    clock[0] += 300
+    assert controller.try_acquire(HOST) == READY
+    controller.release(HOST, error=True)
+    assert controller.try_acquire(HOST) == OPEN
+    assert controller.hosts[HOST].trips == 2
+
+
+def test_get_raises_while_the_circuit_is_open(clock, monkeypatch):
+    controller = HostController(failure_threshold=1)
+    controller.try_acquire(HOST)
+    controller.release(HOST, error=True)
+    monkeypatch.setattr(hosts.requests, "get", lambda *a, **k: pytest.fail("requested an open host"))
+    with pytest.raises(hosts.HostUnavailable):
+        controller.get(f"https://{HOST}/listings", {}, timeout=5)
@@ -0,0 +1,54 @@
+from hybrid import BROWSER, HTTP, FetchPlanner, url_pattern
+
+LISTING = "https://www.bizbuysell.com/business-opportunity/acme-hvac-co/2345678/"
+
+
+def test_url_pattern_keeps_hyphenated_words():
+    assert url_pattern("https://www.bizbuysell.com/hvac-businesses-for-sale/2/") == (
+        "www.bizbuysell.com/hvac-businesses-for-sale/*"
+    )
+    assert url_pattern("https://www.bizbuysell.com/hvac-businesses-for-sale/2/") != url_pattern(
+        "https://www.bizbuysell.com/plumbing-businesses-for-sale/2/"
+    )
+
+
+def test_url_pattern_collapses_ids_and_listing_slugs():
+    assert url_pattern(LISTING) == "www.bizbuysell.com/business-opportunity/*/*"
+    assert url_pattern("https://www.bizbuysell.com/business-opportunity/other-co/3456789/") == url_pattern(LISTING)
+    assert url_pattern("https://broker.example.com/listings/acme-co-12345") == "broker.example.com/listings/*"
+
+
+def test_browser_decision_survives_restarts(tmp_path):
+    path = str(tmp_path / "fetch_modes.json")
+    planner = FetchPlanner(path)
+    planner.record("BizBuySell", LISTING, False)
+    planner.record("BizBuySell", LISTING, False)
+    planner.save()
+
+    for _ in range(5):
+        planner = FetchPlanner(path)
+        assert planner.choose("BizBuySell", LISTING) == BROWSER
+        planner.save()
+
+
+def test_decay_favours_this_runs_outcomes(tmp_path):
+    path = str(tmp_path / "fetch_modes.json")
+    planner = FetchPlanner(path)
+    for _ in range(3):
+        planner.record("Broker", LISTING, False)
+    planner.save()
+
+    planner = FetchPlanner(path)
+    for _ in range(3):
+        planner.record("Broker", LISTING, True)
+    assert planner.choose("Broker", LISTING) == HTTP
+
+
+def test_detail_usability_check_without_parsing():
+    from run_scrape import detail_has_financials
+
+    assert detail_has_financials("<dl><dt>Cash Flow:</dt><dd>$450,000</dd></dl>")
+    assert detail_has_financials(
+        '<script type="application/ld+json">{"@type": "Product", "offers": {"price": 900000}}</script>'
+    )
+    assert not detail_has_financials('<div id="root"></div><script src="/app.js"></script>')
@@ -0,0 +1,108 @@
+from dataclasses import asdict
+
+import pytest
+
+import run_scrape
+from deal_hunter_scraper import DEFAULT_CRITERIA, Deal, process_deal
+from known_urls import KnownUrls
+from scheduler import DeadlineScheduler
+from store import DealStore
+
+URL = "https://broker.example.com/listing/hvac-services-1"
+
+
+def card(text="Asking Price: $1,500,000 Cash Flow: $600,000 recurring revenue"):
+    return {"title": "HVAC services company", "href": URL, "text": text, "html": "", "source": "Broker"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with DealStore(str(tmp_path / "deals.sqlite")) as store:
+        yield store
+
+
+@pytest.fixture
+def known(tmp_path):
+    known = KnownUrls(str(tmp_path / "known.json"))
+    known.add([URL])
+    return known
+
+
+def stored_deal(store):
+    deal = Deal(
+        title="HVAC services company", url=URL, source="Broker", asking_price=1_500_000.0,
+        revenue=3_000_000.0, cash_flow_sde=600_000.0, ebitda=550_000.0,
+        description="Full detail-page description with recurring maintenance contracts.",
+    )
+    deal = asdict(process_deal(deal, DEFAULT_CRITERIA))
+    store.upsert([deal])
+    store.mark_uploaded([deal])
+    return deal
+
+
+def test_known_listing_keeps_stored_detail_and_skips_fetch(store, known):
+    stored = stored_deal(store)
+    stats = run_scrape.PrefilterStats()
+    kept = run_scrape.prefilter_listings([card()], DEFAULT_CRITERIA, stats=stats, known=known, store=store)
+
+    assert len(kept) == 1 and kept[0]["known"]
+    assert kept[0]["card_deal"]["description"] == stored["description"]
+    assert kept[0]["card_deal"]["revenue"] == stored["revenue"]
+    assert stats.known == 1 and stats.fetches_avoided == 1
+    assert run_scrape.DetailFetcher(DeadlineScheduler(None))._claim(kept[0]) is None
+
+
+def test_known_listing_still_reaches_store_unchanged(store, known):
+    stored_deal(store)
+    kept = run_scrape.prefilter_listings([card()], DEFAULT_CRITERIA, known=known, store=store)
+    deals = run_scrape.process_raw_listings(kept, DEFAULT_CRITERIA)
+
+    changed, new = store.upsert(deals)
+    assert len(deals) == 1 and new == 0 and changed == []
+
+
+def test_known_listing_price_change_is_uploaded(store, known):
+    stored_deal(store)
+    kept = run_scrape.prefilter_listings(
+        [card("Asking Price: $1,200,000 Cash Flow: $600,000")], DEFAULT_CRITERIA, known=known, store=store
+    )
+    deals = run_scrape.process_raw_listings(kept, DEFAULT_CRITERIA)
+
+    changed, _ = store.upsert(deals)
+    assert [d["asking_price"] for d in changed] == [1_200_000]
+    assert changed[0]["revenue"] == 3_000_000
+
+
+def test_known_url_missing_locally_is_fetched(store, known):
+    kept = run_scrape.prefilter_listings([card()], DEFAULT_CRITERIA, known=known, store=store)
+    assert len(kept) == 1 and not kept[0].get("known")
+
+
+def test_uploader_only_marks_urls_the_api_stored(store, known, monkeypatch, tmp_path):
+    monkeypatch.setattr(run_scrape, "DEAL_STORE_FILE", store.path)
+    kept_url, filtered_url = "https://b.example.com/1", "https://b.example.com/2"
+    deals = [{"url": kept_url, "title": "a"}, {"url": filtered_url, "title": "b"}]
+    store.upsert(deals)
+    monkeypatch.setattr(run_scrape, "post_deals_to_api", lambda *a: {"ok": True, "stored": [kept_url]})
+
+    known = KnownUrls(str(tmp_path / "k.json"))
+    run_scrape.Uploader("http://app", "secret", known=known)._post(deals, send_digest=False)
+
+    assert kept_url in known and filtered_url not in known
+    assert store.uploaded_urls() == [kept_url]
+
+
+def test_shard_run_stores_deals_for_its_next_prefilter(tmp_path, known, monkeypatch):
+    monkeypatch.setattr(run_scrape, "DEAL_STORE_FILE", str(tmp_path / "shard.sqlite"))
+    shard = run_scrape.parse_shard("1/3")
+    deal = asdict(process_deal(Deal(
+        title="HVAC services company", url=URL, source="Broker", asking_price=1_500_000.0,
+        revenue=3_000_000.0, cash_flow_sde=600_000.0, description="Full detail-page description.",
+    ), DEFAULT_CRITERIA))
+    run_scrape.write_shard(shard, str(tmp_path / "shards"), [deal], {}, DEFAULT_CRITERIA.version)
+
+    with DealStore(run_scrape.DEAL_STORE_FILE) as store:
+        kept = run_scrape.prefilter_listings([card()], DEFAULT_CRITERIA, known=known, store=store)
+    assert kept[0]["known"]
+    assert kept[0]["card_deal"]["description"] == "Full detail-page description."
+    assert (tmp_path / "shards" / shard.filename).exists()
@@ -0,0 +1,61 @@
+import threading
+
+from memory import MemoryBudget, deep_size, parse_size
+from pipeline import Pipeline, Stage
+
+
+def test_parse_size():
+    assert parse_size("512M") == 512 * 1024 ** 2
+    assert parse_size("1.5g") == int(1.5 * 1024 ** 3)
+    assert parse_size("800000") == 800000
+
+
+def test_deep_size_counts_shared_items_once():
+    page = "x" * 100_000
+    seen: set = set()
+    first = deep_size([{"detail_html": page}], seen)
+    second = deep_size([{"detail_html": page}], seen)
+    assert first > 100_000 > second
+
+
+def run_blocked_pipeline(measure):
+    """Run a pipeline whose process stage holds a large page until ``measure`` returns."""
+    entered, release = threading.Event(), threading.Event()
+
+    def process(batch):
+        entered.set()
+        release.wait(5)
+        return batch
+
+    pipeline = Pipeline(
+        sources=[lambda: iter([{"detail_html": "x" * 2_000_000}])],
+        stages=[Stage("detail", lambda batch: batch), Stage("process", process)],
+    )
+    runner = threading.Thread(target=pipeline.run)
+    runner.start()
+    assert entered.wait(5)
+    try:
+        return measure(pipeline)
+    finally:
+        release.set()
+        runner.join(5)
+
+
+def test_holdings_include_in_flight_batches():
+    held = run_blocked_pipeline(lambda pipeline: pipeline.holdings())
+    assert [len(held[name]) for name in ("detail", "process", "results")] == [0, 1, 0]
+
+
+def test_budget_attributes_peak_to_the_holding_stage(tmp_path):
+    budget = MemoryBudget(parse_size("1G"), str(tmp_path))
+
+    def measure(pipeline):
+        budget.watch(pipeline)
+        budget.start()
+        budget.stop()
+        return budget.report()
+
+    report = run_blocked_pipeline(measure)
+    stages = dict(line.split()[:2] for line in report.splitlines() if line.startswith("  ") and "MB" in line)
+    assert float(stages["process"]) >= 1.9
+    assert float(stages["detail"]) == 0.0
@@ -0,0 +1,35 @@
+import pickle
+
+from deal_hunter_scraper import DEFAULT_CRITERIA, Deal, compile_criteria, prefilter_reason
+
+
+def card(**financials):
+    return Deal(title="HVAC services company", **financials)
+
+
+def test_asking_price_out_of_range_is_final():
+    assert prefilter_reason(card(asking_price=9_000_000.0), DEFAULT_CRITERIA) == "asking_price"
+
+
+def test_cash_flow_alone_does_not_reject():
+    # The detail page may add EBITDA, which replaces cash flow for both checks
+    assert prefilter_reason(card(asking_price=4_000_000.0, cash_flow_sde=200_000.0), DEFAULT_CRITERIA) is None
+
+
+def test_card_ebitda_settles_earnings_and_multiple():
+    assert prefilter_reason(card(asking_price=2_000_000.0, ebitda=100_000.0), DEFAULT_CRITERIA) == "earnings"
+    assert prefilter_reason(card(asking_price=4_500_000.0, ebitda=400_000.0), DEFAULT_CRITERIA) == "multiple"
+    assert prefilter_reason(card(asking_price=1_500_000.0, ebitda=500_000.0), DEFAULT_CRITERIA) is None
+
+
+def test_prefilter_keeps_the_card_multiple():
+    deal = card(asking_price=2_000_000.0, cash_flow_sde=500_000.0)
+    prefilter_reason(deal, DEFAULT_CRITERIA)
+    assert deal.multiple == 4.0
+
+
+def test_compiled_criteria_round_trips_through_pickle():
+    criteria = compile_criteria({"ev_max": 3_000_000, "geography": "Texas"}, version="v1")
+    restored = pickle.loads(pickle.dumps(criteria))
+    assert restored == criteria
+    assert prefilter_reason(card(asking_price=4_000_000.0), restored) == "asking_price"
@@ -0,0 +1,21 @@
+import run_scrape
+from deal_hunter_scraper import DEFAULT_CRITERIA, prepare_profiles
+
+
+def listing(i):
+    return {"title": f"HVAC services company {i}", "href": f"https://b.example.com/l/{i}", "source": "Broker",
+            "text": "Asking Price: $1,500,000 Cash Flow: $500,000 Revenue: $3,000,000", "html": ""}
+
+
+def test_process_scores_profiles_without_recompiling(monkeypatch):
+    prepared = prepare_profiles([{"id": 1}, {"id": 2, "ev_max": 1_000_000}])
+
+    def recompile(*_args, **_kwargs):
+        raise AssertionError("profiles are compiled once per run, not per batch")
+
+    monkeypatch.setattr(run_scrape, "prepare_profiles", recompile)
+    monkeypatch.setattr(run_scrape, "compile_criteria", recompile)
+    deals = run_scrape.process_raw_listings([listing(i) for i in range(3)], DEFAULT_CRITERIA, prepared)
+
+    assert len(deals) == 3
+    assert all(set(d["profile_scores"]) == {"1"} for d in deals)
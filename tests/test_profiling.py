@@ -0,0 +1,82 @@
+import pstats
+import threading
+import time
+
+from pipeline import Pipeline, Stage
+from profiling import NULL_PROFILER, StageProfiler
+
+
+def parse_batch(batch):
+    return [sum(range(20_000)) + item for item in batch]
+
+
+def test_stage_writes_prof_and_collapsed(tmp_path):
+    profiler = StageProfiler(str(tmp_path))
+    with profiler.stage("criteria"):
+        parse_batch([1])
+    assert (tmp_path / "criteria.collapsed").exists()
+    functions = {name for _file, _line, name in pstats.Stats(str(tmp_path / "criteria.prof")).stats}
+    assert "parse_batch" in functions
+    assert "criteria" in profiler.summary()
+
+
+def test_pipeline_threads_get_per_stage_profiles(tmp_path):
+    profiler = StageProfiler(str(tmp_path), interval=0.001)
+    pipeline = Pipeline(
+        sources=[lambda: iter(range(50))],
+        stages=[Stage("parse", parse_batch, workers=2), Stage("upload", lambda batch: batch)],
+        profiler=profiler,
+    )
+    with profiler.stage("pipeline", profile_threads=False):
+        results = pipeline.run()
+
+    assert len(results) == 50
+    for name in ("pipeline", "sources", "parse", "upload"):
+        assert (tmp_path / f"{name}.prof").exists() and (tmp_path / f"{name}.collapsed").exists()
+    parse_functions = {name for _file, _line, name in pstats.Stats(str(tmp_path / "parse.prof")).stats}
+    assert "parse_batch" in parse_functions
+    roots = {line.split(";", 1)[0] for line in (tmp_path / "parse.collapsed").read_text().splitlines()}
+    assert roots <= {"parse-0", "parse-1"}
+    assert set(profiler.stage_seconds) >= {"pipeline", "sources", "parse", "upload"}
+
+
+def functions_in(path):
+    return {name for _file, _line, name in pstats.Stats(str(path)).stats}
+
+
+def test_threads_started_in_a_stage_are_profiled_only_when_asked(tmp_path):
+    profiler = StageProfiler(str(tmp_path))
+    for name, profile_threads in (("with_threads", True), ("without_threads", False)):
+        with profiler.stage(name, profile_threads=profile_threads):
+            worker = threading.Thread(target=parse_batch, args=([1],), name=f"{name}-worker")
+            worker.start()
+            worker.join()
+    assert "parse_batch" in functions_in(tmp_path / "with_threads.prof")
+    assert "parse_batch" not in functions_in(tmp_path / "without_threads.prof")
+
+
+def test_collapsed_stacks_include_waits_rooted_at_the_thread(tmp_path):
+    profiler = StageProfiler(str(tmp_path), interval=0.001)
+    with profiler.stage("fetch"):
+        worker = threading.Thread(target=time.sleep, args=(0.1,), name="fetcher")
+        worker.start()
+        worker.join()
+    lines = (tmp_path / "fetch.collapsed").read_text().splitlines()
+    _stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any(line.startswith("fetcher;") for line in lines)
+
+
+def test_repeated_stages_accumulate_wall_time(tmp_path):
+    profiler = StageProfiler(str(tmp_path))
+    for _ in range(2):
+        with profiler.stage("upload"):
+            time.sleep(0.02)
+    assert profiler.stage_seconds["upload"] >= 0.04
+    assert list(profiler.stage_seconds) == ["upload"]
+
+
+def test_null_profiler_writes_nothing(tmp_path):
+    with NULL_PROFILER.stage("process"), NULL_PROFILER.thread_stage("detail"):
+        parse_batch([1])
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,59 @@
+import json
+
+from deal_hunter_scraper import DEFAULT_CRITERIA, hand_tuned_score
+from scoring_model import ScoringModel, load_scoring_models, model_for
+from train_scoring import compile_model, fit, prior_weights
+
+
+def rating(industry, traits, multiple, target, user_id="1"):
+    return {"user_id": user_id, "industry": industry, "traits": traits, "avoid_traits": [],
+            "multiple": multiple, "target": target}
+
+
+def test_prior_model_reproduces_hand_tuned_score():
+    model = compile_model(prior_weights(DEFAULT_CRITERIA))
+    industry = next(iter(DEFAULT_CRITERIA.targets))
+    trait = next(iter(DEFAULT_CRITERIA.preferred))
+    for args in ([], [], None, ""), ([trait], [], 3.2, industry), ([], [], 6.0, industry):
+        assert abs(model.score(*args) - hand_tuned_score(*args, DEFAULT_CRITERIA)) < 1e-6
+
+
+def test_prior_model_lets_avoid_traits_go_below_the_trait_floor():
+    # hand_tuned_score clamps the trait part at 0, so an avoid trait on a deal
+    # without preferred traits costs it nothing; the additive prior has no
+    # such floor and charges the full penalty. Fitting learns from the
+    # ratings either way, so the prior only approximates the hand-tuned
+    # score for deals whose avoid traits outweigh their preferred ones.
+    model = compile_model(prior_weights(DEFAULT_CRITERIA))
+    industry = next(iter(DEFAULT_CRITERIA.targets))
+    preferred = sorted(DEFAULT_CRITERIA.preferred)[:2]
+    avoid = next(iter(DEFAULT_CRITERIA.avoid - DEFAULT_CRITERIA.preferred))
+    penalty = 15 * 50 / DEFAULT_CRITERIA.max_trait
+
+    args = ([], [avoid], 2.0, industry)
+    assert hand_tuned_score(*args, DEFAULT_CRITERIA) == hand_tuned_score([], [], 2.0, industry, DEFAULT_CRITERIA)
+    assert abs(model.score(*args) - (hand_tuned_score(*args, DEFAULT_CRITERIA) - penalty)) < 1e-6
+
+    # Above the floor the two agree
+    args = (preferred, [avoid], 2.0, industry)
+    assert abs(model.score(*args) - hand_tuned_score(*args, DEFAULT_CRITERIA)) < 1e-6
+
+
+def test_fit_moves_rated_industries_toward_targets():
+    prior = prior_weights(DEFAULT_CRITERIA)
+    ratings = [rating("Car Wash", [], 3.0, 100.0) for _ in range(40)]
+    model = compile_model(fit(ratings, prior, strength=5.0))
+    untrained = compile_model(prior)
+    assert model.score([], [], 3.0, "Car Wash") > untrained.score([], [], 3.0, "Car Wash")
+    assert model.score([], [], 3.0, "Car Wash") > 90
+
+
+def test_model_file_round_trip(tmp_path):
+    model = compile_model(prior_weights(DEFAULT_CRITERIA))
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps({"global": model.to_dict(), "users": {"7": model.to_dict()}}))
+    models = load_scoring_models(str(path))
+    assert models[""] == model and models[""].version == model.version
+    assert model_for(models, "7").user_id == "7"
+    assert model_for(models, "8") is models[""]
+    assert isinstance(model_for(models), ScoringModel)
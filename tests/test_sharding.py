@@ -0,0 +1,53 @@
+import argparse
+from datetime import datetime, timezone
+
+import pytest
+
+from sharding import Shard, merge_deals, parse_shard, read_shard_outputs, shard_of, write_shard_output
+
+
+def test_shard_of_is_stable_and_partitions_keys():
+    keys = [f"https://www.bizbuysell.com/search/{i}" for i in range(300)]
+    # SHA-1 based, so the same on every machine (unlike hash())
+    assert shard_of(keys[0], 3) == 1
+    shards = [Shard(i, 3) for i in (1, 2, 3)]
+    for key in keys:
+        assert sum(s.owns(key) for s in shards) == 1
+    assert all(sum(s.owns(k) for k in keys) > 50 for s in shards)
+
+
+def test_parse_shard():
+    assert parse_shard(" 2 / 3 ") == Shard(2, 3)
+    for bad in ("0/3", "4/3", "2"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(bad)
+
+
+def test_merge_keeps_most_complete_copy_and_unions_profiles():
+    sparse = {"url": "u1", "title": "A", "revenue": None, "score": 40, "profile_scores": {"1": 40}}
+    full = {"url": "u1", "title": "A", "revenue": 2e6, "score": 40, "profile_scores": {"2": 55}}
+    merged = merge_deals([[sparse], [full, {"url": "u2", "title": "B"}]])
+    assert len(merged) == 2
+    assert merged[0]["revenue"] == 2e6 and merged[0]["profile_scores"] == {"1": 40, "2": 55}
+
+
+def test_read_shard_outputs_uses_the_common_shard_count(tmp_path, capsys):
+    found = {"Broker": datetime(2026, 1, 1, tzinfo=timezone.utc)}
+    write_shard_output(str(tmp_path), Shard(1, 3), [{"url": "u1"}], found, "v1")
+    write_shard_output(str(tmp_path), Shard(3, 3), [{"url": "u3"}], {}, "v1")
+    write_shard_output(str(tmp_path), Shard(1, 2), [{"url": "old"}], {}, "v0")
+
+    outputs, paths = read_shard_outputs(str(tmp_path))
+    assert [o["shard"] for o in outputs] == ["1/3", "3/3"] and len(paths) == 2
+    assert outputs[0]["discovery"] == {"Broker": "2026-01-01T00:00:00+00:00"}
+    assert "2/3" in capsys.readouterr().err
+
+
+def test_unreadable_shard_file_is_not_returned(tmp_path, capsys):
+    write_shard_output(str(tmp_path), Shard(1, 2), [{"url": "u1"}], {}, "v1")
+    (tmp_path / Shard(2, 2).filename).write_text('{"shard": "2/2", "deals": [')
+
+    outputs, paths = read_shard_outputs(str(tmp_path))
+    assert [o["shard"] for o in outputs] == ["1/2"]
+    assert [p.rsplit("/", 1)[-1] for p in paths] == [Shard(1, 2).filename]
+    assert "keeping it" in capsys.readouterr().err
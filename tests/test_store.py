@@ -0,0 +1,62 @@
+from dataclasses import asdict
+
+from deal_hunter_scraper import Deal
+from store import DealStore
+
+
+def deal(url, **overrides):
+    fields = {"title": f"Business at {url}", "source": "Test", "url": url, "asking_price": 1500000.0,
+              "score": 60, "industry": "Water Treatment", "date_found": "2026-10-01"}
+    fields.update(overrides)
+    return asdict(Deal(**fields))
+
+
+def test_only_new_or_changed_deals_are_uploaded(tmp_path):
+    with DealStore(str(tmp_path / "deals.sqlite")) as store:
+        a, b = deal("https://x.example/a"), deal("https://x.example/b")
+        changed, new = store.upsert([a, b], seen_on="2026-10-01")
+        assert (len(changed), new) == (2, 2)
+        store.mark_uploaded(changed)
+
+        # A new run date alone is not a change
+        changed, new = store.upsert([deal("https://x.example/a", date_found="2026-10-08"), b], seen_on="2026-10-08")
+        assert (changed, new) == ([], 0)
+
+        repriced = deal("https://x.example/a", asking_price=1200000.0)
+        changed, new = store.upsert([repriced, b], seen_on="2026-10-09")
+        assert (changed, new) == ([repriced], 0)
+
+
+def test_changed_deal_stays_pending_until_marked_uploaded(tmp_path):
+    with DealStore(str(tmp_path / "deals.sqlite")) as store:
+        a = deal("https://x.example/a")
+        store.upsert([a])
+        assert store.upsert([a])[0] == [a]
+        assert store.uploaded_urls() == []
+        store.mark_uploaded([a])
+        assert store.upsert([a])[0] == []
+        assert store.uploaded_urls() == ["https://x.example/a"]
+
+
+def test_rows_keep_first_seen_and_date_found(tmp_path):
+    with DealStore(str(tmp_path / "deals.sqlite")) as store:
+        store.upsert([deal("https://x.example/a", traits=["recurring_revenue"])], seen_on="2026-10-01")
+        store.upsert([deal("https://x.example/a", date_found="2026-10-08", score=70)], seen_on="2026-10-08")
+        (row,) = store.top()
+        assert (row["first_seen"], row["last_seen"], row["date_found"]) == ("2026-10-01", "2026-10-08", "2026-10-01")
+        assert row["score"] == 70 and row["traits"] == []
+        assert store.get("https://x.example/a")["score"] == 70
+        assert store.get("https://x.example/missing") is None
+
+
+def test_top_filters_and_orders_by_score(tmp_path):
+    with DealStore(str(tmp_path / "deals.sqlite")) as store:
+        store.upsert([
+            deal("https://x.example/low", score=40),
+            deal("https://x.example/high", score=90),
+            deal("https://x.example/other", score=80, industry="Pallet Recycling"),
+        ], seen_on="2026-10-01")
+        assert [d["url"] for d in store.top(2)] == ["https://x.example/high", "https://x.example/other"]
+        assert [d["score"] for d in store.top(industry="Water Treatment")] == [90, 40]
+        assert [d["score"] for d in store.top(min_score=85)] == [90]
+        assert store.top(since="2026-10-02") == []
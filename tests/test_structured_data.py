@@ -0,0 +1,59 @@
+import json
+
+from deal_hunter_scraper import Deal, apply_structured_data, extract_structured_data
+
+
+def page(blob, next_data=False):
+    attrs = 'id="__NEXT_DATA__" type="application/json"' if next_data else 'type="application/ld+json"'
+    return f"<html><script {attrs}>{json.dumps(blob)}</script></html>"
+
+
+def test_next_data_ignores_similar_listings():
+    blob = {"props": {"pageProps": {
+        "similarListings": [{"askingPrice": 900000, "cashFlow": 300000, "revenue": 2000000}],
+        "listing": {"askingPrice": 1500000, "cashFlow": 450000},
+    }}}
+    values, _ = extract_structured_data(page(blob, next_data=True))
+    assert values == {"asking_price": 1500000.0, "cash_flow_sde": 450000.0}
+
+
+def test_next_data_listing_found_by_its_financials():
+    blob = {"props": {"pageProps": {
+        "recommended": {"askingPrice": 1, "revenue": 2},
+        "data": {"detail": {"askingPrice": "$2,000,000", "grossRevenue": "$5,000,000"}},
+    }}}
+    values, _ = extract_structured_data(page(blob, next_data=True))
+    assert values == {"asking_price": 2000000.0, "revenue": 5000000.0}
+
+
+def test_json_ld_reads_only_the_listing_node():
+    blob = {"@context": "https://schema.org", "@graph": [
+        {"@type": "Organization", "name": "Broker Co", "numberOfEmployees": 40},
+        {"@type": "Product", "name": "Plumbing company", "offers": {"@type": "Offer", "price": 800000},
+         "additionalProperty": [{"@type": "PropertyValue", "name": "Cash Flow", "value": "$250,000"}],
+         "isSimilarTo": [{"@type": "Product", "name": "Other", "additionalProperty": [
+             {"@type": "PropertyValue", "name": "Gross Revenue", "value": "$9,000,000"}]}]},
+    ]}
+    values, _ = extract_structured_data(page(blob))
+    assert values == {"title": "Plumbing company", "asking_price": 800000.0, "cash_flow_sde": 250000.0}
+
+
+def test_null_and_empty_keys_do_not_settle_fields():
+    blob = {"props": {"pageProps": {"listing": {"askingPrice": 1500000, "revenue": None, "ebitda": ""}}}}
+    values, undisclosed = extract_structured_data(page(blob, next_data=True))
+    assert values == {"asking_price": 1500000.0} and undisclosed == set()
+
+    deal = Deal(title="t", description="d", location="l", category="c", cash_flow_sde=1.0)
+    _, complete = apply_structured_data(page(blob, next_data=True), deal)
+    assert not complete
+
+
+def test_not_disclosed_settles_field():
+    listing = {"askingPrice": 1500000, "revenue": 3000000, "cashFlow": 500000, "ebitda": "Not Disclosed"}
+    blob = {"props": {"pageProps": {"listing": listing}}}
+    values, undisclosed = extract_structured_data(page(blob, next_data=True))
+    assert undisclosed == {"ebitda"} and "ebitda" not in values
+
+    deal = Deal(title="t", description="d", location="l", category="c")
+    filled, complete = apply_structured_data(page(blob, next_data=True), deal)
+    assert filled == 3 and complete
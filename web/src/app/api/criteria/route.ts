@@ -2,7 +2,13 @@ import { NextRequest, NextResponse } from "next/server";
 import { getDb, initSchema, Criteria } from "@/lib/db";
 import { getSession } from "@/lib/auth";
 
-export async function GET() {
+// ETag derived from updated_at so the scraper can revalidate its cached,
+// compiled copy of the criteria with If-None-Match instead of refetching.
+function criteriaEtag(row: Criteria): string {
+  return `"${new Date(row.updated_at).getTime()}"`;
+}
+
+export async function GET(req: NextRequest) {
   try {
     const session = await getSession();
     if (!session) {
@@ -21,10 +27,14 @@ export async function GET() {
       const inserted = (await sql`
         INSERT INTO criteria (user_id) VALUES (${session.userId}) RETURNING *
       `) as Criteria[];
-      return NextResponse.json(inserted[0]);
+      return NextResponse.json(inserted[0], { headers: { ETag: criteriaEtag(inserted[0]) } });
     }
 
-    return NextResponse.json(rows[0]);
+    const etag = criteriaEtag(rows[0]);
+    if (req.headers.get("if-none-match") === etag) {
+      return new NextResponse(null, { status: 304, headers: { ETag: etag } });
+    }
+    return NextResponse.json(rows[0], { headers: { ETag: etag } });
   } catch (e: unknown) {
     const msg = e instanceof Error ? e.message : String(e);
     console.error("GET /api/criteria error:", msg);
@@ -0,0 +1,46 @@
+import { createHash } from "crypto";
+import { NextRequest, NextResponse } from "next/server";
+import { getDb, initSchema } from "@/lib/db";
+
+export const dynamic = "force-dynamic";
+
+// Compact, versioned set of the deal URLs already stored, so the scraper
+// can skip enriching and re-uploading listings the server has. Each URL is
+// reduced to the first 8 bytes of its SHA-1; the hashes are sorted and
+// returned base64-packed. `version` is the highest deal id included, so
+// the scraper can ask for ?since=<version> next time and get only newer URLs.
+function urlHash(url: string): Buffer {
+  return createHash("sha1").update(url, "utf8").digest().subarray(0, 8);
+}
+
+export async function GET(req: NextRequest) {
+  try {
+    const expected = process.env.SCRAPE_API_SECRET;
+    if (expected && req.headers.get("authorization") !== `Bearer ${expected}`) {
+      return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+    }
+
+    const since = Math.max(0, Number(req.nextUrl.searchParams.get("since")) || 0);
+
+    const sql = getDb();
+    await initSchema();
+
+    const rows = (await sql`
+      SELECT id, url FROM deals WHERE id > ${since} AND url != '' ORDER BY id
+    `) as { id: number; url: string }[];
+
+    const hashes = rows.map((r) => urlHash(r.url)).sort(Buffer.compare);
+    const version = rows.length > 0 ? rows[rows.length - 1].id : since;
+
+    return NextResponse.json({
+      since,
+      version,
+      count: hashes.length,
+      hashes: Buffer.concat(hashes).toString("base64"),
+    });
+  } catch (e: unknown) {
+    const msg = e instanceof Error ? e.message : String(e);
+    console.error("GET /api/deals/known error:", msg);
+    return NextResponse.json({ error: msg }, { status: 500 });
+  }
+}
@@ -22,6 +22,8 @@ export async function POST(req: NextRequest) {
     let inserted = 0;
     let skipped = 0;
     let filtered = 0;
+    // URLs actually written, so the scraper only treats these as known
+    const stored: string[] = [];
 
     for (const d of deals) {
       try {
@@ -80,6 +82,7 @@ export async function POST(req: NextRequest) {
             description = EXCLUDED.description
         `;
         inserted++;
+        if (d.url) stored.push(String(d.url));
       } catch (e: unknown) {
         const msg = e instanceof Error ? e.message : String(e);
         console.error(`Skipped deal "${d.title}": ${msg}`);
@@ -93,6 +96,7 @@ export async function POST(req: NextRequest) {
       skipped,
       filtered,
       total: deals.length,
+      stored,
     });
   } catch (e: unknown) {
     const msg = e instanceof Error ? e.message : String(e);
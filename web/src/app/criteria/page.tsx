@@ -297,7 +297,7 @@ export default function CriteriaPage() {
               value={geography}
               onChange={(e) => setGeography(e.target.value)}
               className={inputClass + " max-w-sm"}
-              placeholder="e.g. United States"
+              placeholder="e.g. United States, TN, GA or within 150 miles of Memphis, TN"
             />
           </div>
         </section>